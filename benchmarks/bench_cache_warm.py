@@ -0,0 +1,118 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fakes import FakeProfile, Latency, install
+
+def track_url(track: int) -> str:
+    return f"https://www.youtube.com/watch?v=t{track:010d}"
+
+def sample_track(rng: random.Random, tracks: int, skew: float) -> int:
+    weights = [1 / (rank + 1) ** skew for rank in range(tracks)]
+    return rng.choices(range(tracks), weights=weights)[0]
+
+def build_history(args, rng: random.Random):
+    now = datetime.utcnow()
+    plays = []
+    for _ in range(args.history):
+        chat_id = -1000 - rng.randrange(args.chats)
+        plays.append({
+            "song_title": "track",
+            "url": track_url(sample_track(rng, args.tracks, args.skew)),
+            "platform": "YouTube",
+            "chat_id": chat_id,
+            "requested_by": 1,
+            "duration": 180,
+            "cache_hit": False,
+            "timestamp": now - timedelta(hours=rng.uniform(0, args.history_days * 24)),
+        })
+    return plays
+
+async def replay(requests):
+    from utils import downloader
+
+    hits, misses = downloader.AUDIO_CACHE_HITS.value, downloader.AUDIO_CACHE_MISSES.value
+    for url in requests:
+        await downloader.download_song(url)
+    hits = downloader.AUDIO_CACHE_HITS.value - hits
+    misses = downloader.AUDIO_CACHE_MISSES.value - misses
+    return hits / max(1, hits + misses)
+
+async def run(args):
+    from config import config
+    from database import db
+    from utils.cache_warmer import cache_warmer
+
+    rng = random.Random(args.seed)
+    await db.connect()
+    try:
+        await db._insert_plays(build_history(args, rng))
+        requests = [track_url(sample_track(rng, args.tracks, args.skew)) for _ in range(args.requests)]
+
+        cold = await replay(requests)
+
+        shutil.rmtree(config.MUSIC_CACHE_DIR, ignore_errors=True)
+        os.makedirs(config.MUSIC_CACHE_DIR, exist_ok=True)
+        fetched = await cache_warmer.warm()
+        warm = await replay(requests)
+    finally:
+        await db.close()
+
+    return {
+        "hit_ratio_cold": cold,
+        "hit_ratio_warmed": warm,
+        "tracks_warmed": fetched,
+        "warm_bytes": cache_warmer.hour_bytes,
+        "stopped": cache_warmer.last_skip,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare music cache hit rate with and without cache warming")
+    parser.add_argument("--tracks", type=int, default=500, help="distinct tracks in the simulated catalogue")
+    parser.add_argument("--chats", type=int, default=20)
+    parser.add_argument("--history", type=int, default=5000, help="past plays recorded in the database")
+    parser.add_argument("--history-days", type=float, default=14)
+    parser.add_argument("--requests", type=int, default=300, help="/play requests replayed after warming")
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of track popularity")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write machine-readable results to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    install(FakeProfile(telegram=Latency(), search=Latency(), extract=Latency(), download=Latency(),
+                        transcode=Latency(), join_call=Latency()))
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    with tempfile.TemporaryDirectory(prefix="bench_cache_warm_") as workdir:
+        os.environ.update({
+            "DATABASE_BACKEND": "sqlite",
+            "SQLITE_PATH": os.path.join(workdir, "bench.db"),
+            "MUSIC_CACHE_DIR": os.path.join(workdir, "music"),
+            "LOGGER_GROUP_ID": "0",
+            "METRICS_PORT": "0",
+            "CACHE_WARM_MAX_CPU": "100",
+        })
+        os.chdir(workdir)
+        result = asyncio.run(run(args))
+
+    print(f"hit rate without warming: {result['hit_ratio_cold']:6.1%}")
+    print(f"hit rate after warming:   {result['hit_ratio_warmed']:6.1%}")
+    print(f"tracks warmed:            {result['tracks_warmed']:6d} ({result['warm_bytes'] / 1024:.0f} KB"
+          f"{', stopped: ' + result['stopped'] if result['stopped'] else ''})")
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump({"settings": vars(args), "results": result}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
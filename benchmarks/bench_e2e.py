@@ -0,0 +1,233 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fakes import FakeProfile, FakeMessage, FakeUser, Latency, Obj, install
+
+SCENARIOS = ("assiststart", "play", "moderation")
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+def build_profile(args) -> FakeProfile:
+    scale = args.latency_scale
+
+    def latency(mean, jitter):
+        return Latency(mean * scale, jitter * scale, args.failure_rate)
+
+    return FakeProfile(
+        telegram=latency(0.03, 0.01),
+        search=latency(0.25, 0.05),
+        extract=latency(0.4, 0.1),
+        download=latency(0.8, 0.2),
+        transcode=latency(0.3, 0.05),
+        join_call=latency(0.15, 0.05),
+        flood_wait_rate=args.flood_wait_rate,
+        seed=args.seed
+    )
+
+def configure_environment(args, workdir):
+    os.environ.update({
+        "DATABASE_BACKEND": "sqlite",
+        "SQLITE_PATH": os.path.join(workdir, "bench.db"),
+        "LOGGER_GROUP_ID": "0",
+        "METRICS_PORT": "0",
+        "OWNER_ID": "1",
+    })
+    if not args.telegram_limits:
+        os.environ.update({
+            "OUTBOUND_CHAT_RATE": "1000",
+            "OUTBOUND_CHAT_BURST": "1000",
+            "OUTBOUND_GLOBAL_RATE": "100000",
+            "OUTBOUND_GLOBAL_BURST": "100000",
+        })
+    os.chdir(workdir)
+
+class Harness:
+    def __init__(self, commands_per_chat: int, repeat_ratio: float):
+        from handlers import commands, group_management, music, voice_chat
+        from utils.outbound import outbound
+        from pyrogram import Client
+
+        self.commands_per_chat = commands_per_chat
+        self.repeat_ratio = repeat_ratio
+        self.voice_chat = voice_chat
+        self.music = music
+        self.group_management = group_management
+
+        self.bot = Client("bench_bot")
+        self.assistant = Client("bench_assistant")
+        outbound.attach(self.bot)
+        for module in (commands, voice_chat, music, group_management):
+            module.setup_handlers(self.bot, self.assistant)
+
+        self.message_id = 0
+
+    def message(self, chat_id: int, text: str, reply_to_user: int = None) -> FakeMessage:
+        self.message_id += 1
+        reply = FakeMessage(id=self.message_id, from_user=FakeUser(id=reply_to_user)) if reply_to_user else None
+        return FakeMessage(
+            id=self.message_id,
+            chat=Obj(id=chat_id, title=f"Bench {chat_id}"),
+            from_user=FakeUser(id=2, first_name="admin"),
+            text=text,
+            command=text.lstrip("/").split(),
+            reply_to_message=reply,
+            date=None
+        )
+
+    def commands_for(self, scenario: str, chat_id: int):
+        if scenario == "assiststart":
+            return [(self.voice_chat.assiststart_handler, self.message(chat_id, "/assiststart"))]
+
+        if scenario == "play":
+            plays = []
+            for i in range(self.commands_per_chat):
+                track = 0 if i and (i * 7919 % 100) < self.repeat_ratio * 100 else i
+                plays.append((self.music.play_handler, self.message(chat_id, f"/play track {chat_id} {track}")))
+            return plays
+
+        handlers = (self.group_management.ban_handler, self.group_management.mute_handler,
+                    self.group_management.kick_handler, self.group_management.unban_handler)
+        return [
+            (handlers[i % len(handlers)], self.message(chat_id, "/moderate", reply_to_user=1000 + i))
+            for i in range(self.commands_per_chat)
+        ]
+
+    async def run(self, scenario: str, chats: int):
+        from utils.middleware import pipeline
+
+        latencies = []
+        errors = 0
+        errors_before = sum(pipeline.errors.values())
+
+        async def run_chat(chat_id: int):
+            nonlocal errors
+            for handler, message in self.commands_for(scenario, chat_id):
+                started = time.perf_counter()
+                try:
+                    await handler(self.bot, message)
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        chat_ids = [-1000000 - i for i in range(chats)]
+        if scenario == "play":
+            await asyncio.gather(*(self.voice_chat.assiststart_handler(self.bot, self.message(chat_id, "/assiststart"))
+                                   for chat_id in chat_ids))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run_chat(chat_id) for chat_id in chat_ids))
+        elapsed = time.perf_counter() - started
+
+        if scenario in ("assiststart", "play"):
+            await asyncio.gather(*(self.voice_chat.assistclose_handler(self.bot, self.message(chat_id, "/assistclose"))
+                                   for chat_id in chat_ids))
+
+        return {
+            "scenario": scenario,
+            "chats": chats,
+            "commands": len(latencies),
+            "errors": errors + sum(pipeline.errors.values()) - errors_before,
+            "elapsed": round(elapsed, 4),
+            "commands_per_sec": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "max_ms": round(max(latencies) * 1000, 2) if latencies else 0.0,
+        }
+
+async def run_benchmarks(args, fake_profile: FakeProfile):
+    from database import db
+
+    await db.connect()
+    harness = Harness(args.commands_per_chat, args.repeat_ratio)
+
+    results = []
+    try:
+        for scenario in args.scenarios:
+            for chats in args.chats:
+                calls_before = dict(fake_profile.calls)
+                result = await harness.run(scenario, chats)
+                result["fake_calls"] = {
+                    name: count - calls_before.get(name, 0)
+                    for name, count in fake_profile.calls.items()
+                    if count - calls_before.get(name, 0)
+                }
+                results.append(result)
+                print(
+                    f"{scenario:<12} chats={chats:>5} cmds={result['commands']:>6} "
+                    f"{result['commands_per_sec']:>9.1f} cmd/s  p50={result['p50_ms']:>8.1f}ms "
+                    f"p95={result['p95_ms']:>8.1f}ms p99={result['p99_ms']:>8.1f}ms errors={result['errors']}",
+                    flush=True
+                )
+    finally:
+        await db.close()
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark driving the real handlers against fakes")
+    parser.add_argument("--chats", default="1,10,100,1000", help="comma-separated simulated chat counts")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma-separated subset of {SCENARIOS}")
+    parser.add_argument("--commands-per-chat", type=int, default=3)
+    parser.add_argument("--repeat-ratio", type=float, default=0.3, help="share of /play requests for an already cached track")
+    parser.add_argument("--latency-scale", type=float, default=0.01,
+                        help="multiplier for the fake latencies (1.0 approximates production)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="probability each fake call fails")
+    parser.add_argument("--flood-wait-rate", type=float, default=0.0, help="probability a Telegram call raises FloodWait")
+    parser.add_argument("--telegram-limits", action="store_true", help="keep the configured outbound rate limits")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write machine-readable results to this file")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    args.chats = [int(value) for value in args.chats.split(",") if value]
+    args.scenarios = [value for value in args.scenarios.split(",") if value]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+
+    fake_profile = install(build_profile(args))
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    with tempfile.TemporaryDirectory(prefix="bench_e2e_") as workdir:
+        configure_environment(args, workdir)
+        started = time.time()
+        results = asyncio.run(run_benchmarks(args, fake_profile))
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump({
+                "started_at": started,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "settings": {
+                    "commands_per_chat": args.commands_per_chat,
+                    "repeat_ratio": args.repeat_ratio,
+                    "latency_scale": args.latency_scale,
+                    "failure_rate": args.failure_rate,
+                    "flood_wait_rate": args.flood_wait_rate,
+                    "telegram_limits": args.telegram_limits,
+                    "seed": args.seed,
+                },
+                "results": results,
+            }, f, indent=2)
+        print(f"Results written to {json_path}")
+
+if __name__ == "__main__":
+    main()
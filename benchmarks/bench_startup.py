@@ -0,0 +1,146 @@
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("yt_dlp", "spotipy", "speech_recognition", "pydub", "pytgcalls", "youtubesearchpython")
+PROJECT_PACKAGES = ("bot", "config", "database", "handlers", "utils")
+
+async def first_update():
+    import bot
+    from database import db
+    from benchmarks.fakes import FakeMessage, FakeUser, Obj
+
+    await db.connect()
+    try:
+        handler = next(handler for _, handler in bot.music_bot.bot.handlers
+                       if handler.callback.__name__ == "ping_handler")
+        message = FakeMessage(id=1, chat=Obj(id=-100, title="Startup"), from_user=FakeUser(id=2, first_name="user"),
+                              text="/ping", command=["ping"], reply_to_message=None, date=None)
+        await handler.callback(bot.music_bot.bot, message)
+    finally:
+        await db.close()
+
+def child():
+    started = time.perf_counter()
+    sys.path.insert(0, ROOT)
+
+    from benchmarks.fakes import FakeProfile, Latency, install
+
+    real = tuple(name for name in HEAVY_MODULES if importlib.util.find_spec(name) is not None)
+    install(FakeProfile(telegram=Latency(), search=Latency(), extract=Latency(), download=Latency(),
+                        transcode=Latency(), join_call=Latency()), lazy=True, real=real)
+
+    import_started = time.perf_counter()
+    import bot
+    imported = time.perf_counter()
+    eager = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    asyncio.run(first_update())
+    handled = time.perf_counter()
+
+    print(json.dumps({
+        "import_bot_ms": (imported - import_started) * 1000,
+        "first_update_ms": (handled - started) * 1000,
+        "eager_heavy_modules": eager,
+        "loaded_after_update": [name for name in HEAVY_MODULES if name in sys.modules],
+        "real_heavy_modules": list(real),
+    }))
+
+def parse_importtime(stderr: str):
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            modules[name.strip()] = int(cumulative) / 1000
+        except ValueError:
+            continue
+    return modules
+
+def run_child(workdir: str):
+    env = dict(os.environ, DATABASE_BACKEND="sqlite", SQLITE_PATH=os.path.join(workdir, "startup.db"),
+               LOGGER_GROUP_ID="0", METRICS_PORT="0", PYTHONDONTWRITEBYTECODE="")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--child"],
+        cwd=workdir, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"startup run failed:\n{result.stderr[-4000:]}")
+
+    stats = json.loads(result.stdout.strip().splitlines()[-1])
+    stats["modules"] = parse_importtime(result.stderr)
+    return stats
+
+def main():
+    if "--child" in sys.argv:
+        child()
+        return
+
+    parser = argparse.ArgumentParser(description="Measure import time per module and time to the first handled update")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="modules to list by cumulative import time")
+    parser.add_argument("--max-import-ms", type=float, default=0, help="fail if importing bot takes longer (median)")
+    parser.add_argument("--max-first-update-ms", type=float, default=0,
+                        help="fail if the first handled update takes longer (median)")
+    parser.add_argument("--json", help="write machine-readable results to this file")
+    args = parser.parse_args()
+
+    runs = []
+    with tempfile.TemporaryDirectory(prefix="bench_startup_") as workdir:
+        for _ in range(max(1, args.runs)):
+            runs.append(run_child(workdir))
+
+    import_ms = statistics.median(run["import_bot_ms"] for run in runs)
+    first_update_ms = statistics.median(run["first_update_ms"] for run in runs)
+    modules = {
+        name: statistics.median(run["modules"].get(name, 0.0) for run in runs)
+        for name in runs[0]["modules"]
+        if name.split(".")[0] in PROJECT_PACKAGES + HEAVY_MODULES
+    }
+    eager = sorted(set().union(*(run["eager_heavy_modules"] for run in runs)))
+
+    print(f"import bot:          {import_ms:8.1f} ms (median of {len(runs)})")
+    print(f"first handled update: {first_update_ms:7.1f} ms from interpreter start")
+    print(f"real heavy modules:   {', '.join(runs[0]['real_heavy_modules']) or 'none (fakes used)'}")
+    print(f"eager heavy modules:  {', '.join(eager) or 'none'}")
+    print(f"\nSlowest imports (cumulative):")
+    for name, ms in sorted(modules.items(), key=lambda x: x[1], reverse=True)[:args.top]:
+        print(f"{ms:8.1f} ms  {name}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "import_bot_ms": import_ms,
+                "first_update_ms": first_update_ms,
+                "eager_heavy_modules": eager,
+                "modules": modules,
+                "runs": [{key: value for key, value in run.items() if key != "modules"} for run in runs],
+            }, f, indent=2)
+
+    failures = []
+    if eager:
+        failures.append(f"heavy modules imported at startup: {', '.join(eager)}")
+    if args.max_import_ms and import_ms > args.max_import_ms:
+        failures.append(f"import bot took {import_ms:.1f} ms (limit {args.max_import_ms:.1f} ms)")
+    if args.max_first_update_ms and first_update_ms > args.max_first_update_ms:
+        failures.append(f"first update took {first_update_ms:.1f} ms (limit {args.max_first_update_ms:.1f} ms)")
+
+    if failures:
+        print("\nREGRESSION: " + "; ".join(failures))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+# Stand-in for ffmpeg used by the benchmarks: takes as long as the fake
+# profile's transcode latency and writes a placeholder output file
+sleep "${FAKE_FFMPEG_SECONDS:-0}"
+for output; do :; done
+head -c 1024 /dev/zero > "$output"
+echo "out_time_us=180000000"
+echo "progress=end"
@@ -0,0 +1,398 @@
+import asyncio
+import enum
+import importlib.abc
+import importlib.util
+import itertools
+import os
+import random
+import shlex
+import sys
+import time
+import types
+from datetime import datetime
+
+class Latency:
+    def __init__(self, mean: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0):
+        self.mean = mean
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+
+    def sample(self, rng: random.Random) -> float:
+        if not self.mean:
+            return 0.0
+        return max(0.0, rng.gauss(self.mean, self.jitter))
+
+    def fails(self, rng: random.Random) -> bool:
+        return self.failure_rate > 0 and rng.random() < self.failure_rate
+
+class FakeProfile:
+    def __init__(self, telegram: Latency = None, search: Latency = None, extract: Latency = None,
+                 download: Latency = None, transcode: Latency = None, join_call: Latency = None,
+                 flood_wait_rate: float = 0.0, flood_wait_seconds: int = 1, admins: int = 3,
+                 seed: int = 1):
+        self.telegram = telegram or Latency(0.03, 0.01)
+        self.search = search or Latency(0.25, 0.05)
+        self.extract = extract or Latency(0.4, 0.1)
+        self.download = download or Latency(0.8, 0.2)
+        self.transcode = transcode or Latency(0.3, 0.05)
+        self.join_call = join_call or Latency(0.15, 0.05)
+        self.flood_wait_rate = flood_wait_rate
+        self.flood_wait_seconds = flood_wait_seconds
+        self.admins = admins
+        self.rng = random.Random(seed)
+        self.calls = {}
+
+    def count(self, name: str):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    async def telegram_call(self, name: str):
+        self.count(name)
+        await asyncio.sleep(self.telegram.sample(self.rng))
+        if self.flood_wait_rate and self.rng.random() < self.flood_wait_rate:
+            raise sys.modules["pyrogram.errors"].FloodWait(self.flood_wait_seconds)
+        if self.telegram.fails(self.rng):
+            raise sys.modules["pyrogram.errors"].BadRequest(f"injected failure in {name}")
+
+    def blocking(self, name: str, latency: Latency):
+        self.count(name)
+        time.sleep(latency.sample(self.rng))
+        if latency.fails(self.rng):
+            raise RuntimeError(f"injected failure in {name}")
+
+profile = FakeProfile()
+
+lazy_modules = {}
+real_packages = ()
+
+class LazyFakeFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    def find_spec(self, name, path=None, target=None):
+        if name not in lazy_modules:
+            return None
+        is_package = any(other.startswith(name + ".") for other in lazy_modules)
+        return importlib.util.spec_from_loader(name, self, is_package=is_package)
+
+    def create_module(self, spec):
+        return lazy_modules[spec.name]
+
+    def exec_module(self, module):
+        pass
+
+def _module(name: str, **attrs) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    if name.split(".")[0] in real_packages:
+        return module
+    if LAZY_FINDER in sys.meta_path:
+        lazy_modules[name] = module
+    else:
+        sys.modules[name] = module
+    return module
+
+LAZY_FINDER = LazyFakeFinder()
+
+class Obj:
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+    def __getattr__(self, name):
+        return None
+
+class FakeUser(Obj):
+    @property
+    def mention(self):
+        return f"[{self.first_name or self.id}](tg://user?id={self.id})"
+
+class FakeMessage(Obj):
+    def stop_propagation(self):
+        raise sys.modules["pyrogram"].StopPropagation()
+
+    def continue_propagation(self):
+        raise sys.modules["pyrogram"].ContinuePropagation()
+
+    async def download(self, *args, **kwargs):
+        return os.path.join(os.environ.get("VOICE_CACHE_DIR", "."), f"voice_{self.id}.ogg")
+
+class FakeFilter:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __and__(self, other):
+        return FakeFilter(f"({self.name} & {getattr(other, 'name', other)})")
+
+    def __or__(self, other):
+        return FakeFilter(f"({self.name} | {getattr(other, 'name', other)})")
+
+    def __invert__(self):
+        return FakeFilter(f"~{self.name}")
+
+class FakeFilters:
+    def __getattr__(self, name):
+        return FakeFilter(name)
+
+    def command(self, *args, **kwargs):
+        return FakeFilter(f"command{args}")
+
+class FakeClient:
+    message_ids = itertools.count(1000)
+
+    def __init__(self, name: str = "fake", *args, **kwargs):
+        self.name = name
+        self.handlers = []
+        self.assistant = None
+
+    def add_handler(self, handler, group: int = 0):
+        self.handlers.append((group, handler))
+
+    async def start(self):
+        await profile.telegram_call("start")
+
+    async def stop(self):
+        pass
+
+    async def get_me(self):
+        return FakeUser(id=1, username=self.name, first_name=self.name)
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await profile.telegram_call("send_message")
+        return FakeMessage(id=next(self.message_ids), chat=Obj(id=chat_id), text=text)
+
+    async def send_document(self, chat_id, document, **kwargs):
+        await profile.telegram_call("send_document")
+        return FakeMessage(id=next(self.message_ids), chat=Obj(id=chat_id))
+
+    async def edit_message_text(self, chat_id, message_id, text, **kwargs):
+        await profile.telegram_call("edit_message_text")
+        return FakeMessage(id=message_id, chat=Obj(id=chat_id), text=text)
+
+    async def delete_messages(self, chat_id, message_ids, **kwargs):
+        await profile.telegram_call("delete_messages")
+        return len(message_ids) if isinstance(message_ids, list) else 1
+
+    async def get_messages(self, chat_id, message_ids, **kwargs):
+        await profile.telegram_call("get_messages")
+        return [FakeMessage(id=message_id, chat=Obj(id=chat_id), from_user=FakeUser(id=message_id % 50),
+                            date=datetime.now()) for message_id in message_ids]
+
+    async def get_chat_members(self, chat_id, filter=None, **kwargs):
+        await profile.telegram_call("get_chat_members")
+        status = sys.modules["pyrogram.enums"].ChatMemberStatus
+        yield Obj(user=FakeUser(id=1), status=status.OWNER)
+        for user_id in range(2, profile.admins + 1):
+            yield Obj(user=FakeUser(id=user_id), status=status.ADMINISTRATOR)
+
+    async def get_chat_member(self, chat_id, user_id):
+        await profile.telegram_call("get_chat_member")
+        return Obj(user=FakeUser(id=user_id), status="member", joined_date=None)
+
+    async def get_users(self, user_ids):
+        await profile.telegram_call("get_users")
+        return [FakeUser(id=abs(hash(user_id)) % 10**9) for user_id in user_ids]
+
+    async def join_chat(self, chat_id):
+        await profile.telegram_call("join_chat")
+        raise sys.modules["pyrogram.errors"].UserAlreadyParticipant()
+
+    async def _moderation(self, name, *args, **kwargs):
+        await profile.telegram_call(name)
+        return True
+
+    async def ban_chat_member(self, *args, **kwargs):
+        return await self._moderation("ban_chat_member")
+
+    async def unban_chat_member(self, *args, **kwargs):
+        return await self._moderation("unban_chat_member")
+
+    async def restrict_chat_member(self, *args, **kwargs):
+        return await self._moderation("restrict_chat_member")
+
+    async def promote_chat_member(self, *args, **kwargs):
+        return await self._moderation("promote_chat_member")
+
+    async def pin_chat_message(self, *args, **kwargs):
+        return await self._moderation("pin_chat_message")
+
+    async def unpin_chat_message(self, *args, **kwargs):
+        return await self._moderation("unpin_chat_message")
+
+    async def unpin_all_chat_messages(self, *args, **kwargs):
+        return await self._moderation("unpin_all_chat_messages")
+
+class FakePyTgCalls:
+    def __init__(self, app):
+        self.app = app
+        self.calls = set()
+
+    async def start(self):
+        pass
+
+    async def join_group_call(self, chat_id, stream=None, stream_type=None):
+        profile.count("join_group_call")
+        await asyncio.sleep(profile.join_call.sample(profile.rng))
+        if profile.join_call.fails(profile.rng):
+            raise RuntimeError("injected join_group_call failure")
+        self.calls.add(chat_id)
+
+    async def leave_group_call(self, chat_id):
+        self.calls.discard(chat_id)
+
+    async def pause_stream(self, chat_id):
+        pass
+
+    async def resume_stream(self, chat_id):
+        pass
+
+class FakeYoutubeDL:
+    def __init__(self, options=None):
+        self.options = options or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=True):
+        profile.blocking("extract_info", profile.extract)
+        video_id = url[-11:]
+        info = {"id": video_id, "title": f"Track {video_id}", "duration": 180, "webpage_url": url}
+        if not download:
+            return info
+        return self.process_ie_result(info, download=True)
+
+    def sanitize_info(self, info):
+        return dict(info)
+
+    def process_ie_result(self, info, download=True):
+        info = dict(info)
+        video_id = info["id"]
+        for hook in self.options.get("progress_hooks", []):
+            hook({"status": "downloading"})
+        profile.blocking("download", profile.download)
+        for hook in self.options.get("progress_hooks", []):
+            hook({"status": "finished", "downloaded_bytes": 1024})
+
+        directory = os.path.dirname(self.options.get("outtmpl", "./%(id)s.%(ext)s")) or "."
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{video_id}.webm")
+        with open(path, "wb") as f:
+            f.write(b"\0" * 1024)
+        info["requested_downloads"] = [{"filepath": path}]
+        return info
+
+class FakeVideosSearch:
+    def __init__(self, query, limit=1):
+        self.query = query
+
+    def result(self):
+        profile.blocking("search", profile.search)
+        video_id = f"{abs(hash(self.query)) % 10**11:011d}"
+        return {"result": [{
+            "title": self.query.title(),
+            "link": f"https://www.youtube.com/watch?v={video_id}",
+            "duration": "3:00",
+            "thumbnails": [{"url": ""}],
+        }]}
+
+class FakeAudioSegment:
+    @classmethod
+    def silent(cls, duration=0):
+        return cls()
+
+    @classmethod
+    def from_file(cls, path, *args, **kwargs):
+        return cls()
+
+    def export(self, path, format=None, **kwargs):
+        with open(path, "wb") as f:
+            f.write(b"\0")
+
+def install(fake_profile: FakeProfile = None, lazy: bool = False, real: tuple = ()):
+    global profile, real_packages
+    if fake_profile:
+        profile = fake_profile
+
+    fake_ffmpeg = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_ffmpeg.sh")
+    os.environ["FFMPEG_BINARY"] = f"sh {shlex.quote(fake_ffmpeg)}"
+    os.environ["FAKE_FFMPEG_SECONDS"] = f"{profile.transcode.mean:.4f}"
+
+    real_packages = tuple(real)
+    if lazy and LAZY_FINDER not in sys.meta_path:
+        sys.meta_path.insert(0, LAZY_FINDER)
+
+    class StopPropagation(StopAsyncIteration):
+        pass
+
+    class ContinuePropagation(StopAsyncIteration):
+        pass
+
+    _module("pyrogram", Client=FakeClient, filters=FakeFilters(),
+            StopPropagation=StopPropagation, ContinuePropagation=ContinuePropagation)
+
+    class ChatMemberStatus(enum.Enum):
+        OWNER = "owner"
+        ADMINISTRATOR = "administrator"
+        MEMBER = "member"
+        RESTRICTED = "restricted"
+        LEFT = "left"
+        BANNED = "banned"
+
+    class ChatMembersFilter(enum.Enum):
+        ADMINISTRATORS = "administrators"
+        RECENT = "recent"
+
+    class ChatType(enum.Enum):
+        PRIVATE = "private"
+        GROUP = "group"
+        SUPERGROUP = "supergroup"
+        CHANNEL = "channel"
+
+    _module("pyrogram.enums", ChatMemberStatus=ChatMemberStatus, ChatMembersFilter=ChatMembersFilter,
+            ChatType=ChatType)
+
+    class RPCError(Exception):
+        pass
+
+    class BadRequest(RPCError):
+        pass
+
+    class FloodWait(RPCError):
+        def __init__(self, value=0):
+            super().__init__(f"A wait of {value} seconds is required")
+            self.value = value
+
+    errors = {"RPCError": RPCError, "BadRequest": BadRequest, "FloodWait": FloodWait}
+    for name in ("ChatAdminRequired", "UserAdminInvalid", "UserNotParticipant",
+                 "UserAlreadyParticipant", "InviteHashExpired"):
+        errors[name] = type(name, (BadRequest,), {})
+    _module("pyrogram.errors", **errors)
+
+    _module("pyrogram.types", Message=FakeMessage, User=FakeUser, Chat=Obj, ChatPrivileges=Obj,
+            ChatPermissions=Obj, ChatMemberUpdated=Obj, ChatMember=Obj)
+
+    class MessageHandler:
+        def __init__(self, callback, filters=None):
+            self.callback = callback
+            self.filters = filters
+
+    _module("pyrogram.handlers", MessageHandler=MessageHandler, ChatMemberUpdatedHandler=MessageHandler)
+
+    class StreamType:
+        pulse_stream = "pulse"
+
+    _module("pytgcalls", PyTgCalls=FakePyTgCalls, StreamType=StreamType)
+    _module("pytgcalls.types", AudioPiped=lambda path, **kwargs: Obj(path=path, **kwargs), VideoParameters=Obj, AudioParameters=Obj)
+    _module("pytgcalls.exceptions", GroupCallNotFound=type("GroupCallNotFound", (Exception,), {}),
+            NotInGroupCallError=type("NotInGroupCallError", (Exception,), {}))
+
+    _module("yt_dlp", YoutubeDL=FakeYoutubeDL)
+    _module("youtubesearchpython", VideosSearch=FakeVideosSearch)
+    _module("spotipy", Spotify=Obj)
+    _module("spotipy.oauth2", SpotifyClientCredentials=Obj)
+
+    _module("speech_recognition", Recognizer=Obj, AudioFile=Obj,
+            UnknownValueError=type("UnknownValueError", (Exception,), {}),
+            RequestError=type("RequestError", (Exception,), {}))
+    _module("pydub", AudioSegment=FakeAudioSegment)
+    _module("pydub.generators", Sine=Obj)
+
+    return profile
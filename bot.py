@@ -1,14 +1,25 @@
 import asyncio
 import logging
 import os
+import signal
+import time
 from datetime import datetime
 from pyrogram import Client, filters
 from pyrogram.types import Message
 from config import config
-from database.mongodb import db
+from database import db
 from handlers import commands, voice_chat, music, group_management
-from utils.logger import send_startup_log
+from utils.logger import send_startup_log, log_sink
 from utils.generate_silence import generate_silence_file
+from utils.system_monitor import system_sampler
+from utils.outbound import outbound
+from utils.timed_actions import timed_actions
+from utils.antiflood import antiflood
+from utils.metrics import metrics, metrics_server
+from utils.loop_monitor import loop_monitor
+from utils.middleware import pipeline
+from utils.media_workers import media_workers
+from utils.cache_warmer import cache_warmer
 
 logging.basicConfig(
     level=logging.INFO,
@@ -17,6 +28,8 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+STARTUP_SECONDS = metrics.gauge("bot_startup_step_seconds", "Time each startup step took", ["step"])
+
 class MusicBot:
     def __init__(self):
         self.bot = Client(
@@ -33,26 +46,74 @@ class MusicBot:
             session_string=config.STRING_SESSION
         )
 
+        outbound.attach(self.bot)
+
         self.start_time = datetime.now()
+        self.startup_steps = {}
+        self.ready = False
+        metrics_server.ready_check = lambda: self.ready
+
+    async def prepare_cache(self):
+        os.makedirs(config.MUSIC_CACHE_DIR, exist_ok=True)
+        os.makedirs(config.VOICE_CACHE_DIR, exist_ok=True)
+
+        logger.info("Generating silence audio file for voice chat...")
+        await generate_silence_file()
+
+    async def _timed_step(self, name: str, coro):
+        started = time.perf_counter()
+        result = await coro
+        elapsed = time.perf_counter() - started
+        self.startup_steps[name] = elapsed
+        STARTUP_SECONDS.labels(name).set(elapsed)
+        logger.info(f"Startup step {name} finished in {elapsed:.2f}s")
+        return result
+
+    async def _start_database(self):
+        await db.connect()
+        await antiflood.load()
+
+    async def _start_bot(self, database: asyncio.Task):
+        await database
+        await self.bot.start()
+        logger.info("Bot started successfully")
+        return await self.bot.get_me()
+
+    async def _start_assistant(self):
+        await self.assistant.start()
+        logger.info("Assistant started successfully")
+        return await self.assistant.get_me()
 
     async def start(self):
         try:
-            os.makedirs(config.MUSIC_CACHE_DIR, exist_ok=True)
-            os.makedirs(config.VOICE_CACHE_DIR, exist_ok=True)
-
-            logger.info("Generating silence audio file for voice chat...")
-            generate_silence_file()
-
-            await db.connect()
-
-            await self.bot.start()
-            logger.info("Bot started successfully")
-
-            await self.assistant.start()
-            logger.info("Assistant started successfully")
-
-            bot_info = await self.bot.get_me()
-            assistant_info = await self.assistant.get_me()
+            started = time.perf_counter()
+            loop = asyncio.get_running_loop()
+
+            database = asyncio.create_task(self._timed_step("database", self._start_database()))
+            steps = [
+                database,
+                asyncio.create_task(self._timed_step("cache", self.prepare_cache())),
+                asyncio.create_task(self._timed_step("metrics", metrics_server.start())),
+                asyncio.create_task(self._timed_step("media_workers", media_workers.start())),
+                asyncio.create_task(self._timed_step("bot", self._start_bot(database))),
+                asyncio.create_task(self._timed_step("assistant", self._start_assistant())),
+            ]
+            try:
+                *_, bot_info, assistant_info = await asyncio.gather(*steps)
+            except BaseException:
+                for step in steps:
+                    step.cancel()
+                raise
+
+            system_sampler.start()
+            loop_monitor.start()
+            log_sink.start()
+            await timed_actions.start()
+            cache_warmer.start()
+
+            self.ready = True
+            breakdown = ", ".join(f"{name} {elapsed:.2f}s" for name, elapsed in self.startup_steps.items())
+            logger.info(f"Ready in {time.perf_counter() - started:.2f}s ({breakdown})")
 
             await send_startup_log(self.bot, bot_info, assistant_info, self.start_time)
 
@@ -60,16 +121,49 @@ class MusicBot:
             logger.info(f"Assistant: @{assistant_info.username}")
             logger.info("Voice chat listening mode enabled")
 
-            await asyncio.Event().wait()
+            stop_requested = asyncio.Event()
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                try:
+                    loop.add_signal_handler(sig, stop_requested.set)
+                except (NotImplementedError, RuntimeError):
+                    pass
+
+            try:
+                await stop_requested.wait()
+                logger.info("Shutdown signal received")
+            finally:
+                await self.stop()
 
         except Exception as e:
             logger.error(f"Error starting bot: {e}")
             raise
 
+    async def _shutdown_step(self, name: str, coro, deadline: float):
+        try:
+            await asyncio.wait_for(coro, timeout=max(1.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            logger.warning(f"Shutdown step {name} did not finish before the deadline")
+        except Exception as e:
+            logger.error(f"Shutdown step {name} failed: {e}")
+
     async def stop(self):
-        await self.bot.stop()
-        await self.assistant.stop()
-        await db.close()
+        self.ready = False
+        deadline = time.monotonic() + config.SHUTDOWN_TIMEOUT
+        logger.info(f"Draining for up to {config.SHUTDOWN_TIMEOUT:.0f}s")
+
+        await self._shutdown_step("commands", pipeline.drain(config.SHUTDOWN_TIMEOUT / 2), deadline)
+        await cache_warmer.stop()
+        await self._shutdown_step("voice chats", voice_chat.leave_all_voice_chats(), deadline)
+        await media_workers.stop()
+        await timed_actions.stop()
+        await system_sampler.stop()
+        await loop_monitor.stop()
+        await self._shutdown_step("outbound", outbound.drain(max(0.0, deadline - time.monotonic())), deadline)
+        await self._shutdown_step("log digest", log_sink.stop(), deadline)
+        await self._shutdown_step("database", db.close(), deadline)
+        await metrics_server.stop()
+        await self._shutdown_step("bot", self.bot.stop(), deadline)
+        await self._shutdown_step("assistant", self.assistant.stop(), deadline)
         logger.info("Bot stopped")
 
 music_bot = MusicBot()
@@ -10,8 +10,56 @@ class Config:
     STRING_SESSION = os.getenv("STRING_SESSION", "")
 
     LOGGER_GROUP_ID = int(os.getenv("LOGGER_GROUP_ID", "0"))
+    LOG_DIGEST_INTERVAL = float(os.getenv("LOG_DIGEST_INTERVAL", "60"))
+    LOG_DIGEST_MAX_EVENTS = int(os.getenv("LOG_DIGEST_MAX_EVENTS", "20"))
+    LOG_BUFFER_MAX = int(os.getenv("LOG_BUFFER_MAX", "500"))
 
+    DATABASE_BACKEND = os.getenv("DATABASE_BACKEND", "mongodb").lower()
     MONGODB_URI = os.getenv("MONGODB_URI", "")
+    SQLITE_PATH = os.getenv("SQLITE_PATH", "data/bot.db")
+    DATABASE_TIMEOUT = float(os.getenv("DATABASE_TIMEOUT", "3"))
+    DATABASE_CONNECT_TIMEOUT = float(os.getenv("DATABASE_CONNECT_TIMEOUT", "10"))
+    DATABASE_BREAKER_THRESHOLD = int(os.getenv("DATABASE_BREAKER_THRESHOLD", "5"))
+    DATABASE_BREAKER_RESET = float(os.getenv("DATABASE_BREAKER_RESET", "30"))
+    STATS_FLUSH_INTERVAL = float(os.getenv("STATS_FLUSH_INTERVAL", "10"))
+    STATS_COUNTER_SHARDS = int(os.getenv("STATS_COUNTER_SHARDS", "8"))
+    PLAY_LOG_BATCH_SIZE = int(os.getenv("PLAY_LOG_BATCH_SIZE", "100"))
+    PLAY_LOG_FLUSH_INTERVAL = float(os.getenv("PLAY_LOG_FLUSH_INTERVAL", "5"))
+    PLAY_LOG_MAX_PENDING = int(os.getenv("PLAY_LOG_MAX_PENDING", "10000"))
+    METRICS_SAMPLE_INTERVAL = float(os.getenv("METRICS_SAMPLE_INTERVAL", "5"))
+    STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", "60"))
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    TRACE_HISTORY = int(os.getenv("TRACE_HISTORY", "500"))
+    TRACE_SLOW_THRESHOLD = float(os.getenv("TRACE_SLOW_THRESHOLD", "10"))
+    PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "120"))
+    PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+    LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.25"))
+    LOOP_SLOW_CALLBACK = float(os.getenv("LOOP_SLOW_CALLBACK", "0.1"))
+    LOOP_LAG_REPORT_THRESHOLD = float(os.getenv("LOOP_LAG_REPORT_THRESHOLD", "0.5"))
+    LOOP_LAG_REPORT_INTERVAL = float(os.getenv("LOOP_LAG_REPORT_INTERVAL", "300"))
+    QUOTA_WINDOW = float(os.getenv("QUOTA_WINDOW", "3600"))
+    QUOTA_CONCURRENT_JOBS = int(os.getenv("QUOTA_CONCURRENT_JOBS", "2"))
+    QUOTA_DOWNLOAD_MB = float(os.getenv("QUOTA_DOWNLOAD_MB", "0"))
+    QUOTA_TRANSCODE_SECONDS = float(os.getenv("QUOTA_TRANSCODE_SECONDS", "0"))
+    QUOTA_ASR_SECONDS = float(os.getenv("QUOTA_ASR_SECONDS", "0"))
+    SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", "20"))
+    MEDIA_WORKERS = int(os.getenv("MEDIA_WORKERS", "0"))
+    FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+    TRANSCODE_CONCURRENCY = int(os.getenv("TRANSCODE_CONCURRENCY", "0"))
+    TRANSCODE_NICE = int(os.getenv("TRANSCODE_NICE", "10"))
+    TRANSCODE_CPUS = os.getenv("TRANSCODE_CPUS", "")
+    CACHE_WARM_INTERVAL = float(os.getenv("CACHE_WARM_INTERVAL", "900"))
+    CACHE_WARM_TOP = int(os.getenv("CACHE_WARM_TOP", "20"))
+    CACHE_WARM_TOP_PER_CHAT = int(os.getenv("CACHE_WARM_TOP_PER_CHAT", "5"))
+    CACHE_WARM_HALF_LIFE_HOURS = float(os.getenv("CACHE_WARM_HALF_LIFE_HOURS", "72"))
+    CACHE_WARM_LOOKBACK_DAYS = float(os.getenv("CACHE_WARM_LOOKBACK_DAYS", "14"))
+    CACHE_WARM_MAX_CPU = float(os.getenv("CACHE_WARM_MAX_CPU", "50"))
+    CACHE_WARM_MB_PER_HOUR = float(os.getenv("CACHE_WARM_MB_PER_HOUR", "200"))
+    CACHE_WARM_DISK_MB = float(os.getenv("CACHE_WARM_DISK_MB", "2048"))
+    METADATA_CACHE_TTL = float(os.getenv("METADATA_CACHE_TTL", "21600"))
+    METADATA_CACHE_SIZE = int(os.getenv("METADATA_CACHE_SIZE", "5000"))
+    MAX_TRACK_DURATION = int(os.getenv("MAX_TRACK_DURATION", "7200"))
 
     YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY", "")
     YOUTUBE_COOKIES_PATH = os.getenv("YOUTUBE_COOKIES_PATH", "cookies.txt")
@@ -21,6 +69,24 @@ class Config:
 
     OWNER_ID = int(os.getenv("OWNER_ID", "0"))
 
+    ADMIN_CACHE_TTL = float(os.getenv("ADMIN_CACHE_TTL", "300"))
+    PURGE_CONCURRENCY = int(os.getenv("PURGE_CONCURRENCY", "3"))
+    TIMED_ACTION_CONCURRENCY = int(os.getenv("TIMED_ACTION_CONCURRENCY", "5"))
+    BULK_ACTION_CONCURRENCY = int(os.getenv("BULK_ACTION_CONCURRENCY", "5"))
+    BULK_ACTION_MAX_TARGETS = int(os.getenv("BULK_ACTION_MAX_TARGETS", "200"))
+    JOIN_TRACKER_RETENTION = float(os.getenv("JOIN_TRACKER_RETENTION", "3600"))
+
+    ANTIFLOOD_ENABLED = os.getenv("ANTIFLOOD_ENABLED", "false").lower() in ("1", "true", "yes")
+    ANTIFLOOD_LIMIT = int(os.getenv("ANTIFLOOD_LIMIT", "8"))
+    ANTIFLOOD_WINDOW = float(os.getenv("ANTIFLOOD_WINDOW", "10"))
+    ANTIFLOOD_ACTION = os.getenv("ANTIFLOOD_ACTION", "mute").lower()
+    ANTIFLOOD_MUTE_MINUTES = int(os.getenv("ANTIFLOOD_MUTE_MINUTES", "10"))
+
+    OUTBOUND_CHAT_RATE = float(os.getenv("OUTBOUND_CHAT_RATE", "1"))
+    OUTBOUND_CHAT_BURST = float(os.getenv("OUTBOUND_CHAT_BURST", "5"))
+    OUTBOUND_GLOBAL_RATE = float(os.getenv("OUTBOUND_GLOBAL_RATE", "25"))
+    OUTBOUND_GLOBAL_BURST = float(os.getenv("OUTBOUND_GLOBAL_BURST", "30"))
+
     MUSIC_CACHE_DIR = "cache/music"
     VOICE_CACHE_DIR = "cache/voice"
 
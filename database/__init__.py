@@ -0,0 +1,11 @@
+from config import config
+
+def create_storage():
+    if config.DATABASE_BACKEND == "sqlite":
+        from database.sqlite import SQLiteStorage
+        return SQLiteStorage(config.SQLITE_PATH)
+
+    from database.mongodb import MongoDB
+    return MongoDB()
+
+db = create_storage()
@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Dict, List
+from config import config
+from database.counters import CommandCounter
+from database.play_history import PlayHistoryWriter
+from database.resilience import CircuitBreaker, StorageTimeout, StorageUnavailable
+
+logger = logging.getLogger(__name__)
+
+class Storage(ABC):
+    name = "storage"
+
+    def __init__(self):
+        self.timeout = config.DATABASE_TIMEOUT
+        self.connect_timeout = config.DATABASE_CONNECT_TIMEOUT
+        self.breaker = CircuitBreaker(
+            self.name,
+            failure_threshold=config.DATABASE_BREAKER_THRESHOLD,
+            reset_timeout=config.DATABASE_BREAKER_RESET
+        )
+        self.command_counter = CommandCounter(
+            flush_interval=config.STATS_FLUSH_INTERVAL,
+            shards=config.STATS_COUNTER_SHARDS
+        )
+        self.play_writer = PlayHistoryWriter(
+            batch_size=config.PLAY_LOG_BATCH_SIZE,
+            flush_interval=config.PLAY_LOG_FLUSH_INTERVAL,
+            max_pending=config.PLAY_LOG_MAX_PENDING
+        )
+        self.prepare_task = None
+
+    async def connect(self):
+        connected = False
+        try:
+            await asyncio.wait_for(self._connect(), timeout=self.connect_timeout)
+            self.breaker.record_success()
+            connected = True
+            self.prepare_task = asyncio.create_task(self._prepare())
+        except Exception as e:
+            logger.error(f"Failed to connect to {self.name}: {e!r}")
+            self.breaker.trip()
+
+        self.command_counter.start(self._flush_command_counts_guarded)
+        self.play_writer.start(self._insert_plays_guarded)
+        return connected
+
+    async def close(self):
+        if self.prepare_task and not self.prepare_task.done():
+            self.prepare_task.cancel()
+            try:
+                await self.prepare_task
+            except asyncio.CancelledError:
+                pass
+
+        await self.command_counter.stop()
+        await self.play_writer.stop()
+        logger.info(f"Play history writer stats: {self.play_writer.get_stats()}")
+
+        try:
+            await self._close()
+        except Exception as e:
+            logger.error(f"Error closing {self.name}: {e}")
+
+    async def _call(self, func, *args):
+        if not self.breaker.allow():
+            raise StorageUnavailable(f"{self.name} circuit is open")
+
+        trial = self.breaker.trial_in_flight
+        try:
+            result = await asyncio.wait_for(func(*args), timeout=self.timeout)
+        except asyncio.CancelledError:
+            if trial:
+                self.breaker.abandon_trial()
+            raise
+        except asyncio.TimeoutError as e:
+            self.breaker.record_failure()
+            raise StorageTimeout(f"{self.name} did not answer within {self.timeout}s") from e
+        except Exception:
+            self.breaker.record_failure()
+            raise
+
+        self.breaker.record_success()
+        return result
+
+    async def _guarded(self, operation: str, default, func, *args):
+        try:
+            return await self._call(func, *args)
+        except StorageUnavailable:
+            return default
+        except Exception as e:
+            logger.error(f"{self.name} {operation} failed: {e!r}")
+            return default
+
+    async def _flush_command_counts_guarded(self, counts: Dict[str, int], shard: int):
+        await self._call(self._flush_command_counts, counts, shard)
+
+    async def _insert_plays_guarded(self, plays: List[Dict]):
+        if self.prepare_task and not self.prepare_task.done():
+            await asyncio.shield(self.prepare_task)
+        inserted = await self._call(self._insert_plays, plays)
+        if inserted:
+            await self._guarded("update_play_rollups", None, self._update_play_rollups, inserted)
+
+    def get_health(self) -> Dict:
+        return {
+            "backend": self.name,
+            "circuit": self.breaker.state,
+            "failures": self.breaker.failures,
+        }
+
+    async def add_chat(self, chat_id, chat_title):
+        await self._guarded("add_chat", None, self._add_chat, chat_id, chat_title)
+
+    async def remove_chat(self, chat_id):
+        await self._guarded("remove_chat", None, self._remove_chat, chat_id)
+
+    async def get_active_chats(self):
+        return await self._guarded("get_active_chats", [], self._get_active_chats)
+
+    async def get_active_chat_count(self):
+        return await self._guarded("get_active_chat_count", 0, self._get_active_chat_count)
+
+    def increment_command_usage(self, command):
+        self.command_counter.increment(command)
+
+    async def get_stats(self):
+        totals = dict(await self._guarded("get_stats", {}, self._get_command_totals))
+
+        for command, amount in self.command_counter.pending.items():
+            totals[command] = totals.get(command, 0) + amount
+
+        return totals
+
+    def add_song_play(self, song_title, platform, chat_id, url=None, requested_by=None,
+                      duration=None, cache_hit=False):
+        return self.play_writer.submit({
+            "event_id": uuid.uuid4().hex,
+            "song_title": song_title,
+            "url": url,
+            "platform": platform,
+            "chat_id": chat_id,
+            "requested_by": requested_by,
+            "duration": duration,
+            "cache_hit": cache_hit,
+            "timestamp": datetime.utcnow()
+        })
+
+    def get_play_log_stats(self):
+        return self.play_writer.get_stats()
+
+    async def get_total_plays(self):
+        total = await self._guarded("get_total_plays", 0, self._get_total_plays)
+        return total + len(self.play_writer.queue)
+
+    async def get_top_songs(self, chat_id=None, limit=10):
+        return await self._guarded("get_top_songs", [], self._get_top_songs, chat_id, limit)
+
+    async def get_daily_plays(self, chat_id, days=7):
+        since = (datetime.utcnow() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        return await self._guarded("get_daily_plays", [], self._get_daily_plays, chat_id, since, days)
+
+    async def get_recent_plays(self, since, limit=5000):
+        return await self._guarded("get_recent_plays", [], self._get_recent_plays, since, limit)
+
+    async def add_timed_action(self, record):
+        await self._guarded("add_timed_action", None, self._add_timed_action, record)
+
+    async def remove_timed_actions(self, action_ids):
+        if action_ids:
+            await self._guarded("remove_timed_actions", None, self._remove_timed_actions, action_ids)
+
+    async def get_timed_actions(self):
+        return await self._call(self._get_timed_actions)
+
+    async def set_chat_setting(self, chat_id, key, value):
+        await self._guarded("set_chat_setting", None, self._set_chat_setting, chat_id, key, value)
+
+    async def get_chat_settings(self, key):
+        return await self._guarded("get_chat_settings", {}, self._get_chat_settings, key)
+
+    @abstractmethod
+    async def _connect(self):
+        ...
+
+    @abstractmethod
+    async def _close(self):
+        ...
+
+    @abstractmethod
+    async def _add_chat(self, chat_id, chat_title):
+        ...
+
+    @abstractmethod
+    async def _remove_chat(self, chat_id):
+        ...
+
+    @abstractmethod
+    async def _get_active_chats(self):
+        ...
+
+    @abstractmethod
+    async def _get_active_chat_count(self):
+        ...
+
+    @abstractmethod
+    async def _flush_command_counts(self, counts, shard):
+        ...
+
+    @abstractmethod
+    async def _get_command_totals(self):
+        ...
+
+    @abstractmethod
+    async def _insert_plays(self, plays):
+        ...
+
+    async def _prepare(self):
+        pass
+
+    async def _update_play_rollups(self, plays):
+        pass
+
+    @abstractmethod
+    async def _get_total_plays(self):
+        ...
+
+    @abstractmethod
+    async def _get_top_songs(self, chat_id, limit):
+        ...
+
+    @abstractmethod
+    async def _get_daily_plays(self, chat_id, since, days):
+        ...
+
+    @abstractmethod
+    async def _get_recent_plays(self, since, limit):
+        ...
+
+    @abstractmethod
+    async def _add_timed_action(self, record):
+        ...
+
+    @abstractmethod
+    async def _remove_timed_actions(self, action_ids):
+        ...
+
+    @abstractmethod
+    async def _get_timed_actions(self):
+        ...
+
+    @abstractmethod
+    async def _set_chat_setting(self, chat_id, key, value):
+        ...
+
+    @abstractmethod
+    async def _get_chat_settings(self, key):
+        ...
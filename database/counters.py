@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import random
+from typing import Awaitable, Callable, Dict, Optional
+from database.resilience import StorageTimeout
+
+logger = logging.getLogger(__name__)
+
+CounterSink = Callable[[Dict[str, int], int], Awaitable[None]]
+
+class CommandCounter:
+    def __init__(self, flush_interval: float = 10.0, shards: int = 8):
+        self.flush_interval = flush_interval
+        self.shards = max(1, shards)
+        self.pending: Dict[str, int] = {}
+        self.sink: Optional[CounterSink] = None
+        self.flush_task: Optional[asyncio.Task] = None
+        self.recorded_total = 0
+        self.flushed_total = 0
+        self.failed_flushes = 0
+
+    def increment(self, command: str, amount: int = 1):
+        self.pending[command] = self.pending.get(command, 0) + amount
+        self.recorded_total += amount
+
+    def start(self, sink: CounterSink):
+        self.sink = sink
+        if self.flush_task is None or self.flush_task.done():
+            self.flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self.flush_task:
+            self.flush_task.cancel()
+            try:
+                await self.flush_task
+            except asyncio.CancelledError:
+                pass
+            self.flush_task = None
+
+        await self.flush()
+
+    async def flush(self):
+        if not self.pending or not self.sink:
+            return
+
+        counts, self.pending = self.pending, {}
+        shard = random.randrange(self.shards)
+
+        try:
+            await self.sink(counts, shard)
+            self.flushed_total += sum(counts.values())
+        except asyncio.CancelledError:
+            self._restore(counts)
+            raise
+        except StorageTimeout as e:
+            self.failed_flushes += 1
+            logger.error(f"Command counter flush timed out and may still be applied, not retrying it: {e}")
+        except Exception as e:
+            self.failed_flushes += 1
+            logger.error(f"Failed to flush command counters: {e}")
+            self._restore(counts)
+
+    def _restore(self, counts: Dict[str, int]):
+        for command, amount in counts.items():
+            self.pending[command] = self.pending.get(command, 0) + amount
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in command counter flush loop: {e}")
@@ -1,67 +1,282 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError
 from config import config
+from database.base import Storage
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 
-class MongoDB:
+DUPLICATE_KEY = 11000
+
+class MongoDB(Storage):
+    name = "MongoDB"
+
     def __init__(self):
+        super().__init__()
         self.client = None
         self.db = None
 
-    async def connect(self):
+    async def _connect(self):
+        self.client = AsyncIOMotorClient(
+            config.MONGODB_URI,
+            serverSelectionTimeoutMS=int(self.connect_timeout * 1000)
+        )
+        self.db = self.client.telegram_music_bot
+        await self.client.admin.command('ping')
+        logger.info("Connected to MongoDB successfully")
+
+    async def _prepare(self):
         try:
-            self.client = AsyncIOMotorClient(config.MONGODB_URI)
-            self.db = self.client.telegram_music_bot
-            await self.client.admin.command('ping')
-            logger.info("Connected to MongoDB successfully")
-            return True
+            await self._ensure_indexes()
+            await self._bootstrap_rollups()
         except Exception as e:
-            logger.error(f"Failed to connect to MongoDB: {e}")
-            return False
+            logger.error(f"Failed to prepare MongoDB indexes and rollups: {e}")
+
+    async def _ensure_indexes(self):
+        await self.db.chats.create_indexes([
+            IndexModel([("chat_id", ASCENDING)], unique=True),
+            IndexModel([("active", ASCENDING)]),
+        ])
+        await self.db.stats.create_indexes([
+            IndexModel([("type", ASCENDING), ("shard", ASCENDING)]),
+        ])
+        await self.db.plays.create_indexes([
+            IndexModel([("chat_id", ASCENDING), ("timestamp", DESCENDING)]),
+            IndexModel([("timestamp", DESCENDING)]),
+        ])
+        await self.db.daily_plays.create_indexes([
+            IndexModel([("chat_id", ASCENDING), ("day", ASCENDING)], unique=True),
+        ])
+        await self.db.timed_actions.create_indexes([
+            IndexModel([("due", ASCENDING)]),
+        ])
+        await self.db.track_stats.create_indexes([
+            IndexModel([("chat_id", ASCENDING), ("track", ASCENDING)], unique=True),
+            IndexModel([("chat_id", ASCENDING), ("count", DESCENDING)]),
+        ])
+        logger.info("MongoDB indexes ensured")
+
+    async def _bootstrap_rollups(self):
+        if not await self.db.stats.find_one({"type": "chats"}):
+            active = await self.db.chats.count_documents({"active": True})
+            await self.db.stats.update_one(
+                {"type": "chats"},
+                {"$setOnInsert": {"active": active}},
+                upsert=True
+            )
+
+        if await self.db.stats.find_one({"type": "plays"}):
+            return
+
+        total = await self.db.plays.count_documents({})
+        if total:
+            logger.info(f"Building play rollups from {total} existing plays")
+            await self._rebuild_play_rollups()
+
+        await self.db.stats.update_one(
+            {"type": "plays"},
+            {"$setOnInsert": {"total": total}},
+            upsert=True
+        )
 
-    async def close(self):
+    async def _rebuild_play_rollups(self):
+        daily_ops = []
+        async for row in self.db.plays.aggregate([
+            {"$match": {"timestamp": {"$ne": None}}},
+            {"$group": {
+                "_id": {
+                    "chat_id": "$chat_id",
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}}
+                },
+                "count": {"$sum": 1}
+            }}
+        ]):
+            daily_ops.append(UpdateOne(
+                {"chat_id": row["_id"]["chat_id"], "day": row["_id"]["day"]},
+                {"$set": {"count": row["count"]}},
+                upsert=True
+            ))
+
+        track_ops = []
+        for group_key in ("$chat_id", None):
+            async for row in self.db.plays.aggregate([
+                {"$group": {
+                    "_id": {"chat_id": group_key, "track": {"$ifNull": ["$url", "$song_title"]}},
+                    "song_title": {"$last": "$song_title"},
+                    "count": {"$sum": 1}
+                }}
+            ]):
+                track_ops.append(UpdateOne(
+                    {"chat_id": row["_id"]["chat_id"], "track": row["_id"]["track"]},
+                    {"$set": {"song_title": row["song_title"], "count": row["count"]}},
+                    upsert=True
+                ))
+
+        if daily_ops:
+            await self.db.daily_plays.bulk_write(daily_ops, ordered=False)
+        if track_ops:
+            await self.db.track_stats.bulk_write(track_ops, ordered=False)
+
+    async def _close(self):
         if self.client:
             self.client.close()
             logger.info("MongoDB connection closed")
 
-    async def add_chat(self, chat_id, chat_title):
-        await self.db.chats.update_one(
+    async def _add_chat(self, chat_id, chat_title):
+        previous = await self.db.chats.find_one_and_update(
             {"chat_id": chat_id},
             {"$set": {"chat_title": chat_title, "active": True}},
+            projection={"active": True},
             upsert=True
         )
 
-    async def remove_chat(self, chat_id):
-        await self.db.chats.update_one(
+        if not previous or not previous.get("active"):
+            await self._adjust_active_chats(1)
+
+    async def _remove_chat(self, chat_id):
+        previous = await self.db.chats.find_one_and_update(
             {"chat_id": chat_id},
-            {"$set": {"active": False}}
+            {"$set": {"active": False}},
+            projection={"active": True}
         )
 
-    async def get_active_chats(self):
+        if previous and previous.get("active"):
+            await self._adjust_active_chats(-1)
+
+    async def _adjust_active_chats(self, amount):
+        await self.db.stats.update_one(
+            {"type": "chats"},
+            {"$inc": {"active": amount}},
+            upsert=True
+        )
+
+    async def _get_active_chats(self):
         cursor = self.db.chats.find({"active": True})
         return await cursor.to_list(length=None)
 
-    async def increment_command_usage(self, command):
+    async def _get_active_chat_count(self):
+        stats = await self.db.stats.find_one({"type": "chats"})
+        return stats.get("active", 0) if stats else 0
+
+    async def _flush_command_counts(self, counts, shard):
         await self.db.stats.update_one(
-            {"type": "commands"},
-            {"$inc": {f"commands.{command}": 1}},
+            {"type": "commands", "shard": shard},
+            {"$inc": {f"commands.{command}": amount for command, amount in counts.items()}},
             upsert=True
         )
 
-    async def get_stats(self):
-        stats = await self.db.stats.find_one({"type": "commands"})
-        return stats.get("commands", {}) if stats else {}
+    async def _get_command_totals(self):
+        totals = {}
+        async for shard in self.db.stats.find({"type": "commands"}):
+            for command, amount in shard.get("commands", {}).items():
+                totals[command] = totals.get(command, 0) + amount
+        return totals
 
-    async def add_song_play(self, song_title, platform, chat_id):
-        await self.db.plays.insert_one({
-            "song_title": song_title,
-            "platform": platform,
-            "chat_id": chat_id,
-            "timestamp": None
-        })
+    async def _insert_plays(self, plays):
+        documents = [
+            {"_id": play.get("event_id") or uuid.uuid4().hex,
+             **{key: value for key, value in play.items() if key != "event_id"}}
+            for play in plays
+        ]
 
-    async def get_total_plays(self):
-        return await self.db.plays.count_documents({})
+        try:
+            await self.db.plays.insert_many(documents, ordered=False)
+            return plays
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if e.details.get("writeConcernErrors") or any(error.get("code") != DUPLICATE_KEY for error in errors):
+                raise
+
+            duplicates = {error["index"] for error in errors}
+            logger.info(f"Skipped {len(duplicates)} play events that were already written")
+            return [play for index, play in enumerate(plays) if index not in duplicates]
+
+    async def _update_play_rollups(self, plays):
+        daily = {}
+        tracks = {}
+        for play in plays:
+            day_key = (play["chat_id"], play["timestamp"].strftime("%Y-%m-%d"))
+            daily[day_key] = daily.get(day_key, 0) + 1
+
+            track = play.get("url") or play["song_title"]
+            for chat_id in (play["chat_id"], None):
+                entry = tracks.setdefault((chat_id, track), {"song_title": play["song_title"], "count": 0})
+                entry["count"] += 1
+
+        await self.db.stats.update_one(
+            {"type": "plays"},
+            {"$inc": {"total": len(plays)}},
+            upsert=True
+        )
+        await self.db.daily_plays.bulk_write([
+            UpdateOne({"chat_id": chat_id, "day": day}, {"$inc": {"count": count}}, upsert=True)
+            for (chat_id, day), count in daily.items()
+        ], ordered=False)
+        await self.db.track_stats.bulk_write([
+            UpdateOne(
+                {"chat_id": chat_id, "track": track},
+                {"$inc": {"count": entry["count"]}, "$set": {"song_title": entry["song_title"]}},
+                upsert=True
+            )
+            for (chat_id, track), entry in tracks.items()
+        ], ordered=False)
+
+    async def _get_total_plays(self):
+        stats = await self.db.stats.find_one({"type": "plays"})
+        return stats.get("total", 0) if stats else 0
+
+    async def _get_top_songs(self, chat_id, limit):
+        cursor = self.db.track_stats.find(
+            {"chat_id": chat_id},
+            projection={"_id": False, "song_title": True, "track": True, "count": True}
+        ).sort("count", DESCENDING).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def _get_daily_plays(self, chat_id, since, days):
+        cursor = self.db.daily_plays.find(
+            {"chat_id": chat_id, "day": {"$gte": since}},
+            projection={"_id": False, "day": True, "count": True}
+        ).sort("day", DESCENDING).limit(days)
+        return await cursor.to_list(length=days)
+
+    async def _get_recent_plays(self, since, limit):
+        cursor = self.db.plays.find(
+            {"timestamp": {"$gte": since}, "url": {"$ne": None}},
+            projection={"_id": False, "url": True, "chat_id": True, "timestamp": True}
+        ).sort("timestamp", DESCENDING).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def _add_timed_action(self, record):
+        await self.db.timed_actions.replace_one(
+            {"_id": record["id"]},
+            {key: value for key, value in record.items() if key != "id"},
+            upsert=True
+        )
+
+    async def _remove_timed_actions(self, action_ids):
+        await self.db.timed_actions.delete_many({"_id": {"$in": list(action_ids)}})
+
+    async def _get_timed_actions(self):
+        actions = []
+        async for record in self.db.timed_actions.find({}):
+            record["id"] = record.pop("_id")
+            actions.append(record)
+        return actions
+
+    async def _set_chat_setting(self, chat_id, key, value):
+        await self.db.chats.update_one(
+            {"chat_id": chat_id},
+            {"$set": {f"settings.{key}": value}},
+            upsert=True
+        )
 
-db = MongoDB()
+    async def _get_chat_settings(self, key):
+        settings = {}
+        async for chat in self.db.chats.find(
+            {f"settings.{key}": {"$exists": True}},
+            projection={"_id": False, "chat_id": True, f"settings.{key}": True}
+        ):
+            settings[chat["chat_id"]] = chat["settings"][key]
+        return settings
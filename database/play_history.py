@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PlaySink = Callable[[List[Dict]], Awaitable[None]]
+
+class PlayHistoryWriter:
+    def __init__(self, batch_size: int = 100, flush_interval: float = 5.0, max_pending: int = 10000):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.queue: Deque[Tuple[float, Dict]] = deque()
+        self.sink: Optional[PlaySink] = None
+        self.writer_task: Optional[asyncio.Task] = None
+        self.wakeup = asyncio.Event()
+        self.written = 0
+        self.dropped = 0
+        self.failed_batches = 0
+        self.last_flush = time.monotonic()
+
+    def submit(self, event: Dict) -> bool:
+        if len(self.queue) >= self.max_pending:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 100 == 0:
+                logger.warning(f"Play history queue full, dropped {self.dropped} events so far")
+            return False
+
+        self.queue.append((time.monotonic(), event))
+        if len(self.queue) >= self.batch_size:
+            self.wakeup.set()
+        return True
+
+    def start(self, sink: PlaySink):
+        self.sink = sink
+        if self.writer_task is None or self.writer_task.done():
+            self.writer_task = asyncio.create_task(self._writer_loop())
+
+    async def stop(self):
+        if self.writer_task:
+            self.writer_task.cancel()
+            try:
+                await self.writer_task
+            except asyncio.CancelledError:
+                pass
+            self.writer_task = None
+
+        await self.flush()
+
+        if self.queue:
+            logger.error(f"Play history writer stopped with {len(self.queue)} unwritten events")
+
+    def lag(self) -> float:
+        if not self.queue:
+            return 0.0
+        return time.monotonic() - self.queue[0][0]
+
+    def get_stats(self) -> Dict:
+        return {
+            "pending": len(self.queue),
+            "lag": self.lag(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_batches": self.failed_batches,
+        }
+
+    async def flush(self):
+        if not self.sink:
+            return
+
+        while self.queue:
+            batch = [self.queue.popleft() for _ in range(min(self.batch_size, len(self.queue)))]
+
+            try:
+                await self.sink([event for _, event in batch])
+                self.written += len(batch)
+                self.last_flush = time.monotonic()
+            except asyncio.CancelledError:
+                self.queue.extendleft(reversed(batch))
+                raise
+            except Exception as e:
+                self.failed_batches += 1
+                logger.error(f"Failed to write {len(batch)} play events: {e}")
+                self.queue.extendleft(reversed(batch))
+                break
+
+    async def _writer_loop(self):
+        while True:
+            try:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeup.clear()
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in play history writer loop: {e}")
@@ -0,0 +1,64 @@
+import logging
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+class StorageUnavailable(Exception):
+    pass
+
+class StorageTimeout(Exception):
+    pass
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+
+        if self.state == "half-open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+
+        return False
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info(f"{self.name} circuit closed, storage is responding again")
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def abandon_trial(self):
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.trip()
+
+    def trip(self):
+        if self.opened_at is None:
+            logger.warning(
+                f"{self.name} circuit opened after {self.failures} failures, "
+                f"retrying in {self.reset_timeout}s"
+            )
+        self.opened_at = time.monotonic()
+        self.trial_in_flight = False
@@ -0,0 +1,272 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from config import config
+from database.base import Storage
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_CHAT_ID = 0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chats (
+    chat_id INTEGER PRIMARY KEY,
+    chat_title TEXT,
+    active INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS chats_active ON chats (active);
+
+CREATE TABLE IF NOT EXISTS command_stats (
+    command TEXT PRIMARY KEY,
+    count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS plays (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id TEXT,
+    song_title TEXT,
+    url TEXT,
+    platform TEXT,
+    chat_id INTEGER,
+    requested_by INTEGER,
+    duration INTEGER,
+    cache_hit INTEGER NOT NULL DEFAULT 0,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS plays_chat_time ON plays (chat_id, timestamp);
+CREATE INDEX IF NOT EXISTS plays_time ON plays (timestamp);
+
+CREATE TABLE IF NOT EXISTS daily_plays (
+    chat_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (chat_id, day)
+);
+
+CREATE TABLE IF NOT EXISTS track_stats (
+    chat_id INTEGER NOT NULL,
+    track TEXT NOT NULL,
+    song_title TEXT,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (chat_id, track)
+);
+CREATE INDEX IF NOT EXISTS track_stats_top ON track_stats (chat_id, count DESC);
+
+CREATE TABLE IF NOT EXISTS timed_actions (
+    id TEXT PRIMARY KEY,
+    chat_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    due REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS timed_actions_due ON timed_actions (due);
+
+CREATE TABLE IF NOT EXISTS chat_settings (
+    chat_id INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (chat_id, key)
+);
+
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+class SQLiteStorage(Storage):
+    name = "SQLite"
+
+    def __init__(self, path: str = None):
+        super().__init__()
+        self.path = path or config.SQLITE_PATH
+        self.conn = None
+        self.executor = None
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def _connect(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        await self._run(self._open)
+        logger.info(f"Opened SQLite database at {self.path}")
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        if "event_id" not in {row["name"] for row in conn.execute("PRAGMA table_info(plays)")}:
+            conn.execute("ALTER TABLE plays ADD COLUMN event_id TEXT")
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS plays_event ON plays (event_id)")
+        conn.commit()
+        self.conn = conn
+
+    async def _close(self):
+        if self.conn:
+            await self._run(self.conn.close)
+            self.conn = None
+            logger.info("SQLite database closed")
+
+        if self.executor:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    def _execute(self, query, params=()):
+        with self.conn:
+            return self.conn.execute(query, params).rowcount
+
+    def _fetch_all(self, query, params=()):
+        return [dict(row) for row in self.conn.execute(query, params).fetchall()]
+
+    def _fetch_value(self, query, params=(), default=0):
+        row = self.conn.execute(query, params).fetchone()
+        return row[0] if row and row[0] is not None else default
+
+    async def _add_chat(self, chat_id, chat_title):
+        await self._run(
+            self._execute,
+            "INSERT INTO chats (chat_id, chat_title, active) VALUES (?, ?, 1) "
+            "ON CONFLICT(chat_id) DO UPDATE SET chat_title = excluded.chat_title, active = 1",
+            (chat_id, chat_title)
+        )
+
+    async def _remove_chat(self, chat_id):
+        await self._run(self._execute, "UPDATE chats SET active = 0 WHERE chat_id = ?", (chat_id,))
+
+    async def _get_active_chats(self):
+        return await self._run(self._fetch_all, "SELECT chat_id, chat_title, active FROM chats WHERE active = 1")
+
+    async def _get_active_chat_count(self):
+        return await self._run(self._fetch_value, "SELECT COUNT(*) FROM chats WHERE active = 1")
+
+    async def _flush_command_counts(self, counts, shard):
+        await self._run(self._write_command_counts, counts)
+
+    def _write_command_counts(self, counts):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO command_stats (command, count) VALUES (?, ?) "
+                "ON CONFLICT(command) DO UPDATE SET count = count + excluded.count",
+                list(counts.items())
+            )
+
+    async def _get_command_totals(self):
+        rows = await self._run(self._fetch_all, "SELECT command, count FROM command_stats")
+        return {row["command"]: row["count"] for row in rows}
+
+    async def _insert_plays(self, plays):
+        await self._run(self._write_plays, plays)
+
+    def _write_plays(self, plays):
+        with self.conn:
+            inserted = [
+                play for play in plays
+                if self.conn.execute(
+                    "INSERT OR IGNORE INTO plays (event_id, song_title, url, platform, chat_id, requested_by, "
+                    "duration, cache_hit, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        play.get("event_id"), play["song_title"], play.get("url"), play.get("platform"),
+                        play["chat_id"], play.get("requested_by"), play.get("duration"),
+                        int(bool(play.get("cache_hit"))), play["timestamp"].isoformat()
+                    )
+                ).rowcount
+            ]
+
+            daily = {}
+            tracks = {}
+            for play in inserted:
+                day_key = (play["chat_id"], play["timestamp"].strftime("%Y-%m-%d"))
+                daily[day_key] = daily.get(day_key, 0) + 1
+
+                track = play.get("url") or play["song_title"]
+                for chat_id in (play["chat_id"], GLOBAL_CHAT_ID):
+                    entry = tracks.setdefault((chat_id, track), [play["song_title"], 0])
+                    entry[1] += 1
+
+            if len(inserted) < len(plays):
+                logger.info(f"Skipped {len(plays) - len(inserted)} play events that were already written")
+
+            self.conn.execute(
+                "INSERT INTO counters (name, value) VALUES ('total_plays', ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (len(inserted),)
+            )
+            self.conn.executemany(
+                "INSERT INTO daily_plays (chat_id, day, count) VALUES (?, ?, ?) "
+                "ON CONFLICT(chat_id, day) DO UPDATE SET count = count + excluded.count",
+                [(chat_id, day, count) for (chat_id, day), count in daily.items()]
+            )
+            self.conn.executemany(
+                "INSERT INTO track_stats (chat_id, track, song_title, count) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(chat_id, track) DO UPDATE SET count = count + excluded.count, "
+                "song_title = excluded.song_title",
+                [(chat_id, track, title, count) for (chat_id, track), (title, count) in tracks.items()]
+            )
+
+    async def _get_total_plays(self):
+        return await self._run(self._fetch_value, "SELECT value FROM counters WHERE name = 'total_plays'")
+
+    async def _get_top_songs(self, chat_id, limit):
+        return await self._run(
+            self._fetch_all,
+            "SELECT song_title, track, count FROM track_stats WHERE chat_id = ? ORDER BY count DESC LIMIT ?",
+            (GLOBAL_CHAT_ID if chat_id is None else chat_id, limit)
+        )
+
+    async def _get_daily_plays(self, chat_id, since, days):
+        return await self._run(
+            self._fetch_all,
+            "SELECT day, count FROM daily_plays WHERE chat_id = ? AND day >= ? ORDER BY day DESC LIMIT ?",
+            (chat_id, since, days)
+        )
+
+    async def _get_recent_plays(self, since, limit):
+        rows = await self._run(
+            self._fetch_all,
+            "SELECT url, chat_id, timestamp FROM plays WHERE timestamp >= ? AND url IS NOT NULL "
+            "ORDER BY timestamp DESC LIMIT ?",
+            (since.isoformat(), limit)
+        )
+        for row in rows:
+            row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+        return rows
+
+    async def _add_timed_action(self, record):
+        await self._run(
+            self._execute,
+            "INSERT OR REPLACE INTO timed_actions (id, chat_id, user_id, action, due) VALUES (?, ?, ?, ?, ?)",
+            (record["id"], record["chat_id"], record["user_id"], record["action"], record["due"])
+        )
+
+    async def _remove_timed_actions(self, action_ids):
+        await self._run(self._delete_timed_actions, list(action_ids))
+
+    def _delete_timed_actions(self, action_ids):
+        with self.conn:
+            self.conn.executemany("DELETE FROM timed_actions WHERE id = ?", [(action_id,) for action_id in action_ids])
+
+    async def _get_timed_actions(self):
+        return await self._run(self._fetch_all, "SELECT id, chat_id, user_id, action, due FROM timed_actions")
+
+    async def _set_chat_setting(self, chat_id, key, value):
+        await self._run(
+            self._execute,
+            "INSERT OR REPLACE INTO chat_settings (chat_id, key, value) VALUES (?, ?, ?)",
+            (chat_id, key, json.dumps(value))
+        )
+
+    async def _get_chat_settings(self, key):
+        rows = await self._run(self._fetch_all, "SELECT chat_id, value FROM chat_settings WHERE key = ?", (key,))
+        return {row["chat_id"]: json.loads(row["value"]) for row in rows}
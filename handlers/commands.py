@@ -1,17 +1,28 @@
 from pyrogram import Client, filters
 from pyrogram.types import Message
 from pyrogram.handlers import MessageHandler
-import psutil
+import asyncio
+import os
 import time
 from datetime import datetime
-from database.mongodb import db
+from database import db
 from config import config
+from utils.system_monitor import system_sampler
+from utils.outbound import outbound
+from utils.tracing import tracer
+from utils.profiler import profiler
+from utils.loop_monitor import loop_monitor
+from utils.transcoder import transcoder
+from utils.cache_warmer import cache_warmer
+from utils.resource_usage import resource_usage, cache_footprint
+from utils.middleware import command, pipeline, CommandContext
 
 start_time = time.time()
 
-async def start_handler(client: Client, message: Message):
-    await db.increment_command_usage("start")
-    await message.reply_text(
+@command("start")
+async def start_handler(client: Client, message: Message, ctx: CommandContext):
+    await outbound.reply(
+        message,
         f"Hello {message.from_user.mention}!\n\n"
         "I'm an advanced music and group management bot with voice chat listening capabilities!\n\n"
         "**Music Commands:**\n"
@@ -20,7 +31,10 @@ async def start_handler(client: Client, message: Message):
         "/play [song name] - Play a song\n\n"
         "**Group Management:**\n"
         "/ban, /kick, /mute, /promote - Manage users\n"
-        "/pin, /purge, /info - Manage messages\n\n"
+        "/tban, /tmute [duration] - Temporary bans and mutes\n"
+        "/bban, /bkick, /bmute - Bulk moderation\n"
+        "/pin, /purge, /info - Manage messages\n"
+        "/antiflood - Configure flood protection\n\n"
         "**Other Commands:**\n"
         "/help - Get detailed help\n"
         "/stats - View bot statistics\n"
@@ -30,8 +44,8 @@ async def start_handler(client: Client, message: Message):
         "The assistant listens continuously when active."
     )
 
-async def help_handler(client: Client, message: Message):
-    await db.increment_command_usage("help")
+@command("help")
+async def help_handler(client: Client, message: Message, ctx: CommandContext):
     help_text = """
 **Advanced Music & Group Management Bot**
 
@@ -40,11 +54,15 @@ async def help_handler(client: Client, message: Message):
 /help - Show this help message
 /stats - View bot statistics
 /ping - Check bot response time
+/traces - Slowest recent /play requests (bot owner only)
+/profile [seconds] - Profile the running bot (bot owner only)
+/usage [chat id] - Resource usage per chat (bot owner only)
 
 **Music Commands:**
 /assiststart - Start assistant and activate voice listening
 /assistclose - Stop assistant from voice chat
 /play [song name] - Play a song in voice chat
+/topsongs - Most played songs in this chat
 
 **Voice Chat Control:**
 The assistant listens continuously when active. Say:
@@ -57,15 +75,19 @@ The assistant listens continuously when active. Say:
 **Group Management Commands:**
 /ban - Ban a user (reply to message)
 /unban - Unban a user (reply to message)
+/tban [duration] - Ban a user temporarily, e.g. /tban 1d (reply to message)
 /kick - Kick a user (reply to message)
 /mute - Mute a user (reply to message)
 /unmute - Unmute a user (reply to message)
+/tmute [duration] - Mute a user temporarily, e.g. /tmute 30m (reply to message)
+/bban, /bkick, /bmute [user_ids] [@usernames] [joined 30m] - Act on many users at once
 /promote - Promote user to admin (reply to message)
 /demote - Demote an admin (reply to message)
 /pin - Pin a message (reply to message)
 /unpin - Unpin message or all messages
-/purge - Delete messages (reply to start message)
+/purge [user|user_id] [30m] - Delete messages (reply to start message)
 /info - Get user info (reply to user or use directly)
+/antiflood [on|off] [limit seconds] [action mute|kick|ban] - Configure flood protection
 
 **How to use Music:**
 1. Add the bot to your group
@@ -93,35 +115,46 @@ The assistant listens continuously when active. Say:
 
 For support, contact the bot owner.
 """
-    await message.reply_text(help_text)
+    await outbound.reply(message, help_text)
 
-async def stats_handler(client: Client, message: Message):
-    await db.increment_command_usage("stats")
+@command("stats")
+async def stats_handler(client: Client, message: Message, ctx: CommandContext):
 
     current_time = time.time()
     uptime_seconds = int(current_time - start_time)
     hours, remainder = divmod(uptime_seconds, 3600)
     minutes, seconds = divmod(remainder, 60)
 
-    cpu_percent = psutil.cpu_percent(interval=1)
-    memory = psutil.virtual_memory()
-    memory_percent = memory.percent
+    sample = system_sampler.latest()
+    cached = system_sampler.db_snapshot
+    play_log = db.get_play_log_stats()
+    sends = outbound.get_stats()
+    loop = loop_monitor.get_stats()
+    transcodes = transcoder.get_stats()
+    warming = cache_warmer.get_stats()
 
-    total_plays = await db.get_total_plays()
-    command_stats = await db.get_stats()
-    active_chats = await db.get_active_chats()
+    total_plays = cached['total_plays']
+    command_stats = cached['command_stats']
+    active_chats = cached['active_chats']
 
     stats_text = f"""
 **Bot Statistics**
 
 **System:**
 Uptime: {hours}h {minutes}m {seconds}s
-CPU Usage: {cpu_percent}%
-Memory Usage: {memory_percent}%
+CPU Usage: {sample['cpu_percent']}%
+Memory Usage: {sample['memory_percent']}%
+Bot Memory: {round(sample['process_rss'] / (1024**2), 1)} MB
+Event Loop Lag: {round(sample['loop_lag'] * 1000, 1)}ms (worst {round(loop['max_drift'] * 1000)}ms, {loop['slow_callbacks']} slow callbacks)
+Commands/sec: {sample['commands_per_second']:.2f}
+Play Log Queue: {play_log['pending']} pending ({play_log['lag']:.1f}s lag, {play_log['dropped']} dropped)
+Send Queue: {sends['queued']} waiting (p95 {round(sends['latency_p95'] * 1000)}ms, {sends['coalesced']} edits merged)
+Transcoding: {transcodes['active']}/{transcodes['concurrency']} running, {transcodes['queued']} waiting (p95 wait {round(transcodes['wait_p95'] * 1000)}ms, {transcodes['speed_p50']:.0f}x realtime)
+Music Cache: {warming['hit_ratio']:.0%} hit rate ({warming['unwarmed_hit_ratio']:.0%} without {warming['warmed']} prefetched tracks)
 
 **Usage:**
 Total Songs Played: {total_plays}
-Active Chats: {len(active_chats)}
+Active Chats: {active_chats}
 Commands Used: {sum(command_stats.values())}
 
 **Top Commands:**
@@ -131,19 +164,105 @@ Commands Used: {sum(command_stats.values())}
     for cmd, count in sorted_commands:
         stats_text += f"/{cmd}: {count}\n"
 
-    await message.reply_text(stats_text)
+    latencies = pipeline.get_stats()
+    slowest = sorted(latencies.items(), key=lambda x: x[1]['p95'], reverse=True)[:3]
+    if slowest:
+        stats_text += "\n**Slowest Commands (p95):**\n"
+        for cmd, timing in slowest:
+            stats_text += f"/{cmd}: {round(timing['p95'] * 1000)}ms ({timing['errors']}/{timing['calls']} failed)\n"
 
-async def ping_handler(client: Client, message: Message):
-    await db.increment_command_usage("ping")
+    await outbound.reply(message, stats_text)
+
+@command("ping")
+async def ping_handler(client: Client, message: Message, ctx: CommandContext):
     start = datetime.now()
-    msg = await message.reply_text("Pinging...")
+    msg = await outbound.reply(message, "Pinging...")
     end = datetime.now()
     latency = (end - start).microseconds / 1000
 
-    await msg.edit_text(f"**Pong!**\nLatency: `{latency}ms`")
+    await outbound.edit(msg, f"**Pong!**\nLatency: `{latency}ms`")
+
+@command("traces", bot_owner=True)
+async def traces_handler(client: Client, message: Message, ctx: CommandContext):
+    limit = int(message.command[1]) if len(message.command) > 1 and message.command[1].isdigit() else 10
+    traces = tracer.slowest(min(limit, 25))
+
+    if not traces:
+        await outbound.reply(message, "No traces recorded yet!")
+        return
+
+    text = f"**Slowest of the last {len(tracer.recent)} requests:**\n\n"
+    for trace in traces:
+        title = trace.attrs.get('title') or trace.attrs.get('query', '')
+        text += (
+            f"#{trace.trace_id} {trace.name} [{trace.status}] in chat {trace.attrs.get('chat_id')}\n"
+            f"{title[:60]}\n"
+            f"`{trace.breakdown()}`\n\n"
+        )
+
+    await outbound.reply(message, text)
+
+@command("profile", bot_owner=True)
+async def profile_handler(client: Client, message: Message, ctx: CommandContext):
+    if profiler.is_running():
+        await outbound.reply(message, "A profile is already being captured!")
+        return
+
+    seconds = float(message.command[1]) if len(message.command) > 1 and message.command[1].isdigit() else 10
+    seconds = max(1.0, min(seconds, profiler.max_seconds))
+    status = await outbound.reply(message, f"Profiling for {seconds:.0f}s...")
+
+    summary, path = await profiler.capture(seconds)
+    try:
+        await outbound.send_document(message.chat.id, path, caption=summary[:1024], file_name=os.path.basename(path))
+    finally:
+        os.remove(path)
+    ctx.background(outbound.delete(status))
+
+def format_usage(name: str, value: float) -> str:
+    if name.endswith("_bytes"):
+        return f"{value / (1024**2):.1f} MB"
+    if name.endswith("_seconds"):
+        return f"{value:.1f}s"
+    return str(int(value))
+
+@command("usage", bot_owner=True)
+async def usage_handler(client: Client, message: Message, ctx: CommandContext):
+    if len(message.command) > 1 and message.command[1].lstrip("-").isdigit():
+        usage = resource_usage.snapshot(int(message.command[1]))
+        text = f"**Resource Usage for {usage['chat_id']}**\n\n"
+        for name in ("download_bytes", "transcode_seconds", "asr_seconds", "cache_bytes"):
+            text += f"{name}: {format_usage(name, usage[name])} total, {format_usage(name, usage['window'][name])} this window"
+            if name in resource_usage.quotas:
+                text += f" (quota {format_usage(name, resource_usage.quotas[name])})"
+            text += "\n"
+        text += (
+            f"capture_bytes: {format_usage('capture_bytes', usage['capture_bytes'])}\n"
+            f"Jobs: {usage['active_tasks']} running, {usage['queued_tasks']} waiting"
+        )
+        await outbound.reply(message, text)
+        return
+
+    footprint = await asyncio.get_running_loop().run_in_executor(None, cache_footprint)
+    text = (
+        f"**Resource Usage**\n"
+        f"Tracked chats: {len(resource_usage.chats)}\n"
+        f"Music cache: {format_usage('cache_bytes', footprint)}\n"
+    )
+    for name in ("download_bytes", "transcode_seconds", "asr_seconds", "capture_bytes", "active_tasks"):
+        top = [usage for usage in resource_usage.top(name, limit=5) if usage[name]]
+        if top:
+            text += f"\n**Top by {name}:**\n"
+            for usage in top:
+                text += f"`{usage['chat_id']}` {format_usage(name, usage[name])}\n"
+
+    await outbound.reply(message, text)
 
 def setup_handlers(bot: Client, assistant: Client):
     bot.add_handler(MessageHandler(start_handler, filters.command("start") & filters.private))
     bot.add_handler(MessageHandler(help_handler, filters.command("help")))
     bot.add_handler(MessageHandler(stats_handler, filters.command("stats")))
     bot.add_handler(MessageHandler(ping_handler, filters.command("ping")))
+    bot.add_handler(MessageHandler(traces_handler, filters.command("traces")))
+    bot.add_handler(MessageHandler(profile_handler, filters.command("profile")))
+    bot.add_handler(MessageHandler(usage_handler, filters.command("usage")))
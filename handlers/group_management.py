@@ -1,433 +1,676 @@
 from pyrogram import Client, filters
-from pyrogram.types import Message, ChatPrivileges
-from pyrogram.handlers import MessageHandler
+from pyrogram.types import Message, ChatPrivileges, ChatPermissions
+from pyrogram.handlers import MessageHandler, ChatMemberUpdatedHandler
 from pyrogram.errors import (
     UserAdminInvalid, ChatAdminRequired, UserNotParticipant,
     BadRequest, FloodWait
 )
 import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
-from database.mongodb import db
+from config import config
+from database import db
 from utils.logger import log_to_group
+from utils.admin_cache import admin_cache
+from utils.outbound import outbound
+from utils.durations import parse_duration, format_duration
+from utils.purge import PurgeEngine
+from utils.floodwait import call_with_floodwait
+from utils.timed_actions import timed_actions
+from utils.antiflood import antiflood, FLOOD_ACTIONS
+from utils.middleware import command, CommandContext
+from utils.bulk import BulkActionRunner
+from utils.join_tracker import join_tracker
 
 logger = logging.getLogger(__name__)
 
-async def is_admin(client: Client, chat_id: int, user_id: int) -> bool:
-    try:
-        member = await client.get_chat_member(chat_id, user_id)
-        return member.status in ["creator", "administrator"]
-    except Exception:
-        return False
-
-async def ban_handler(client: Client, message: Message):
-    await db.increment_command_usage("ban")
-    chat_id = message.chat.id
-    user_id = message.from_user.id
+PURGE_PROGRESS_INTERVAL = 3
 
-    if not await is_admin(client, chat_id, user_id):
-        await message.reply_text("You need to be an admin to use this command!")
-        return
+MUTED_PERMISSIONS = ChatPermissions(can_send_messages=False)
 
-    if not message.reply_to_message:
-        await message.reply_text("Reply to a user's message to ban them!")
-        return
-
-    target_user = message.reply_to_message.from_user
-
-    if await is_admin(client, chat_id, target_user.id):
-        await message.reply_text("Cannot ban an admin!")
-        return
-
-    try:
-        await client.ban_chat_member(chat_id, target_user.id)
-        await message.reply_text(
-            f"User {target_user.mention} has been banned!"
-        )
+UNMUTED_PERMISSIONS = ChatPermissions(
+    can_send_messages=True,
+    can_send_media_messages=True,
+    can_send_polls=True,
+    can_send_other_messages=True,
+    can_add_web_page_previews=True,
+    can_change_info=False,
+    can_invite_users=True,
+    can_pin_messages=False
+)
 
-        await log_to_group(
-            client,
-            f"**User Banned**\n"
-            f"Chat: {message.chat.title}\n"
-            f"Banned User: {target_user.mention} ({target_user.id})\n"
-            f"Banned By: {message.from_user.mention}"
+TELEGRAM_MIN_RESTRICTION = timedelta(seconds=30)
+TELEGRAM_MAX_RESTRICTION = timedelta(days=366)
+
+def restriction_until(duration):
+    if duration and TELEGRAM_MIN_RESTRICTION <= duration <= TELEGRAM_MAX_RESTRICTION:
+        return {"until_date": datetime.now() + duration}
+    return {}
+
+async def ban_user(client: Client, chat_id: int, user_id: int, duration=None):
+    await client.ban_chat_member(chat_id, user_id, **restriction_until(duration))
+
+async def unban_user(client: Client, chat_id: int, user_id: int):
+    await client.unban_chat_member(chat_id, user_id)
+
+async def kick_user(client: Client, chat_id: int, user_id: int):
+    await client.ban_chat_member(chat_id, user_id)
+    await asyncio.sleep(1)
+    await client.unban_chat_member(chat_id, user_id)
+
+async def mute_user(client: Client, chat_id: int, user_id: int, duration=None):
+    await client.restrict_chat_member(chat_id, user_id, MUTED_PERMISSIONS, **restriction_until(duration))
+
+async def unmute_user(client: Client, chat_id: int, user_id: int):
+    await client.restrict_chat_member(chat_id, user_id, UNMUTED_PERMISSIONS)
+
+TIMED_ACTION_EXECUTORS = {
+    "unban": unban_user,
+    "unmute": unmute_user,
+}
+
+async def apply_timed_action(client: Client, record: dict):
+    await call_with_floodwait(
+        TIMED_ACTION_EXECUTORS[record["action"]],
+        client,
+        record["chat_id"],
+        record["user_id"]
+    )
+
+async def chat_member_updated_handler(client: Client, update):
+    admin_cache.handle_member_update(update)
+
+@command(
+    "ban",
+    admin=True,
+    target="Reply to a user's message to ban them!",
+    protect_admins="Cannot ban an admin!",
+    admin_required="I need admin rights to ban users!"
+)
+async def ban_handler(client: Client, message: Message, ctx: CommandContext):
+    target_user = ctx.target
+
+    await ban_user(client, ctx.chat_id, target_user.id)
+    ctx.background(timed_actions.cancel(ctx.chat_id, target_user.id, "unban"))
+    await outbound.reply(
+        message,
+        f"User {target_user.mention} has been banned!"
+    )
+
+    ctx.background(log_to_group(
+        client,
+        f"**User Banned**\n"
+        f"Chat: {message.chat.title}\n"
+        f"Banned User: {target_user.mention} ({target_user.id})\n"
+        f"Banned By: {message.from_user.mention}"
+    ))
+
+@command(
+    "unban",
+    admin=True,
+    target="Reply to a user's message to unban them!"
+)
+async def unban_handler(client: Client, message: Message, ctx: CommandContext):
+    target_user = ctx.target
+
+    await unban_user(client, ctx.chat_id, target_user.id)
+    ctx.background(timed_actions.cancel(ctx.chat_id, target_user.id, "unban"))
+    await outbound.reply(
+        message,
+        f"User {target_user.mention} has been unbanned!"
+    )
+
+    ctx.background(log_to_group(
+        client,
+        f"**User Unbanned**\n"
+        f"Chat: {message.chat.title}\n"
+        f"Unbanned User: {target_user.mention} ({target_user.id})\n"
+        f"Unbanned By: {message.from_user.mention}"
+    ))
+
+@command(
+    "kick",
+    admin=True,
+    target="Reply to a user's message to kick them!",
+    protect_admins="Cannot kick an admin!",
+    admin_required="I need admin rights to kick users!"
+)
+async def kick_handler(client: Client, message: Message, ctx: CommandContext):
+    target_user = ctx.target
+
+    await kick_user(client, ctx.chat_id, target_user.id)
+
+    await outbound.reply(
+        message,
+        f"User {target_user.mention} has been kicked!"
+    )
+
+    ctx.background(log_to_group(
+        client,
+        f"**User Kicked**\n"
+        f"Chat: {message.chat.title}\n"
+        f"Kicked User: {target_user.mention} ({target_user.id})\n"
+        f"Kicked By: {message.from_user.mention}"
+    ))
+
+@command(
+    "mute",
+    admin=True,
+    target="Reply to a user's message to mute them!",
+    protect_admins="Cannot mute an admin!",
+    admin_required="I need admin rights to mute users!"
+)
+async def mute_handler(client: Client, message: Message, ctx: CommandContext):
+    target_user = ctx.target
+
+    await mute_user(client, ctx.chat_id, target_user.id)
+    ctx.background(timed_actions.cancel(ctx.chat_id, target_user.id, "unmute"))
+
+    await outbound.reply(
+        message,
+        f"User {target_user.mention} has been muted!"
+    )
+
+    ctx.background(log_to_group(
+        client,
+        f"**User Muted**\n"
+        f"Chat: {message.chat.title}\n"
+        f"Muted User: {target_user.mention} ({target_user.id})\n"
+        f"Muted By: {message.from_user.mention}"
+    ))
+
+@command(
+    "unmute",
+    admin=True,
+    target="Reply to a user's message to unmute them!"
+)
+async def unmute_handler(client: Client, message: Message, ctx: CommandContext):
+    target_user = ctx.target
+
+    await unmute_user(client, ctx.chat_id, target_user.id)
+    ctx.background(timed_actions.cancel(ctx.chat_id, target_user.id, "unmute"))
+
+    await outbound.reply(
+        message,
+        f"User {target_user.mention} has been unmuted!"
+    )
+
+    ctx.background(log_to_group(
+        client,
+        f"**User Unmuted**\n"
+        f"Chat: {message.chat.title}\n"
+        f"Unmuted User: {target_user.mention} ({target_user.id})\n"
+        f"Unmuted By: {message.from_user.mention}"
+    ))
+
+@command(
+    "tban",
+    admin=True,
+    target="Reply to a user's message to ban them temporarily!",
+    protect_admins="Cannot ban an admin!",
+    admin_required="I need admin rights to ban users!"
+)
+async def tban_handler(client: Client, message: Message, ctx: CommandContext):
+    duration = parse_duration(message.command[1]) if len(message.command) > 1 else None
+    if not duration:
+        await outbound.reply(
+            message,
+            "Please provide a duration!\n"
+            "Example: /tban 30m (units: s, m, h, d, w)"
         )
-
-    except ChatAdminRequired:
-        await message.reply_text("I need admin rights to ban users!")
-    except Exception as e:
-        logger.error(f"Error banning user: {e}")
-        await message.reply_text(f"Error: {str(e)}")
-
-async def unban_handler(client: Client, message: Message):
-    await db.increment_command_usage("unban")
-    chat_id = message.chat.id
-    user_id = message.from_user.id
-
-    if not await is_admin(client, chat_id, user_id):
-        await message.reply_text("You need to be an admin to use this command!")
         return
 
-    if not message.reply_to_message:
-        await message.reply_text("Reply to a user's message to unban them!")
+    target_user = ctx.target
+
+    await ban_user(client, ctx.chat_id, target_user.id, duration)
+    await timed_actions.schedule(ctx.chat_id, target_user.id, "unban", duration)
+
+    await outbound.reply(
+        message,
+        f"User {target_user.mention} has been banned for {format_duration(duration)}!"
+    )
+
+    ctx.background(log_to_group(
+        client,
+        f"**User Temporarily Banned**\n"
+        f"Chat: {message.chat.title}\n"
+        f"Banned User: {target_user.mention} ({target_user.id})\n"
+        f"Duration: {format_duration(duration)}\n"
+        f"Banned By: {message.from_user.mention}"
+    ))
+
+@command(
+    "tmute",
+    admin=True,
+    target="Reply to a user's message to mute them temporarily!",
+    protect_admins="Cannot mute an admin!",
+    admin_required="I need admin rights to mute users!"
+)
+async def tmute_handler(client: Client, message: Message, ctx: CommandContext):
+    duration = parse_duration(message.command[1]) if len(message.command) > 1 else None
+    if not duration:
+        await outbound.reply(
+            message,
+            "Please provide a duration!\n"
+            "Example: /tmute 30m (units: s, m, h, d, w)"
+        )
         return
 
-    target_user = message.reply_to_message.from_user
-
-    try:
-        await client.unban_chat_member(chat_id, target_user.id)
-        await message.reply_text(
-            f"User {target_user.mention} has been unbanned!"
+    target_user = ctx.target
+
+    await mute_user(client, ctx.chat_id, target_user.id, duration)
+    await timed_actions.schedule(ctx.chat_id, target_user.id, "unmute", duration)
+
+    await outbound.reply(
+        message,
+        f"User {target_user.mention} has been muted for {format_duration(duration)}!"
+    )
+
+    ctx.background(log_to_group(
+        client,
+        f"**User Temporarily Muted**\n"
+        f"Chat: {message.chat.title}\n"
+        f"Muted User: {target_user.mention} ({target_user.id})\n"
+        f"Duration: {format_duration(duration)}\n"
+        f"Muted By: {message.from_user.mention}"
+    ))
+
+@command(
+    "promote",
+    owner=True,
+    target="Reply to a user's message to promote them!",
+    admin_required="I need admin rights to promote users!"
+)
+async def promote_handler(client: Client, message: Message, ctx: CommandContext):
+    target_user = ctx.target
+
+    await client.promote_chat_member(
+        ctx.chat_id,
+        target_user.id,
+        privileges=ChatPrivileges(
+            can_manage_chat=True,
+            can_delete_messages=True,
+            can_manage_video_chats=True,
+            can_restrict_members=True,
+            can_promote_members=False,
+            can_change_info=True,
+            can_invite_users=True,
+            can_pin_messages=True
         )
-
-        await log_to_group(
-            client,
-            f"**User Unbanned**\n"
-            f"Chat: {message.chat.title}\n"
-            f"Unbanned User: {target_user.mention} ({target_user.id})\n"
-            f"Unbanned By: {message.from_user.mention}"
+    )
+
+    admin_cache.invalidate(ctx.chat_id)
+
+    await outbound.reply(
+        message,
+        f"User {target_user.mention} has been promoted to admin!"
+    )
+
+    ctx.background(log_to_group(
+        client,
+        f"**User Promoted**\n"
+        f"Chat: {message.chat.title}\n"
+        f"Promoted User: {target_user.mention} ({target_user.id})\n"
+        f"Promoted By: {message.from_user.mention}"
+    ))
+
+@command(
+    "demote",
+    owner=True,
+    target="Reply to a user's message to demote them!"
+)
+async def demote_handler(client: Client, message: Message, ctx: CommandContext):
+    target_user = ctx.target
+
+    await client.promote_chat_member(
+        ctx.chat_id,
+        target_user.id,
+        privileges=ChatPrivileges(
+            can_manage_chat=False,
+            can_delete_messages=False,
+            can_manage_video_chats=False,
+            can_restrict_members=False,
+            can_promote_members=False,
+            can_change_info=False,
+            can_invite_users=False,
+            can_pin_messages=False
         )
+    )
 
-    except Exception as e:
-        logger.error(f"Error unbanning user: {e}")
-        await message.reply_text(f"Error: {str(e)}")
+    admin_cache.invalidate(ctx.chat_id)
 
-async def kick_handler(client: Client, message: Message):
-    await db.increment_command_usage("kick")
-    chat_id = message.chat.id
-    user_id = message.from_user.id
+    await outbound.reply(
+        message,
+        f"User {target_user.mention} has been demoted!"
+    )
 
-    if not await is_admin(client, chat_id, user_id):
-        await message.reply_text("You need to be an admin to use this command!")
-        return
+    ctx.background(log_to_group(
+        client,
+        f"**User Demoted**\n"
+        f"Chat: {message.chat.title}\n"
+        f"Demoted User: {target_user.mention} ({target_user.id})\n"
+        f"Demoted By: {message.from_user.mention}"
+    ))
 
+@command("pin", admin=True, admin_required="I need admin rights to pin messages!")
+async def pin_handler(client: Client, message: Message, ctx: CommandContext):
     if not message.reply_to_message:
-        await message.reply_text("Reply to a user's message to kick them!")
-        return
-
-    target_user = message.reply_to_message.from_user
-
-    if await is_admin(client, chat_id, target_user.id):
-        await message.reply_text("Cannot kick an admin!")
+        await outbound.reply(message, "Reply to a message to pin it!")
         return
 
-    try:
-        await client.ban_chat_member(chat_id, target_user.id)
-        await asyncio.sleep(1)
-        await client.unban_chat_member(chat_id, target_user.id)
+    await client.pin_chat_message(
+        ctx.chat_id,
+        message.reply_to_message.id
+    )
 
-        await message.reply_text(
-            f"User {target_user.mention} has been kicked!"
-        )
+    await outbound.reply(message, "Message pinned successfully!")
 
-        await log_to_group(
-            client,
-            f"**User Kicked**\n"
-            f"Chat: {message.chat.title}\n"
-            f"Kicked User: {target_user.mention} ({target_user.id})\n"
-            f"Kicked By: {message.from_user.mention}"
+@command("unpin", admin=True, admin_required="I need admin rights to unpin messages!")
+async def unpin_handler(client: Client, message: Message, ctx: CommandContext):
+    if message.reply_to_message:
+        await client.unpin_chat_message(
+            ctx.chat_id,
+            message.reply_to_message.id
         )
+    else:
+        await client.unpin_all_chat_messages(ctx.chat_id)
+
+    await outbound.reply(message, "Message(s) unpinned successfully!")
+
+async def new_members_handler(client: Client, message: Message):
+    join_tracker.record(
+        message.chat.id,
+        [user.id for user in message.new_chat_members if not user.is_bot]
+    )
+
+def parse_bulk_targets(args):
+    user_ids = []
+    usernames = []
+    joined_within = None
+
+    args = iter(args)
+    for arg in args:
+        if arg.lower() == "joined":
+            joined_within = parse_duration(next(args, ""))
+            if not joined_within:
+                raise ValueError("Usage: joined <duration>, e.g. joined 30m")
+        elif arg.lstrip("-").isdigit():
+            user_ids.append(int(arg))
+        elif arg.startswith("@") and len(arg) > 1:
+            usernames.append(arg[1:])
+        else:
+            raise ValueError(f"Unknown target: {arg}")
+
+    return user_ids, usernames, joined_within
+
+async def resolve_bulk_targets(client: Client, message: Message, ctx: CommandContext):
+    user_ids, usernames, joined_within = parse_bulk_targets(message.command[1:])
+    if joined_within and joined_within.total_seconds() > join_tracker.retention:
+        retention = format_duration(timedelta(seconds=join_tracker.retention))
+        raise ValueError(f"I only remember joins from the last {retention}, use a shorter joined window!")
+
+    if message.reply_to_message and message.reply_to_message.from_user:
+        user_ids.append(message.reply_to_message.from_user.id)
+
+    users = await asyncio.gather(
+        *(call_with_floodwait(client.get_users, username) for username in usernames),
+        return_exceptions=True
+    )
+    unresolved = []
+    for username, user in zip(usernames, users):
+        if isinstance(user, Exception):
+            logger.debug(f"Could not resolve @{username}: {user}")
+            unresolved.append(username)
+        else:
+            user_ids.append(user.id)
 
-    except ChatAdminRequired:
-        await message.reply_text("I need admin rights to kick users!")
-    except Exception as e:
-        logger.error(f"Error kicking user: {e}")
-        await message.reply_text(f"Error: {str(e)}")
-
-async def mute_handler(client: Client, message: Message):
-    await db.increment_command_usage("mute")
-    chat_id = message.chat.id
-    user_id = message.from_user.id
-
-    if not await is_admin(client, chat_id, user_id):
-        await message.reply_text("You need to be an admin to use this command!")
-        return
+    if joined_within:
+        user_ids.extend(join_tracker.recent(ctx.chat_id, joined_within.total_seconds()))
 
-    if not message.reply_to_message:
-        await message.reply_text("Reply to a user's message to mute them!")
-        return
+    targets = []
+    skipped_admins = 0
+    for user_id in dict.fromkeys(user_ids):
+        if user_id == ctx.user.id or await ctx.is_admin(user_id):
+            skipped_admins += 1
+        else:
+            targets.append(user_id)
 
-    target_user = message.reply_to_message.from_user
-
-    if await is_admin(client, chat_id, target_user.id):
-        await message.reply_text("Cannot mute an admin!")
-        return
+    return targets, skipped_admins, unresolved
 
+async def run_bulk_action(client: Client, message: Message, ctx: CommandContext,
+                          action, verb: str, timer_action: str = None):
     try:
-        await client.restrict_chat_member(
-            chat_id,
-            target_user.id,
-            ChatPrivileges(can_send_messages=False)
-        )
+        targets, skipped_admins, unresolved = await resolve_bulk_targets(client, message, ctx)
+    except ValueError as e:
+        await outbound.reply(message, str(e))
+        return
 
-        await message.reply_text(
-            f"User {target_user.mention} has been muted!"
+    not_found = f"\nNot found: {', '.join('@' + username for username in unresolved)}" if unresolved else ""
+    if not targets:
+        await outbound.reply(
+            message,
+            "No users to act on!\n"
+            f"Example: /{ctx.name} 12345 @username joined 30m (or reply to a user){not_found}"
         )
+        return
 
-        await log_to_group(
-            client,
-            f"**User Muted**\n"
-            f"Chat: {message.chat.title}\n"
-            f"Muted User: {target_user.mention} ({target_user.id})\n"
-            f"Muted By: {message.from_user.mention}"
+    if len(targets) > config.BULK_ACTION_MAX_TARGETS:
+        await outbound.reply(
+            message,
+            f"Too many users ({len(targets)}), the limit is {config.BULK_ACTION_MAX_TARGETS} per command!"
         )
-
-    except ChatAdminRequired:
-        await message.reply_text("I need admin rights to mute users!")
-    except Exception as e:
-        logger.error(f"Error muting user: {e}")
-        await message.reply_text(f"Error: {str(e)}")
-
-async def unmute_handler(client: Client, message: Message):
-    await db.increment_command_usage("unmute")
-    chat_id = message.chat.id
-    user_id = message.from_user.id
-
-    if not await is_admin(client, chat_id, user_id):
-        await message.reply_text("You need to be an admin to use this command!")
         return
 
-    if not message.reply_to_message:
-        await message.reply_text("Reply to a user's message to unmute them!")
+    runner = BulkActionRunner(client, ctx.chat_id, concurrency=config.BULK_ACTION_CONCURRENCY)
+    result = await runner.run(targets, action)
+
+    if timer_action:
+        for user_id in result['succeeded']:
+            ctx.background(timed_actions.cancel(ctx.chat_id, user_id, timer_action))
+
+    summary = f"{verb.capitalize()} {len(result['succeeded'])} of {len(targets)} users in {result['elapsed']:.1f}s"
+    if result['failed']:
+        summary += f"\nFailed: {len(result['failed'])} ({next(iter(result['failed'].values()))})"
+    if skipped_admins:
+        summary += f"\nSkipped: {skipped_admins} admins"
+    summary += not_found
+
+    await outbound.reply(message, summary)
+
+    ctx.background(log_to_group(
+        client,
+        f"**Users {verb.capitalize()} (Bulk)**\n"
+        f"Chat: {message.chat.title}\n"
+        f"Users: {len(result['succeeded'])} of {len(targets)} "
+        f"({', '.join(str(user_id) for user_id in result['succeeded'][:20])}"
+        f"{', ...' if len(result['succeeded']) > 20 else ''})\n"
+        f"By: {message.from_user.mention}"
+    ))
+
+@command("bban", admin=True, admin_required="I need admin rights to ban users!")
+async def bban_handler(client: Client, message: Message, ctx: CommandContext):
+    await run_bulk_action(client, message, ctx, ban_user, "banned", timer_action="unban")
+
+@command("bkick", admin=True, admin_required="I need admin rights to kick users!")
+async def bkick_handler(client: Client, message: Message, ctx: CommandContext):
+    await run_bulk_action(client, message, ctx, kick_user, "kicked")
+
+@command("bmute", admin=True, admin_required="I need admin rights to mute users!")
+async def bmute_handler(client: Client, message: Message, ctx: CommandContext):
+    await run_bulk_action(client, message, ctx, mute_user, "muted", timer_action="unmute")
+
+async def antiflood_handler(client: Client, message: Message):
+    if not message.from_user:
         return
 
-    target_user = message.reply_to_message.from_user
-
-    try:
-        await client.restrict_chat_member(
-            chat_id,
-            target_user.id,
-            ChatPrivileges(
-                can_send_messages=True,
-                can_send_media_messages=True,
-                can_send_polls=True,
-                can_send_other_messages=True,
-                can_add_web_page_previews=True,
-                can_change_info=False,
-                can_invite_users=True,
-                can_pin_messages=False
-            )
-        )
-
-        await message.reply_text(
-            f"User {target_user.mention} has been unmuted!"
-        )
-
-        await log_to_group(
-            client,
-            f"**User Unmuted**\n"
-            f"Chat: {message.chat.title}\n"
-            f"Unmuted User: {target_user.mention} ({target_user.id})\n"
-            f"Unmuted By: {message.from_user.mention}"
-        )
-
-    except Exception as e:
-        logger.error(f"Error unmuting user: {e}")
-        await message.reply_text(f"Error: {str(e)}")
-
-async def promote_handler(client: Client, message: Message):
-    await db.increment_command_usage("promote")
     chat_id = message.chat.id
-    user_id = message.from_user.id
-
-    member = await client.get_chat_member(chat_id, user_id)
-    if member.status != "creator":
-        await message.reply_text("Only the group creator can promote users!")
+    user = message.from_user
+    action = antiflood.record(chat_id, user.id)
+    if not action:
         return
 
-    if not message.reply_to_message:
-        await message.reply_text("Reply to a user's message to promote them!")
-        return
-
-    target_user = message.reply_to_message.from_user
-
     try:
-        await client.promote_chat_member(
-            chat_id,
-            target_user.id,
-            privileges=ChatPrivileges(
-                can_manage_chat=True,
-                can_delete_messages=True,
-                can_manage_video_chats=True,
-                can_restrict_members=True,
-                can_promote_members=False,
-                can_change_info=True,
-                can_invite_users=True,
-                can_pin_messages=True
-            )
-        )
-
-        await message.reply_text(
-            f"User {target_user.mention} has been promoted to admin!"
-        )
-
-        await log_to_group(
-            client,
-            f"**User Promoted**\n"
-            f"Chat: {message.chat.title}\n"
-            f"Promoted User: {target_user.mention} ({target_user.id})\n"
-            f"Promoted By: {message.from_user.mention}"
-        )
-
-    except ChatAdminRequired:
-        await message.reply_text("I need admin rights to promote users!")
+        if await admin_cache.is_admin(client, chat_id, user.id):
+            return
     except Exception as e:
-        logger.error(f"Error promoting user: {e}")
-        await message.reply_text(f"Error: {str(e)}")
-
-async def demote_handler(client: Client, message: Message):
-    await db.increment_command_usage("demote")
-    chat_id = message.chat.id
-    user_id = message.from_user.id
-
-    member = await client.get_chat_member(chat_id, user_id)
-    if member.status != "creator":
-        await message.reply_text("Only the group creator can demote users!")
-        return
-
-    if not message.reply_to_message:
-        await message.reply_text("Reply to a user's message to demote them!")
-        return
-
-    target_user = message.reply_to_message.from_user
+        logger.error(f"Error loading admins for chat {chat_id}: {e}")
 
     try:
-        await client.promote_chat_member(
-            chat_id,
-            target_user.id,
-            privileges=ChatPrivileges(
-                can_manage_chat=False,
-                can_delete_messages=False,
-                can_manage_video_chats=False,
-                can_restrict_members=False,
-                can_promote_members=False,
-                can_change_info=False,
-                can_invite_users=False,
-                can_pin_messages=False
-            )
-        )
+        if action == "ban":
+            await call_with_floodwait(ban_user, client, chat_id, user.id)
+            result = "banned"
+        elif action == "kick":
+            await call_with_floodwait(kick_user, client, chat_id, user.id)
+            result = "kicked"
+        else:
+            duration = timedelta(minutes=config.ANTIFLOOD_MUTE_MINUTES)
+            await call_with_floodwait(mute_user, client, chat_id, user.id, duration)
+            await timed_actions.schedule(chat_id, user.id, "unmute", duration)
+            result = f"muted for {format_duration(duration)}"
 
-        await message.reply_text(
-            f"User {target_user.mention} has been demoted!"
-        )
+        await outbound.reply(message, f"User {user.mention} has been {result} for flooding!")
 
         await log_to_group(
             client,
-            f"**User Demoted**\n"
+            f"**Flood Detected**\n"
             f"Chat: {message.chat.title}\n"
-            f"Demoted User: {target_user.mention} ({target_user.id})\n"
-            f"Demoted By: {message.from_user.mention}"
-        )
-
-    except Exception as e:
-        logger.error(f"Error demoting user: {e}")
-        await message.reply_text(f"Error: {str(e)}")
-
-async def pin_handler(client: Client, message: Message):
-    await db.increment_command_usage("pin")
-    chat_id = message.chat.id
-    user_id = message.from_user.id
-
-    if not await is_admin(client, chat_id, user_id):
-        await message.reply_text("You need to be an admin to use this command!")
-        return
-
-    if not message.reply_to_message:
-        await message.reply_text("Reply to a message to pin it!")
-        return
-
-    try:
-        await client.pin_chat_message(
-            chat_id,
-            message.reply_to_message.id
+            f"User: {user.mention} ({user.id})\n"
+            f"Action: {result}"
         )
 
-        await message.reply_text("Message pinned successfully!")
-
     except ChatAdminRequired:
-        await message.reply_text("I need admin rights to pin messages!")
+        logger.warning(f"Missing admin rights to act on flood in chat {chat_id}")
     except Exception as e:
-        logger.error(f"Error pinning message: {e}")
-        await message.reply_text(f"Error: {str(e)}")
-
-async def unpin_handler(client: Client, message: Message):
-    await db.increment_command_usage("unpin")
-    chat_id = message.chat.id
-    user_id = message.from_user.id
-
-    if not await is_admin(client, chat_id, user_id):
-        await message.reply_text("You need to be an admin to use this command!")
+        logger.error(f"Error handling flood from user {user.id} in chat {chat_id}: {e}")
+
+    message.stop_propagation()
+
+@command("antiflood", admin=True)
+async def antiflood_command_handler(client: Client, message: Message, ctx: CommandContext):
+    chat_id = ctx.chat_id
+    args = [arg.lower() for arg in message.command[1:]]
+
+    if not args:
+        settings = antiflood.get_settings(chat_id)
+    elif args[0] in ("on", "off"):
+        settings = await antiflood.update_settings(chat_id, enabled=args[0] == "on")
+    elif args[0] == "action" and len(args) > 1 and args[1] in FLOOD_ACTIONS:
+        settings = await antiflood.update_settings(chat_id, action=args[1])
+    elif len(args) == 2 and args[0].isdigit() and args[1].isdigit() and int(args[0]) >= 2 and int(args[1]) >= 1:
+        settings = await antiflood.update_settings(chat_id, limit=int(args[0]), window=int(args[1]))
+    else:
+        await outbound.reply(
+            message,
+            "Usage:\n"
+            "/antiflood - Show current settings\n"
+            "/antiflood on|off - Enable or disable\n"
+            "/antiflood 8 10 - Act on 8 messages within 10 seconds\n"
+            "/antiflood action mute|kick|ban - Set the action"
+        )
         return
 
-    try:
-        if message.reply_to_message:
-            await client.unpin_chat_message(
-                chat_id,
-                message.reply_to_message.id
-            )
+    await outbound.reply(
+        message,
+        f"**Anti-Flood:** {'On' if settings['enabled'] else 'Off'}\n"
+        f"Limit: {settings['limit']} messages in {settings['window']}s\n"
+        f"Action: {settings['action']}"
+    )
+
+def parse_purge_args(args, reply_user_id):
+    user_id = None
+    since = None
+
+    for arg in args:
+        duration = parse_duration(arg)
+        if duration:
+            since = datetime.now() - duration
+        elif arg.lower() == "user" and reply_user_id:
+            user_id = reply_user_id
+        elif arg.lstrip("-").isdigit():
+            user_id = int(arg)
         else:
-            await client.unpin_all_chat_messages(chat_id)
-
-        await message.reply_text("Message(s) unpinned successfully!")
+            raise ValueError(f"Unknown purge option: {arg}")
 
-    except ChatAdminRequired:
-        await message.reply_text("I need admin rights to unpin messages!")
-    except Exception as e:
-        logger.error(f"Error unpinning message: {e}")
-        await message.reply_text(f"Error: {str(e)}")
+    return user_id, since
 
-async def purge_handler(client: Client, message: Message):
-    await db.increment_command_usage("purge")
-    chat_id = message.chat.id
-    user_id = message.from_user.id
-
-    if not await is_admin(client, chat_id, user_id):
-        await message.reply_text("You need to be an admin to use this command!")
-        return
+async def dismiss_status(status: Message, delay: float):
+    await asyncio.sleep(delay)
+    await outbound.delete(status)
 
+@command("purge", admin=True, admin_required="I need admin rights to delete messages!")
+async def purge_handler(client: Client, message: Message, ctx: CommandContext):
     if not message.reply_to_message:
-        await message.reply_text("Reply to a message to purge from!")
+        await outbound.reply(
+            message,
+            "Reply to a message to purge from!\n"
+            "Options: `user` (only the replied user's messages), a user ID, "
+            "or a time window like `30m` (only messages newer than that)."
+        )
         return
 
-    try:
-        status = await message.reply_text("Purging messages...")
-
-        start_id = message.reply_to_message.id
-        end_id = message.id
-
-        message_ids = list(range(start_id, end_id + 1))
-
-        await client.delete_messages(chat_id, message_ids)
+    reply_user = message.reply_to_message.from_user
 
-        await asyncio.sleep(2)
-        await status.delete()
-
-        await log_to_group(
-            client,
-            f"**Messages Purged**\n"
-            f"Chat: {message.chat.title}\n"
-            f"Count: {len(message_ids)}\n"
-            f"Purged By: {message.from_user.mention}"
+    try:
+        filter_user_id, since = parse_purge_args(
+            message.command[1:],
+            reply_user.id if reply_user else None
         )
+    except ValueError as e:
+        await outbound.reply(message, str(e))
+        return
 
-    except ChatAdminRequired:
-        await message.reply_text("I need admin rights to delete messages!")
-    except Exception as e:
-        logger.error(f"Error purging messages: {e}")
-        await message.reply_text(f"Error: {str(e)}")
-
-async def info_handler(client: Client, message: Message):
-    await db.increment_command_usage("info")
-
-    if message.reply_to_message:
+    status = await outbound.reply(message, "Purging messages...")
+
+    start_id = message.reply_to_message.id
+    end_id = message.id
+    last_progress = time.monotonic()
+
+    async def report_progress(scanned: int, total: int):
+        nonlocal last_progress
+        if time.monotonic() - last_progress < PURGE_PROGRESS_INTERVAL:
+            return
+        last_progress = time.monotonic()
+        outbound.post_edit(status, f"Purging messages... {scanned}/{total} scanned")
+
+    engine = PurgeEngine(client, ctx.chat_id, concurrency=config.PURGE_CONCURRENCY)
+    result = await engine.purge(
+        start_id,
+        end_id,
+        user_id=filter_user_id,
+        since=since,
+        progress=report_progress
+    )
+
+    if filter_user_id or since:
+        ctx.background(outbound.delete(message))
+
+    await outbound.edit(
+        status,
+        f"Purged {result['deleted']} messages in {result['elapsed']:.1f}s "
+        f"({result['rate']:.1f} msg/s)"
+    )
+    ctx.background(dismiss_status(status, 5))
+
+    ctx.background(log_to_group(
+        client,
+        f"**Messages Purged**\n"
+        f"Chat: {message.chat.title}\n"
+        f"Count: {result['deleted']} of {result['scanned']} scanned\n"
+        f"Throughput: {result['rate']:.1f} msg/s\n"
+        f"Purged By: {message.from_user.mention}"
+    ))
+
+@command("info")
+async def info_handler(client: Client, message: Message, ctx: CommandContext):
+    if message.reply_to_message and message.reply_to_message.from_user:
         user = message.reply_to_message.from_user
     else:
         user = message.from_user
 
-    try:
-        member = await client.get_chat_member(message.chat.id, user.id)
+    member = await client.get_chat_member(ctx.chat_id, user.id)
 
-        info_text = f"""
+    info_text = f"""
 **User Information**
 
 Name: {user.mention}
@@ -439,13 +682,11 @@ Status: {member.status}
 First Seen: {member.joined_date.strftime('%Y-%m-%d %H:%M:%S') if hasattr(member, 'joined_date') and member.joined_date else 'Unknown'}
 """
 
-        await message.reply_text(info_text)
-
-    except Exception as e:
-        logger.error(f"Error getting user info: {e}")
-        await message.reply_text(f"Error: {str(e)}")
+    await outbound.reply(message, info_text)
 
 def setup_handlers(bot: Client, assistant: Client):
+    timed_actions.set_executor(lambda record: apply_timed_action(bot, record))
+
     bot.add_handler(MessageHandler(ban_handler, filters.command("ban") & filters.group))
     bot.add_handler(MessageHandler(unban_handler, filters.command("unban") & filters.group))
     bot.add_handler(MessageHandler(kick_handler, filters.command("kick") & filters.group))
@@ -457,3 +698,12 @@ def setup_handlers(bot: Client, assistant: Client):
     bot.add_handler(MessageHandler(unpin_handler, filters.command("unpin") & filters.group))
     bot.add_handler(MessageHandler(purge_handler, filters.command("purge") & filters.group))
     bot.add_handler(MessageHandler(info_handler, filters.command("info") & filters.group))
+    bot.add_handler(MessageHandler(tban_handler, filters.command("tban") & filters.group))
+    bot.add_handler(MessageHandler(tmute_handler, filters.command("tmute") & filters.group))
+    bot.add_handler(MessageHandler(bban_handler, filters.command("bban") & filters.group))
+    bot.add_handler(MessageHandler(bkick_handler, filters.command("bkick") & filters.group))
+    bot.add_handler(MessageHandler(bmute_handler, filters.command("bmute") & filters.group))
+    bot.add_handler(MessageHandler(new_members_handler, filters.new_chat_members & filters.group))
+    bot.add_handler(MessageHandler(antiflood_command_handler, filters.command("antiflood") & filters.group))
+    bot.add_handler(ChatMemberUpdatedHandler(chat_member_updated_handler, filters.group))
+    bot.add_handler(MessageHandler(antiflood_handler, filters.group & ~filters.service), group=-1)
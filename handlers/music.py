@@ -3,22 +3,28 @@ from pyrogram.types import Message
 from pyrogram.handlers import MessageHandler
 import asyncio
 import logging
-from database.mongodb import db
-from utils.downloader import download_song, search_song
+from database import db
+from config import config
+from utils.downloader import download_song, search_song, get_cached_song, duration_to_seconds, length_limit_message
 from utils.speech import recognize_speech
 from utils.logger import log_to_group
+from utils.outbound import outbound
+from utils.tracing import tracer
+from utils.resource_usage import resource_usage, quota_message
+from utils.middleware import command, CommandContext
 from handlers.voice_chat import join_voice_chat, active_calls
 from utils.voice_listener import voice_listener
 import os
 
 logger = logging.getLogger(__name__)
 
-async def play_handler(client: Client, message: Message):
-    await db.increment_command_usage("play")
+@command("play")
+async def play_handler(client: Client, message: Message, ctx: CommandContext):
     chat_id = message.chat.id
 
     if chat_id not in active_calls:
-        await message.reply_text(
+        await outbound.reply(
+            message,
             "Assistant is not active in this chat!\n"
             "Use /assiststart first to activate the assistant."
         )
@@ -26,65 +32,101 @@ async def play_handler(client: Client, message: Message):
 
     query = message.text.split(maxsplit=1)
     if len(query) < 2:
-        await message.reply_text(
+        await outbound.reply(
+            message,
             "Please provide a song name!\n"
             "Example: /play Despacito"
         )
         return
 
     song_query = query[1]
-    status_msg = await message.reply_text(f"Searching for: {song_query}...")
 
-    try:
-        song_info = await search_song(song_query)
-
-        if not song_info:
-            await status_msg.edit_text("Sorry, couldn't find the song!")
-            return
-
-        await status_msg.edit_text(
-            f"Found: {song_info['title']}\n"
-            f"Downloading..."
-        )
-
-        audio_path = await download_song(song_info['url'])
-
-        if not audio_path:
-            await status_msg.edit_text("Error downloading the song!")
-            return
-
-        await status_msg.edit_text("Starting playback...")
-
-        assistant = client.assistant
-        success = await join_voice_chat(assistant, chat_id, audio_path)
-
-        if success:
-            await status_msg.edit_text(
-                f"Now Playing:\n"
-                f"{song_info['title']}\n\n"
-                f"Duration: {song_info.get('duration', 'Unknown')}\n"
-                f"Platform: {song_info.get('platform', 'YouTube')}"
+    with tracer.start("play", chat_id=chat_id, user_id=message.from_user.id, query=song_query) as trace:
+        with trace.span("reply"):
+            status_msg = await outbound.reply(message, f"Searching for: {song_query}...")
+
+        try:
+            with trace.span("search"):
+                song_info = await search_song(song_query)
+
+            if not song_info:
+                trace.finish("not_found")
+                await outbound.edit(status_msg, "Sorry, couldn't find the song!")
+                return
+
+            too_long = length_limit_message(song_info)
+            if too_long:
+                trace.finish("too_long")
+                await outbound.edit(status_msg, too_long)
+                return
+
+            outbound.post_edit(
+                status_msg,
+                f"Found: {song_info['title']}\n"
+                f"Downloading..."
             )
 
-            await db.add_song_play(
-                song_info['title'],
-                song_info.get('platform', 'YouTube'),
-                chat_id
-            )
-
-            await log_to_group(
-                client,
-                f"**Now Playing**\n"
-                f"Song: {song_info['title']}\n"
-                f"Chat: {message.chat.title}\n"
-                f"Requested by: {message.from_user.mention}"
-            )
-        else:
-            await status_msg.edit_text("Error starting playback!")
+            cache_hit = get_cached_song(song_info['url']) is not None
+            trace.set(title=song_info['title'], cache_hit=cache_hit)
+
+            blocked = None if cache_hit else resource_usage.over_quota(chat_id, "download_bytes", "transcode_seconds")
+            if blocked:
+                trace.finish("quota")
+                await outbound.edit(status_msg, quota_message(*blocked))
+                return
+
+            async with resource_usage.job(chat_id):
+                audio_path = await download_song(song_info['url'])
+
+            if not audio_path:
+                trace.finish("download_failed")
+                await outbound.edit(status_msg, "Error downloading the song!")
+                return
+
+            outbound.post_edit(status_msg, "Starting playback...")
+
+            assistant = client.assistant
+            with trace.span("join_call"):
+                success = await join_voice_chat(assistant, chat_id, audio_path)
+
+            if success:
+                trace.finish("ok")
+                text = (
+                    f"Now Playing:\n"
+                    f"{song_info['title']}\n\n"
+                    f"Duration: {song_info.get('duration', 'Unknown')}\n"
+                    f"Platform: {song_info.get('platform', 'YouTube')}"
+                )
+                if config.OWNER_ID and message.from_user.id == config.OWNER_ID:
+                    text += f"\n\nTiming: {trace.breakdown()}"
+
+                await outbound.edit(status_msg, text)
+
+                db.add_song_play(
+                    song_info['title'],
+                    song_info.get('platform', 'YouTube'),
+                    chat_id,
+                    url=song_info['url'],
+                    requested_by=message.from_user.id,
+                    duration=duration_to_seconds(song_info.get('duration')),
+                    cache_hit=cache_hit
+                )
+
+                ctx.background(log_to_group(
+                    client,
+                    f"**Now Playing**\n"
+                    f"Song: {song_info['title']}\n"
+                    f"Chat: {message.chat.title}\n"
+                    f"Requested by: {message.from_user.mention}"
+                ))
+            else:
+                trace.finish("join_failed")
+                await outbound.edit(status_msg, "Error starting playback!")
 
-    except Exception as e:
-        logger.error(f"Error in play_handler: {e}")
-        await status_msg.edit_text(f"Error: {str(e)}")
+        except Exception as e:
+            trace.finish("error")
+            logger.error(f"Error in play_handler: {e}")
+            await outbound.edit(status_msg, f"Error: {str(e)}")
 
 async def voice_message_handler(client: Client, message: Message):
     chat_id = message.chat.id
@@ -93,7 +135,7 @@ async def voice_message_handler(client: Client, message: Message):
         return
 
     try:
-        status_msg = await message.reply_text("Processing your voice command...")
+        status_msg = await outbound.reply(message, "Processing your voice command...")
 
         voice_file = await message.download()
 
@@ -107,7 +149,7 @@ async def voice_message_handler(client: Client, message: Message):
 
     except Exception as e:
         logger.error(f"Error processing voice message: {e}")
-        await message.reply_text(f"Error processing voice: {str(e)}")
+        await outbound.reply(message, f"Error processing voice: {str(e)}")
 
 async def process_voice_command_from_message(client: Client, message: Message, command: dict, status_msg: Message):
     try:
@@ -117,30 +159,47 @@ async def process_voice_command_from_message(client: Client, message: Message, c
         if action == 'play':
             query = command.get('query', '')
             if query:
-                await status_msg.edit_text(f"Playing: {query}\n\nSearching...")
+                outbound.post_edit(status_msg, f"Playing: {query}\n\nSearching...")
 
                 song_info = await search_song(query)
 
                 if song_info:
-                    await status_msg.edit_text(f"Found: {song_info['title']}\nDownloading...")
+                    too_long = length_limit_message(song_info)
+                    if too_long:
+                        await outbound.edit(status_msg, too_long)
+                        return
 
-                    audio_path = await download_song(song_info['url'])
+                    outbound.post_edit(status_msg, f"Found: {song_info['title']}\nDownloading...")
+
+                    cache_hit = get_cached_song(song_info['url']) is not None
+                    blocked = None if cache_hit else resource_usage.over_quota(chat_id, "download_bytes", "transcode_seconds")
+                    if blocked:
+                        await outbound.edit(status_msg, quota_message(*blocked))
+                        return
+
+                    async with resource_usage.job(chat_id):
+                        audio_path = await download_song(song_info['url'])
 
                     if audio_path:
                         assistant = client.assistant
                         success = await join_voice_chat(assistant, chat_id, audio_path)
 
                         if success:
-                            await status_msg.edit_text(
+                            await outbound.edit(
+                                status_msg,
                                 f"Now Playing:\n{song_info['title']}\n\n"
                                 f"Duration: {song_info.get('duration', 'Unknown')}\n"
                                 f"Platform: {song_info.get('platform', 'YouTube')}"
                             )
 
-                            await db.add_song_play(
+                            db.add_song_play(
                                 song_info['title'],
                                 song_info.get('platform', 'YouTube'),
-                                chat_id
+                                chat_id,
+                                url=song_info['url'],
+                                requested_by=message.from_user.id,
+                                duration=duration_to_seconds(song_info.get('duration')),
+                                cache_hit=cache_hit
                             )
 
                             await log_to_group(
@@ -151,25 +210,45 @@ async def process_voice_command_from_message(client: Client, message: Message, c
                                 f"User: {message.from_user.mention}"
                             )
                         else:
-                            await status_msg.edit_text("Error starting playback!")
+                            await outbound.edit(status_msg, "Error starting playback!")
                     else:
-                        await status_msg.edit_text("Error downloading the song!")
+                        await outbound.edit(status_msg, "Error downloading the song!")
                 else:
-                    await status_msg.edit_text("Sorry, couldn't find the song!")
+                    await outbound.edit(status_msg, "Sorry, couldn't find the song!")
             else:
-                await status_msg.edit_text("Please specify a song name!")
+                await outbound.edit(status_msg, "Please specify a song name!")
         else:
-            await status_msg.edit_text(
+            await outbound.edit(
+                status_msg,
                 f"Command received: {action}\n"
                 f"This feature is coming soon!"
             )
 
     except Exception as e:
         logger.error(f"Error processing voice command from message: {e}")
-        await status_msg.edit_text(f"Error: {str(e)}")
+        await outbound.edit(status_msg, f"Error: {str(e)}")
+
+@command("topsongs")
+async def topsongs_handler(client: Client, message: Message, ctx: CommandContext):
+    top_songs = await db.get_top_songs(ctx.chat_id, limit=10)
+
+    if not top_songs:
+        await outbound.reply(message, "No songs have been played in this chat yet!")
+        return
+
+    daily_plays = await db.get_daily_plays(ctx.chat_id, days=7)
+
+    text = "**Top Songs in this Chat**\n\n"
+    for position, song in enumerate(top_songs, start=1):
+        text += f"{position}. {song['song_title']} - {song['count']} plays\n"
+
+    text += f"\nPlays in the last 7 days: {sum(day['count'] for day in daily_plays)}"
+
+    await outbound.reply(message, text)
 
 def setup_handlers(bot: Client, assistant: Client):
     bot.assistant = assistant
 
     bot.add_handler(MessageHandler(play_handler, filters.command("play") & filters.group))
     bot.add_handler(MessageHandler(voice_message_handler, filters.voice & filters.group))
+    bot.add_handler(MessageHandler(topsongs_handler, filters.command("topsongs") & filters.group))
@@ -2,15 +2,17 @@ from pyrogram import Client, filters
 from pyrogram.types import Message
 from pyrogram.handlers import MessageHandler
 from pyrogram.errors import UserAlreadyParticipant, InviteHashExpired
-from pytgcalls import PyTgCalls, StreamType
-from pytgcalls.types import AudioPiped, VideoParameters, AudioParameters
-from pytgcalls.exceptions import GroupCallNotFound, NotInGroupCallError
 import asyncio
 import logging
 import os
 from config import config
-from database.mongodb import db
+from database import db
 from utils.logger import log_to_group
+from utils.outbound import outbound
+from utils.middleware import command, CommandContext
+from utils.metrics import metrics, timed
+from utils.tracing import tracer
+from utils.resource_usage import resource_usage
 from utils.voice_listener import voice_listener
 from utils.audio_capture import audio_capture_manager
 
@@ -20,12 +22,18 @@ active_calls = {}
 pytgcalls_instances = {}
 listening_tasks = {}
 
-async def assiststart_handler(client: Client, message: Message):
-    await db.increment_command_usage("assiststart")
+metrics.gauge("bot_active_calls", "Voice chats the assistant is in").set_function(lambda: len(active_calls))
+metrics.gauge("bot_listening_chats", "Voice chats with an active listening loop").set_function(lambda: len(listening_tasks))
+
+@command("assiststart")
+async def assiststart_handler(client: Client, message: Message, ctx: CommandContext):
+    from pytgcalls import PyTgCalls, StreamType
+    from pytgcalls.types import AudioPiped
+
     chat_id = message.chat.id
 
     try:
-        status_msg = await message.reply_text("Starting assistant and joining voice chat...")
+        status_msg = await outbound.reply(message, "Starting assistant and joining voice chat...")
 
         try:
             assistant = client.assistant
@@ -35,7 +43,7 @@ async def assiststart_handler(client: Client, message: Message):
         except Exception as e:
             logger.error(f"Error joining chat: {e}")
 
-        await db.add_chat(chat_id, message.chat.title)
+        ctx.background(db.add_chat(chat_id, message.chat.title))
 
         if chat_id not in pytgcalls_instances:
             pytgcalls = PyTgCalls(assistant)
@@ -63,7 +71,8 @@ async def assiststart_handler(client: Client, message: Message):
         await voice_listener.start_listening(chat_id, handle_voice_command)
         audio_capture_manager.start_capture(chat_id)
 
-        await status_msg.edit_text(
+        await outbound.edit(
+            status_msg,
             "Assistant is now active in voice chat!\n\n"
             "I'm listening for your commands. Say:\n"
             "- 'Assistant play [song name]' to play music\n"
@@ -73,14 +82,14 @@ async def assiststart_handler(client: Client, message: Message):
             "Just speak naturally in the voice chat!"
         )
 
-        await log_to_group(
+        ctx.background(log_to_group(
             client,
             f"**Assistant Started & Listening**\n"
             f"Chat: {message.chat.title}\n"
             f"Chat ID: {chat_id}\n"
             f"Started by: {message.from_user.mention}\n"
             f"Voice recognition: Active"
-        )
+        ))
 
         listening_tasks[chat_id] = asyncio.create_task(
             voice_listening_loop(client, chat_id)
@@ -88,10 +97,12 @@ async def assiststart_handler(client: Client, message: Message):
 
     except Exception as e:
         logger.error(f"Error in assiststart: {e}")
-        await message.reply_text(f"Error starting assistant: {str(e)}")
+        await outbound.reply(message, f"Error starting assistant: {str(e)}")
+
+@command("assistclose")
+async def assistclose_handler(client: Client, message: Message, ctx: CommandContext):
+    from pytgcalls.exceptions import GroupCallNotFound, NotInGroupCallError
 
-async def assistclose_handler(client: Client, message: Message):
-    await db.increment_command_usage("assistclose")
     chat_id = message.chat.id
 
     try:
@@ -119,23 +130,27 @@ async def assistclose_handler(client: Client, message: Message):
         if chat_id in active_calls:
             del active_calls[chat_id]
 
-        await db.remove_chat(chat_id)
+        ctx.background(db.remove_chat(chat_id))
 
-        await message.reply_text("Assistant left the voice chat and stopped listening. Goodbye!")
+        await outbound.reply(message, "Assistant left the voice chat and stopped listening. Goodbye!")
 
-        await log_to_group(
+        ctx.background(log_to_group(
             client,
             f"**Assistant Stopped**\n"
             f"Chat: {message.chat.title}\n"
             f"Chat ID: {chat_id}\n"
             f"Stopped by: {message.from_user.mention}"
-        )
+        ))
 
     except Exception as e:
         logger.error(f"Error in assistclose: {e}")
-        await message.reply_text(f"Error closing assistant: {str(e)}")
+        await outbound.reply(message, f"Error closing assistant: {str(e)}")
 
+@timed("join_call")
 async def join_voice_chat(assistant: Client, chat_id: int, audio_path: str):
+    from pytgcalls import PyTgCalls, StreamType
+    from pytgcalls.types import AudioPiped
+
     try:
         if chat_id not in pytgcalls_instances:
             pytgcalls = PyTgCalls(assistant)
@@ -172,6 +187,27 @@ async def leave_voice_chat(chat_id: int):
         logger.error(f"Error leaving voice chat: {e}")
         return False
 
+async def leave_all_voice_chats():
+    chat_ids = set(active_calls) | set(pytgcalls_instances) | set(listening_tasks)
+
+    async def close(chat_id: int):
+        await voice_listener.stop_listening(chat_id)
+        audio_capture_manager.stop_capture(chat_id)
+
+        task = listening_tasks.pop(chat_id, None)
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        await leave_voice_chat(chat_id)
+        pytgcalls_instances.pop(chat_id, None)
+
+    await asyncio.gather(*(close(chat_id) for chat_id in chat_ids), return_exceptions=True)
+    logger.info(f"Left {len(chat_ids)} voice chats")
+
 async def voice_listening_loop(client: Client, chat_id: int):
     logger.info(f"Started voice listening loop for chat {chat_id}")
 
@@ -192,35 +228,70 @@ async def process_voice_command(client: Client, chat_id: int, command: dict):
         if action == 'play':
             query = command.get('query', '')
             if query:
-                from utils.downloader import download_song, search_song
+                from utils.downloader import (
+                    download_song, search_song, get_cached_song, duration_to_seconds, length_limit_message
+                )
+
+                with tracer.start("voice_play", chat_id=chat_id, query=query) as trace:
+                    if command.get('recognized_in') is not None:
+                        trace.add_earlier_span("asr", command['recognized_in'])
+
+                    with trace.span("search"):
+                        song_info = await search_song(query)
 
-                song_info = await search_song(query)
+                    if not song_info:
+                        trace.finish("not_found")
+                        return
 
-                if song_info:
                     logger.info(f"Found song: {song_info['title']} for voice command")
 
-                    audio_path = await download_song(song_info['url'])
+                    too_long = length_limit_message(song_info)
+                    if too_long:
+                        logger.info(f"Not playing in chat {chat_id}: {too_long}")
+                        trace.finish("too_long")
+                        return
+
+                    cache_hit = get_cached_song(song_info['url']) is not None
+                    trace.set(title=song_info['title'], cache_hit=cache_hit)
+
+                    if not cache_hit and resource_usage.over_quota(chat_id, "download_bytes", "transcode_seconds"):
+                        trace.finish("quota")
+                        return
+
+                    async with resource_usage.job(chat_id):
+                        audio_path = await download_song(song_info['url'])
+
+                    if not audio_path:
+                        trace.finish("download_failed")
+                        return
 
-                    if audio_path:
-                        assistant = client.assistant
+                    assistant = client.assistant
+                    with trace.span("join_call"):
                         success = await join_voice_chat(assistant, chat_id, audio_path)
 
-                        if success:
-                            logger.info(f"Now playing {song_info['title']} in chat {chat_id}")
-
-                            await db.add_song_play(
-                                song_info['title'],
-                                song_info.get('platform', 'YouTube'),
-                                chat_id
-                            )
-
-                            await log_to_group(
-                                client,
-                                f"**Voice Command Executed**\n"
-                                f"Command: Play\n"
-                                f"Song: {song_info['title']}\n"
-                                f"Chat ID: {chat_id}"
-                            )
+                    if not success:
+                        trace.finish("join_failed")
+                        return
+
+                    trace.finish("ok")
+                    logger.info(f"Now playing {song_info['title']} in chat {chat_id}")
+
+                    db.add_song_play(
+                        song_info['title'],
+                        song_info.get('platform', 'YouTube'),
+                        chat_id,
+                        url=song_info['url'],
+                        duration=duration_to_seconds(song_info.get('duration')),
+                        cache_hit=cache_hit
+                    )
+
+                    await log_to_group(
+                        client,
+                        f"**Voice Command Executed**\n"
+                        f"Command: Play\n"
+                        f"Song: {song_info['title']}\n"
+                        f"Chat ID: {chat_id}"
+                    )
 
         elif action == 'pause':
             if chat_id in pytgcalls_instances:
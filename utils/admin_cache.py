@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+from pyrogram import Client
+from pyrogram.enums import ChatMembersFilter, ChatMemberStatus
+from pyrogram.types import ChatMemberUpdated
+from config import config
+
+logger = logging.getLogger(__name__)
+
+ADMIN_STATUSES = (ChatMemberStatus.OWNER, ChatMemberStatus.ADMINISTRATOR)
+
+class AdminCache:
+    def __init__(self, ttl: float = 300.0, max_chats: int = 5000):
+        self.ttl = ttl
+        self.max_chats = max_chats
+        self.rosters: "OrderedDict[int, Tuple[float, Dict[int, ChatMemberStatus]]]" = OrderedDict()
+        self.locks: Dict[int, asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get_roster(self, client: Client, chat_id: int) -> Dict[int, ChatMemberStatus]:
+        roster = self._cached(chat_id)
+        if roster is not None:
+            self.hits += 1
+            return roster
+
+        lock = self.locks.setdefault(chat_id, asyncio.Lock())
+        async with lock:
+            roster = self._cached(chat_id)
+            if roster is not None:
+                self.hits += 1
+                return roster
+
+            self.misses += 1
+            roster = {}
+            async for member in client.get_chat_members(chat_id, filter=ChatMembersFilter.ADMINISTRATORS):
+                if member.user:
+                    roster[member.user.id] = member.status
+
+            self.rosters[chat_id] = (time.monotonic(), roster)
+            self.rosters.move_to_end(chat_id)
+            self._evict()
+            return roster
+
+    async def get_status(self, client: Client, chat_id: int, user_id: int):
+        roster = await self.get_roster(client, chat_id)
+        return roster.get(user_id)
+
+    async def is_admin(self, client: Client, chat_id: int, user_id: int) -> bool:
+        return await self.get_status(client, chat_id, user_id) in ADMIN_STATUSES
+
+    def invalidate(self, chat_id: int):
+        self.rosters.pop(chat_id, None)
+
+    def handle_member_update(self, update: ChatMemberUpdated):
+        old_status = update.old_chat_member.status if update.old_chat_member else None
+        new_status = update.new_chat_member.status if update.new_chat_member else None
+
+        if old_status != new_status and (old_status in ADMIN_STATUSES or new_status in ADMIN_STATUSES):
+            logger.info(f"Admin roster changed in chat {update.chat.id}, invalidating cache")
+            self.invalidate(update.chat.id)
+
+    def _cached(self, chat_id: int):
+        entry = self.rosters.get(chat_id)
+        if not entry:
+            return None
+
+        loaded_at, roster = entry
+        if time.monotonic() - loaded_at >= self.ttl:
+            del self.rosters[chat_id]
+            return None
+
+        self.rosters.move_to_end(chat_id)
+        return roster
+
+    def _evict(self):
+        while len(self.rosters) > self.max_chats:
+            chat_id, _ = self.rosters.popitem(last=False)
+            lock = self.locks.get(chat_id)
+            if lock and not lock.locked():
+                del self.locks[chat_id]
+
+admin_cache = AdminCache(ttl=config.ADMIN_CACHE_TTL)
@@ -0,0 +1,118 @@
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Optional
+from config import config
+from database import db
+
+logger = logging.getLogger(__name__)
+
+FLOOD_ACTIONS = ("mute", "kick", "ban")
+
+class ChatFloodState:
+    __slots__ = ("last_seen", "users")
+
+    def __init__(self):
+        self.last_seen = 0.0
+        self.users: "OrderedDict[int, deque]" = OrderedDict()
+
+class AntiFloodEngine:
+    def __init__(self, limit: int = 8, window: float = 10.0, action: str = "mute",
+                 enabled: bool = False, max_chats: int = 10000, max_users_per_chat: int = 5000,
+                 idle_timeout: float = 600.0):
+        self.default_settings = {
+            "enabled": enabled,
+            "limit": max(2, limit),
+            "window": window,
+            "action": action if action in FLOOD_ACTIONS else "mute",
+        }
+        self.max_chats = max_chats
+        self.max_users_per_chat = max_users_per_chat
+        self.idle_timeout = idle_timeout
+        self.chat_settings: Dict[int, Dict] = {}
+        self.chats: "OrderedDict[int, ChatFloodState]" = OrderedDict()
+        self.messages_seen = 0
+        self.floods_detected = 0
+        self.evicted_chats = 0
+
+    async def load(self):
+        self.chat_settings = await db.get_chat_settings("antiflood")
+        logger.info(f"Loaded anti-flood settings for {len(self.chat_settings)} chats")
+
+    def get_settings(self, chat_id: int) -> Dict:
+        return self.chat_settings.get(chat_id, self.default_settings)
+
+    async def update_settings(self, chat_id: int, **changes) -> Dict:
+        settings = dict(self.get_settings(chat_id))
+        settings.update(changes)
+        self.chat_settings[chat_id] = settings
+        self.chats.pop(chat_id, None)
+        await db.set_chat_setting(chat_id, "antiflood", settings)
+        return settings
+
+    def record(self, chat_id: int, user_id: int, now: Optional[float] = None) -> Optional[str]:
+        settings = self.chat_settings.get(chat_id, self.default_settings)
+        if not settings["enabled"]:
+            return None
+
+        if now is None:
+            now = time.monotonic()
+        self.messages_seen += 1
+
+        chat = self.chats.get(chat_id)
+        if chat is None:
+            self._evict_chats(now)
+            chat = self.chats[chat_id] = ChatFloodState()
+        else:
+            self.chats.move_to_end(chat_id)
+        chat.last_seen = now
+
+        users = chat.users
+        limit = settings["limit"]
+        window = settings["window"]
+
+        timestamps = users.get(user_id)
+        if timestamps is None:
+            self._evict_users(users, now, window)
+            timestamps = users[user_id] = deque(maxlen=limit)
+        else:
+            users.move_to_end(user_id)
+
+        timestamps.append(now)
+        if len(timestamps) == limit and now - timestamps[0] <= window:
+            timestamps.clear()
+            self.floods_detected += 1
+            return settings["action"]
+
+        return None
+
+    def _evict_users(self, users: "OrderedDict[int, deque]", now: float, window: float):
+        while users:
+            user_id, timestamps = next(iter(users.items()))
+            if len(users) < self.max_users_per_chat and timestamps and now - timestamps[-1] <= window:
+                break
+            users.popitem(last=False)
+
+    def _evict_chats(self, now: float):
+        while self.chats:
+            chat_id, chat = next(iter(self.chats.items()))
+            if len(self.chats) < self.max_chats and now - chat.last_seen <= self.idle_timeout:
+                break
+            self.chats.popitem(last=False)
+            self.evicted_chats += 1
+
+    def get_stats(self) -> Dict:
+        return {
+            "tracked_chats": len(self.chats),
+            "tracked_users": sum(len(chat.users) for chat in self.chats.values()),
+            "messages_seen": self.messages_seen,
+            "floods_detected": self.floods_detected,
+            "evicted_chats": self.evicted_chats,
+        }
+
+antiflood = AntiFloodEngine(
+    limit=config.ANTIFLOOD_LIMIT,
+    window=config.ANTIFLOOD_WINDOW,
+    action=config.ANTIFLOOD_ACTION,
+    enabled=config.ANTIFLOOD_ENABLED
+)
@@ -0,0 +1,41 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List
+from pyrogram import Client
+from utils.floodwait import FloodGate
+
+logger = logging.getLogger(__name__)
+
+BulkAction = Callable[..., Awaitable[None]]
+
+class BulkActionRunner:
+    def __init__(self, client: Client, chat_id: int, concurrency: int = 5):
+        self.client = client
+        self.chat_id = chat_id
+        self.concurrency = max(1, concurrency)
+        self.flood_gate = FloodGate()
+        self.succeeded: List[int] = []
+        self.failed: Dict[int, str] = {}
+
+    async def run(self, user_ids: List[int], action: BulkAction, *args) -> Dict:
+        started = time.monotonic()
+        pending = iter(user_ids)
+
+        async def worker():
+            for user_id in pending:
+                try:
+                    await self.flood_gate.call(action, self.client, self.chat_id, user_id, *args)
+                    self.succeeded.append(user_id)
+                except Exception as e:
+                    self.failed[user_id] = str(e)
+                    logger.error(f"Bulk {getattr(action, '__name__', action)} failed for user {user_id} in chat {self.chat_id}: {e}")
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(user_ids)) or 1)))
+
+        return {
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "flood_waits": self.flood_gate.flood_waits,
+            "elapsed": time.monotonic() - started,
+        }
@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from config import config
+from database import db
+from utils.downloader import download_song, get_cached_song, cache_hit_stats, YOUTUBE_ID_PATTERN
+from utils.media_workers import media_workers
+from utils.metrics import metrics
+from utils.resource_usage import cache_footprint
+from utils.system_monitor import system_sampler
+from utils.transcoder import transcoder, TranscodePriority
+
+logger = logging.getLogger(__name__)
+
+WARMED_TRACKS = metrics.counter("bot_cache_warmer_tracks_total", "Tracks the cache warmer tried to prefetch", ["result"])
+WARMED_BYTES = metrics.counter("bot_cache_warmer_bytes_total", "Bytes of audio the cache warmer added to the music cache")
+
+def rank_tracks(plays: Iterable[Dict], half_life: float, now: datetime) -> Dict[Optional[int], Dict[str, float]]:
+    scores: Dict[Optional[int], Dict[str, float]] = {None: {}}
+    for play in plays:
+        age = max(0.0, (now - play["timestamp"]).total_seconds())
+        weight = 0.5 ** (age / half_life)
+        for key in (None, play["chat_id"]):
+            chat_scores = scores.setdefault(key, {})
+            chat_scores[play["url"]] = chat_scores.get(play["url"], 0.0) + weight
+    return scores
+
+def top(scores: Dict[str, float], limit: int) -> List[str]:
+    return [url for url, _ in sorted(scores.items(), key=lambda x: x[1], reverse=True)[:limit]]
+
+class CacheWarmer:
+    def __init__(self, interval: float = 900.0, top_global: int = 20, top_per_chat: int = 5,
+                 half_life: float = 72 * 3600, lookback: float = 14 * 86400, max_cpu: float = 50.0,
+                 bytes_per_hour: int = 0, disk_budget: int = 0):
+        self.interval = interval
+        self.top_global = top_global
+        self.top_per_chat = top_per_chat
+        self.half_life = max(1.0, half_life)
+        self.lookback = lookback
+        self.max_cpu = max_cpu
+        self.bytes_per_hour = bytes_per_hour
+        self.disk_budget = disk_budget
+        self.task: Optional[asyncio.Task] = None
+        self.hour_started = time.monotonic()
+        self.hour_bytes = 0
+        self.warmed = 0
+        self.failed = 0
+        self.last_run: Optional[float] = None
+        self.last_skip: Optional[str] = None
+        self.baseline: Optional[Dict] = None
+
+    def start(self):
+        if self.interval > 0 and (self.task is None or self.task.done()):
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.sleep(self.interval)
+                await self.warm()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error warming the music cache: {e}")
+
+    def busy_reason(self) -> Optional[str]:
+        if system_sampler.average("cpu_percent", window=6) > self.max_cpu:
+            return "CPU busy"
+        if transcoder.queued() or transcoder.active >= transcoder.concurrency:
+            return "transcoder busy"
+        if media_workers.inflight > 0:
+            return "downloads running"
+        return None
+
+    def over_bandwidth_budget(self) -> bool:
+        if time.monotonic() - self.hour_started >= 3600:
+            self.hour_started = time.monotonic()
+            self.hour_bytes = 0
+        return bool(self.bytes_per_hour) and self.hour_bytes >= self.bytes_per_hour
+
+    async def candidates(self) -> List[str]:
+        now = datetime.utcnow()
+        plays = await db.get_recent_plays(now - timedelta(seconds=self.lookback))
+        scores = rank_tracks(plays, self.half_life, now)
+
+        ranked = top(scores.pop(None), self.top_global)
+        for chat_scores in scores.values():
+            ranked.extend(top(chat_scores, self.top_per_chat))
+
+        seen = set()
+        urls = []
+        for url in ranked:
+            if url in seen or not YOUTUBE_ID_PATTERN.search(url) or get_cached_song(url):
+                continue
+            seen.add(url)
+            urls.append(url)
+        return urls
+
+    async def warm(self) -> int:
+        reason = self.busy_reason()
+        if reason:
+            self.last_skip = reason
+            logger.debug(f"Skipping cache warming: {reason}")
+            return 0
+
+        if self.baseline is None:
+            self.baseline = cache_hit_stats()
+
+        loop = asyncio.get_running_loop()
+        urls = await self.candidates()
+        self.last_run = time.time()
+        self.last_skip = None
+        fetched = 0
+        fetched_bytes = 0
+
+        for url in urls:
+            if self.over_bandwidth_budget():
+                self.last_skip = "hourly bandwidth budget used up"
+                break
+            if self.disk_budget and await loop.run_in_executor(None, cache_footprint) >= self.disk_budget:
+                self.last_skip = "disk budget used up"
+                break
+            reason = self.busy_reason()
+            if reason:
+                self.last_skip = reason
+                break
+
+            path = await download_song(url, TranscodePriority.PREFETCH)
+            if not path:
+                self.failed += 1
+                WARMED_TRACKS.labels("failed").inc()
+                continue
+
+            size = os.path.getsize(path)
+            self.hour_bytes += size
+            fetched_bytes += size
+            fetched += 1
+            self.warmed += 1
+            WARMED_TRACKS.labels("fetched").inc()
+            WARMED_BYTES.inc(size)
+
+        if urls:
+            hits = cache_hit_stats()
+            logger.info(
+                f"Cache warming fetched {fetched} of {len(urls)} popular tracks "
+                f"({fetched_bytes / 1024**2:.1f} MB{', stopped: ' + self.last_skip if self.last_skip else ''}); "
+                f"hit rate {hits['hit_ratio']:.0%}, {hits['unwarmed_hit_ratio']:.0%} without prefetched tracks, "
+                f"{self.baseline['hit_ratio']:.0%} before warming"
+            )
+        return fetched
+
+    def get_stats(self) -> Dict:
+        hits = cache_hit_stats()
+        return {
+            "enabled": self.interval > 0,
+            "warmed": self.warmed,
+            "failed": self.failed,
+            "hour_bytes": self.hour_bytes,
+            "last_run": self.last_run,
+            "last_skip": self.last_skip,
+            "hit_ratio": hits["hit_ratio"],
+            "unwarmed_hit_ratio": hits["unwarmed_hit_ratio"],
+            "baseline_hit_ratio": self.baseline["hit_ratio"] if self.baseline else None,
+        }
+
+cache_warmer = CacheWarmer(
+    interval=config.CACHE_WARM_INTERVAL,
+    top_global=config.CACHE_WARM_TOP,
+    top_per_chat=config.CACHE_WARM_TOP_PER_CHAT,
+    half_life=config.CACHE_WARM_HALF_LIFE_HOURS * 3600,
+    lookback=config.CACHE_WARM_LOOKBACK_DAYS * 86400,
+    max_cpu=config.CACHE_WARM_MAX_CPU,
+    bytes_per_hour=int(config.CACHE_WARM_MB_PER_HOUR * 1024 * 1024),
+    disk_budget=int(config.CACHE_WARM_DISK_MB * 1024 * 1024)
+)
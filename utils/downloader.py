@@ -1,54 +1,125 @@
+import asyncio
 import os
 import logging
-import yt_dlp
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
-from youtubesearchpython import VideosSearch
+import uuid
+from typing import Dict, Optional
 from config import config
+from utils.metrics import metrics, timed, STAGE_SECONDS, STAGE_FAILURES
+from utils.tracing import record_span
+from utils.resource_usage import resource_usage
+from utils.media_workers import media_workers
+from utils.transcoder import transcoder, TranscodePriority, MP3_ARGS
+from utils.metadata import metadata_cache, format_duration, YOUTUBE_ID_PATTERN
 import re
+import time
 
 logger = logging.getLogger(__name__)
 
-os.makedirs(config.MUSIC_CACHE_DIR, exist_ok=True)
-
 spotify_client = None
-if config.SPOTIFY_CLIENT_ID and config.SPOTIFY_CLIENT_SECRET:
-    try:
-        spotify_client = spotipy.Spotify(
-            auth_manager=SpotifyClientCredentials(
-                client_id=config.SPOTIFY_CLIENT_ID,
-                client_secret=config.SPOTIFY_CLIENT_SECRET
+
+def get_spotify_client():
+    global spotify_client
+    if spotify_client is None and config.SPOTIFY_CLIENT_ID and config.SPOTIFY_CLIENT_SECRET:
+        try:
+            import spotipy
+            from spotipy.oauth2 import SpotifyClientCredentials
+
+            spotify_client = spotipy.Spotify(
+                auth_manager=SpotifyClientCredentials(
+                    client_id=config.SPOTIFY_CLIENT_ID,
+                    client_secret=config.SPOTIFY_CLIENT_SECRET
+                )
             )
-        )
-    except Exception as e:
-        logger.error(f"Failed to initialize Spotify client: {e}")
+        except Exception as e:
+            logger.error(f"Failed to initialize Spotify client: {e}")
+    return spotify_client
 
-async def search_song(query: str):
-    try:
-        if "spotify.com" in query:
-            return await search_spotify(query)
+DOWNLOAD_SECONDS = STAGE_SECONDS.labels("download")
+DOWNLOAD_FAILURES = STAGE_FAILURES.labels("download")
+AUDIO_CACHE_LOOKUPS = metrics.counter(
+    "bot_audio_cache_lookups_total",
+    "Audio cache lookups before downloading",
+    ["result"]
+)
+AUDIO_CACHE_HITS = AUDIO_CACHE_LOOKUPS.labels("hit")
+AUDIO_CACHE_MISSES = AUDIO_CACHE_LOOKUPS.labels("miss")
+PREFETCHED_HITS = metrics.counter(
+    "bot_audio_cache_prefetched_hits_total",
+    "Cache hits served by a track the cache warmer downloaded"
+)
+metrics.gauge(
+    "bot_audio_cache_hit_ratio",
+    "Share of downloads served from the audio cache"
+).set_function(
+    lambda: cache_hit_stats()["hit_ratio"]
+)
+metrics.gauge(
+    "bot_audio_cache_hit_ratio_unwarmed",
+    "Share of downloads the audio cache would have served without prefetched tracks"
+).set_function(
+    lambda: cache_hit_stats()["unwarmed_hit_ratio"]
+)
+
+prefetched_files = set()
+download_locks: Dict[str, asyncio.Lock] = {}
+download_users: Dict[str, int] = {}
 
-        elif "youtube.com" in query or "youtu.be" in query:
+def cache_hit_stats():
+    lookups = max(1, AUDIO_CACHE_HITS.value + AUDIO_CACHE_MISSES.value)
+    return {
+        "lookups": AUDIO_CACHE_HITS.value + AUDIO_CACHE_MISSES.value,
+        "prefetched_hits": PREFETCHED_HITS.value,
+        "hit_ratio": AUDIO_CACHE_HITS.value / lookups,
+        "unwarmed_hit_ratio": (AUDIO_CACHE_HITS.value - PREFETCHED_HITS.value) / lookups,
+    }
+
+@timed("search")
+async def search_song(query: str):
+    if "spotify.com" not in query and ("youtube.com" in query or "youtu.be" in query):
+        if get_cached_song(query):
+            metadata = metadata_cache.peek(query)
+        else:
+            metadata = await metadata_cache.probe(query)
+        if not metadata:
             return {
                 "title": "YouTube Video",
                 "url": query,
                 "platform": "YouTube",
                 "duration": "Unknown"
             }
+        return {
+            "title": metadata['title'],
+            "url": query,
+            "platform": "YouTube",
+            "duration": format_duration(metadata['duration']),
+            "thumbnail": metadata['thumbnail']
+        }
 
-        else:
-            videos_search = VideosSearch(query, limit=1)
-            result = videos_search.result()
+    try:
+        return await media_workers.run(search_song_sync, query)
+    except Exception as e:
+        logger.error(f"Error searching song: {e}")
+        return None
 
-            if result and result['result']:
-                video = result['result'][0]
-                return {
-                    "title": video['title'],
-                    "url": video['link'],
-                    "platform": "YouTube",
-                    "duration": video.get('duration', 'Unknown'),
-                    "thumbnail": video.get('thumbnails', [{}])[0].get('url', '')
-                }
+def search_song_sync(query: str):
+    try:
+        if "spotify.com" in query:
+            return search_spotify(query)
+
+        from youtubesearchpython import VideosSearch
+
+        videos_search = VideosSearch(query, limit=1)
+        result = videos_search.result()
+
+        if result and result['result']:
+            video = result['result'][0]
+            return {
+                "title": video['title'],
+                "url": video['link'],
+                "platform": "YouTube",
+                "duration": video.get('duration', 'Unknown'),
+                "thumbnail": video.get('thumbnails', [{}])[0].get('url', '')
+            }
 
         return None
 
@@ -56,15 +127,18 @@ async def search_song(query: str):
         logger.error(f"Error searching song: {e}")
         return None
 
-async def search_spotify(spotify_url: str):
+def search_spotify(spotify_url: str):
     try:
-        if not spotify_client:
+        client = get_spotify_client()
+        if not client:
             logger.error("Spotify client not initialized")
             return None
 
         track_id = re.search(r'track/([a-zA-Z0-9]+)', spotify_url)
         if track_id:
-            track = spotify_client.track(track_id.group(1))
+            from youtubesearchpython import VideosSearch
+
+            track = client.track(track_id.group(1))
             query = f"{track['name']} {track['artists'][0]['name']}"
 
             videos_search = VideosSearch(query, limit=1)
@@ -85,39 +159,167 @@ async def search_spotify(spotify_url: str):
         logger.error(f"Error searching Spotify: {e}")
         return None
 
-async def download_song(url: str):
-    try:
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'outtmpl': f'{config.MUSIC_CACHE_DIR}/%(id)s.%(ext)s',
-            'quiet': True,
-            'no_warnings': True,
-            'extract_flat': False,
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
-        }
+CACHED_AUDIO_EXTENSIONS = ['mp3', 'm4a', 'webm', 'opus']
 
-        if config.YOUTUBE_COOKIES_PATH and os.path.exists(config.YOUTUBE_COOKIES_PATH):
-            ydl_opts['cookiefile'] = config.YOUTUBE_COOKIES_PATH
+def get_cached_song(url: str):
+    video_id = YOUTUBE_ID_PATTERN.search(url)
+    if not video_id:
+        return None
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            video_id = info['id']
-            audio_file = f"{config.MUSIC_CACHE_DIR}/{video_id}.mp3"
+    for ext in CACHED_AUDIO_EXTENSIONS:
+        cached_file = f"{config.MUSIC_CACHE_DIR}/{video_id.group(1)}.{ext}"
+        if os.path.exists(cached_file):
+            return cached_file
 
-            if os.path.exists(audio_file):
-                return audio_file
+    return None
 
-            for ext in ['m4a', 'webm', 'opus']:
-                alt_file = f"{config.MUSIC_CACHE_DIR}/{video_id}.{ext}"
-                if os.path.exists(alt_file):
-                    return alt_file
+def duration_to_seconds(duration):
+    if isinstance(duration, (int, float)):
+        return int(duration)
 
+    try:
+        seconds = 0
+        for part in str(duration).split(':'):
+            seconds = seconds * 60 + int(part)
+        return seconds
+    except ValueError:
         return None
 
+def length_limit_message(song_info) -> Optional[str]:
+    seconds = duration_to_seconds(song_info.get('duration'))
+    if not config.MAX_TRACK_DURATION or seconds is None or seconds <= config.MAX_TRACK_DURATION:
+        return None
+    return (
+        f"{song_info['title']} is {format_duration(seconds)} long, "
+        f"tracks longer than {format_duration(config.MAX_TRACK_DURATION)} can't be played."
+    )
+
+async def download_song(url: str, priority: TranscodePriority = TranscodePriority.INTERACTIVE):
+    video_id = YOUTUBE_ID_PATTERN.search(url)
+    if not video_id:
+        return await _download_song(url, priority)
+
+    video_id = video_id.group(1)
+    lock = download_locks.setdefault(video_id, asyncio.Lock())
+    download_users[video_id] = download_users.get(video_id, 0) + 1
+    try:
+        async with lock:
+            return await _download_song(url, priority)
+    finally:
+        download_users[video_id] -= 1
+        if not download_users[video_id]:
+            del download_users[video_id]
+            del download_locks[video_id]
+
+async def _download_song(url: str, priority: TranscodePriority):
+    try:
+        started = time.perf_counter()
+        prefetch = priority == TranscodePriority.PREFETCH
+        cached_file = get_cached_song(url)
+        if cached_file:
+            if not prefetch:
+                AUDIO_CACHE_HITS.inc()
+                if cached_file in prefetched_files:
+                    PREFETCHED_HITS.inc()
+            record_span("cache_hit", time.perf_counter() - started)
+            return cached_file
+
+        if not prefetch:
+            AUDIO_CACHE_MISSES.inc()
+        result = await media_workers.run(download_song_sync, url, metadata_cache.take_info(url))
+
+        for stage, duration, error in result['spans']:
+            record_span(stage, duration, error=error)
+        for name, amount in result['usage'].items():
+            resource_usage.record(name, amount)
+
+        if not result['path']:
+            DOWNLOAD_FAILURES.inc()
+            if result['error']:
+                logger.error(f"Error downloading song: {result['error']}")
+            return None
+
+        DOWNLOAD_SECONDS.observe(time.perf_counter() - started)
+        audio_file = await convert_to_mp3(result['path'], priority)
+        resource_usage.record("cache_bytes", os.path.getsize(audio_file))
+        if prefetch:
+            prefetched_files.add(audio_file)
+        return audio_file
+
     except Exception as e:
+        DOWNLOAD_FAILURES.inc()
         logger.error(f"Error downloading song: {e}")
         return None
+
+async def convert_to_mp3(source: str, priority: TranscodePriority) -> str:
+    base, ext = os.path.splitext(source)
+    if ext == ".mp3":
+        return source
+
+    partial = f"{base}.{uuid.uuid4().hex[:8]}.part"
+    try:
+        await transcoder.transcode(source, partial, MP3_ARGS, priority)
+        os.replace(partial, f"{base}.mp3")
+        os.remove(source)
+        return f"{base}.mp3"
+    except Exception as e:
+        logger.warning(f"Keeping {os.path.basename(source)} unconverted: {e}")
+        if os.path.exists(partial):
+            os.remove(partial)
+        return source
+
+def download_song_sync(url: str, info: Optional[Dict] = None):
+    started = time.perf_counter()
+    result = {"path": None, "error": None, "spans": [], "usage": {}}
+    download_started = None
+
+    def add_usage(name: str, amount: float):
+        result['usage'][name] = result['usage'].get(name, 0) + amount
+
+    def progress_hook(status):
+        nonlocal download_started
+        if download_started is None:
+            download_started = time.perf_counter()
+            result['spans'].append(("extract", download_started - started, False))
+        if status.get('status') in ('finished', 'error'):
+            result['spans'].append(("download", time.perf_counter() - download_started, status['status'] == 'error'))
+            add_usage("download_bytes", status.get('downloaded_bytes') or status.get('total_bytes') or 0)
+
+    ydl_opts = {
+        'format': 'bestaudio/best',
+        'outtmpl': f'{config.MUSIC_CACHE_DIR}/%(id)s.%(ext)s',
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': False,
+        'progress_hooks': [progress_hook],
+    }
+
+    if config.YOUTUBE_COOKIES_PATH and os.path.exists(config.YOUTUBE_COOKIES_PATH):
+        ydl_opts['cookiefile'] = config.YOUTUBE_COOKIES_PATH
+
+    try:
+        import yt_dlp
+
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            if info:
+                try:
+                    info = ydl.process_ie_result(info, download=True)
+                except Exception as e:
+                    logger.debug(f"Probed info for {url} could not be reused, extracting again: {e}")
+                    info = None
+            if not info:
+                info = ydl.extract_info(url, download=True)
+            downloads = info.get('requested_downloads') or [{}]
+            result['path'] = downloads[0].get('filepath')
+
+            if not result['path']:
+                for ext in CACHED_AUDIO_EXTENSIONS:
+                    audio_file = f"{config.MUSIC_CACHE_DIR}/{info['id']}.{ext}"
+                    if os.path.exists(audio_file):
+                        result['path'] = audio_file
+                        break
+
+    except Exception as e:
+        result['error'] = str(e)
+
+    return result
@@ -0,0 +1,32 @@
+import re
+from datetime import timedelta
+from typing import Optional
+
+DURATION_PATTERN = re.compile(r'^(\d+)\s*([smhdw])$', re.IGNORECASE)
+DURATION_UNITS = {
+    's': 1,
+    'm': 60,
+    'h': 3600,
+    'd': 86400,
+    'w': 604800,
+}
+
+def parse_duration(text: str) -> Optional[timedelta]:
+    match = DURATION_PATTERN.match(text.strip())
+    if not match:
+        return None
+
+    seconds = int(match.group(1)) * DURATION_UNITS[match.group(2).lower()]
+    if seconds <= 0:
+        return None
+
+    return timedelta(seconds=seconds)
+
+def format_duration(delta: timedelta) -> str:
+    seconds = int(delta.total_seconds())
+    parts = []
+    for unit, size in (('d', 86400), ('h', 3600), ('m', 60), ('s', 1)):
+        value, seconds = divmod(seconds, size)
+        if value:
+            parts.append(f"{value}{unit}")
+    return " ".join(parts) or "0s"
@@ -0,0 +1,38 @@
+import asyncio
+import logging
+import time
+from pyrogram.errors import FloodWait
+
+logger = logging.getLogger(__name__)
+
+class FloodGate:
+    def __init__(self, max_retries: int = 3, max_wait: float = 300.0):
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self.resume_at = 0.0
+        self.flood_waits = 0
+
+    async def wait(self):
+        delay = self.resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def call(self, func, *args, **kwargs):
+        attempt = 0
+        while True:
+            await self.wait()
+            try:
+                return await func(*args, **kwargs)
+            except FloodWait as e:
+                attempt += 1
+                self.flood_waits += 1
+                delay = float(e.value) + attempt
+
+                if attempt > self.max_retries or delay > self.max_wait:
+                    raise
+
+                logger.warning(f"FloodWait of {e.value}s on {getattr(func, '__name__', func)}, retrying in {delay}s")
+                self.resume_at = max(self.resume_at, time.monotonic() + delay)
+
+async def call_with_floodwait(func, *args, max_retries: int = 3, **kwargs):
+    return await FloodGate(max_retries=max_retries).call(func, *args, **kwargs)
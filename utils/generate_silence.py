@@ -1,16 +1,20 @@
+import asyncio
 import os
-from pydub import AudioSegment
-from pydub.generators import Sine
 from config import config
+from utils.transcoder import transcoder, TranscodePriority, MP3_ARGS
 
-def generate_silence_file():
+async def generate_silence_file():
     try:
         os.makedirs(config.VOICE_CACHE_DIR, exist_ok=True)
 
-        silence = AudioSegment.silent(duration=60000)
-
         output_path = os.path.join(config.VOICE_CACHE_DIR, "silence.mp3")
-        silence.export(output_path, format="mp3")
+        if os.path.exists(output_path):
+            return output_path
+
+        await transcoder.run(
+            ["-f", "lavfi", "-i", "anullsrc=r=48000:cl=stereo", "-t", "60", *MP3_ARGS, output_path],
+            TranscodePriority.PREFETCH
+        )
 
         print(f"Silence file created at: {output_path}")
         return output_path
@@ -20,4 +24,4 @@ def generate_silence_file():
         return None
 
 if __name__ == "__main__":
-    generate_silence_file()
+    asyncio.run(generate_silence_file())
@@ -0,0 +1,56 @@
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Deque, List, Tuple
+from config import config
+
+logger = logging.getLogger(__name__)
+
+class JoinTracker:
+    def __init__(self, retention: float = 3600.0, max_per_chat: int = 5000, max_chats: int = 5000):
+        self.retention = retention
+        self.max_per_chat = max_per_chat
+        self.max_chats = max_chats
+        self.joins: "OrderedDict[int, Deque[Tuple[float, int]]]" = OrderedDict()
+
+    def record(self, chat_id: int, user_ids: List[int], now: float = None):
+        if now is None:
+            now = time.time()
+
+        joins = self.joins.get(chat_id)
+        if joins is None:
+            joins = self.joins[chat_id] = deque(maxlen=self.max_per_chat)
+            if len(self.joins) > self.max_chats:
+                self.joins.popitem(last=False)
+        else:
+            self.joins.move_to_end(chat_id)
+
+        self._expire(joins, now)
+        for user_id in user_ids:
+            joins.append((now, user_id))
+
+    def recent(self, chat_id: int, seconds: float, now: float = None) -> List[int]:
+        if now is None:
+            now = time.time()
+
+        joins = self.joins.get(chat_id)
+        if not joins:
+            return []
+
+        self._expire(joins, now)
+        cutoff = now - seconds
+        seen = set()
+        user_ids = []
+        for joined_at, user_id in reversed(joins):
+            if joined_at < cutoff:
+                break
+            if user_id not in seen:
+                seen.add(user_id)
+                user_ids.append(user_id)
+        return user_ids
+
+    def _expire(self, joins: Deque[Tuple[float, int]], now: float):
+        while joins and now - joins[0][0] > self.retention:
+            joins.popleft()
+
+join_tracker = JoinTracker(retention=config.JOIN_TRACKER_RETENTION)
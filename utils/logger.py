@@ -1,12 +1,123 @@
 from pyrogram import Client
 from datetime import datetime
+from collections import deque
+from typing import Deque, Optional, Tuple
 from config import config
+from utils.outbound import outbound
+from utils.metrics import metrics
+import asyncio
 import logging
 import platform
 import psutil
 
 logger = logging.getLogger(__name__)
 
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+class LogSink:
+    def __init__(self, flush_interval: float = 60.0, max_events: int = 20,
+                 max_buffer: int = 500, immediate_level: int = logging.WARNING):
+        self.flush_interval = flush_interval
+        self.max_events = max(1, max_events)
+        self.immediate_level = immediate_level
+        self.buffer: Deque[Tuple[datetime, str]] = deque(maxlen=max_buffer)
+        self.wakeup = asyncio.Event()
+        self.flush_task: Optional[asyncio.Task] = None
+        self.dropped = 0
+        self.reported_dropped = 0
+        self.digests_sent = 0
+
+    def start(self):
+        if self.flush_task is None or self.flush_task.done():
+            self.flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self.flush_task:
+            self.flush_task.cancel()
+            try:
+                await self.flush_task
+            except asyncio.CancelledError:
+                pass
+            self.flush_task = None
+
+        await self.flush()
+
+    async def submit(self, message: str, level: int = logging.INFO):
+        if level >= self.immediate_level:
+            await outbound.send_message(config.LOGGER_GROUP_ID, message)
+            return
+
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+
+        self.buffer.append((datetime.now(), self._compact(message)))
+        if len(self.buffer) >= self.max_events:
+            self.wakeup.set()
+
+    def _compact(self, message: str) -> str:
+        lines = [line.strip() for line in message.strip().splitlines() if line.strip()]
+        if not lines:
+            return ""
+        if len(lines) == 1:
+            return lines[0]
+        return f"{lines[0]} - " + " | ".join(lines[1:])
+
+    def _render(self, events) -> list:
+        header = f"**Activity Digest** ({len(events)} events)"
+        dropped = self.dropped - self.reported_dropped
+        if dropped:
+            header += f"\n{dropped} older events were dropped"
+            self.reported_dropped = self.dropped
+
+        pages = []
+        page = header
+        for timestamp, text in events:
+            line = f"\n`{timestamp.strftime('%H:%M:%S')}` {text}"[:TELEGRAM_MESSAGE_LIMIT - 100]
+            if len(page) + len(line) > TELEGRAM_MESSAGE_LIMIT:
+                pages.append(page)
+                page = "**Activity Digest** (continued)"
+            page += line
+        pages.append(page)
+        return pages
+
+    async def flush(self):
+        if not self.buffer:
+            return
+
+        events = list(self.buffer)
+        self.buffer.clear()
+
+        for page in self._render(events):
+            try:
+                await outbound.send_message(config.LOGGER_GROUP_ID, page)
+            except Exception as e:
+                logger.error(f"Failed to send log digest to group: {e}")
+        self.digests_sent += 1
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeup.clear()
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in log digest loop: {e}")
+
+log_sink = LogSink(
+    flush_interval=config.LOG_DIGEST_INTERVAL,
+    max_events=config.LOG_DIGEST_MAX_EVENTS,
+    max_buffer=config.LOG_BUFFER_MAX
+)
+
+metrics.gauge("bot_log_buffer_size", "Logger group events waiting for the next digest").set_function(
+    lambda: len(log_sink.buffer)
+)
+
 async def send_startup_log(bot: Client, bot_info, assistant_info, start_time):
     try:
         if not config.LOGGER_GROUP_ID or config.LOGGER_GROUP_ID == 0:
@@ -38,7 +149,7 @@ RAM: {round(psutil.virtual_memory().total / (1024**3), 2)} GB
 Bot is now running and ready to serve!
 """
 
-        await bot.send_message(
+        await outbound.send_message(
             config.LOGGER_GROUP_ID,
             system_info
         )
@@ -48,14 +159,11 @@ Bot is now running and ready to serve!
         logger.error(f"Failed to send startup log: {e}")
         logger.error(f"Make sure LOGGER_GROUP_ID ({config.LOGGER_GROUP_ID}) is correct and bot is added to the group as admin")
 
-async def log_to_group(bot: Client, message: str):
+async def log_to_group(bot: Client, message: str, level: int = logging.INFO):
     try:
         if not config.LOGGER_GROUP_ID or config.LOGGER_GROUP_ID == 0:
             return
 
-        await bot.send_message(
-            config.LOGGER_GROUP_ID,
-            message
-        )
+        await log_sink.submit(message, level)
     except Exception as e:
         logger.error(f"Failed to send log to group: {e}")
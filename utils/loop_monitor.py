@@ -0,0 +1,165 @@
+import asyncio
+import functools
+import logging
+import os
+import time
+from asyncio import events
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+from config import config
+from utils.metrics import metrics
+from utils.logger import log_to_group
+from utils.profiler import await_chain, plain
+
+logger = logging.getLogger(__name__)
+
+ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+DRIFT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LOOP_DRIFT = metrics.histogram(
+    "bot_event_loop_drift_seconds",
+    "How late the event loop heartbeat fired",
+    buckets=DRIFT_BUCKETS
+)
+SLOW_CALLBACK_SECONDS = metrics.histogram(
+    "bot_slow_callback_seconds",
+    "Duration of event loop callbacks above the slow callback threshold",
+    buckets=DRIFT_BUCKETS
+)
+
+def describe_callback(handle: events.Handle) -> str:
+    callback = handle._callback
+    while isinstance(callback, functools.partial):
+        callback = callback.func
+
+    owner = getattr(callback, "__self__", None)
+    if isinstance(owner, asyncio.Task):
+        coro, frame = owner.get_coro(), None
+        while getattr(coro, "cr_frame", None) is not None:
+            if not coro.cr_frame.f_code.co_filename.startswith(ASYNCIO_DIR):
+                frame = coro.cr_frame
+            coro = coro.cr_await
+        location = f" at {os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno}" if frame else ""
+        return f"{await_chain(owner)}{location}"
+
+    return getattr(callback, "__qualname__", None) or repr(callback)
+
+class LoopMonitor:
+    def __init__(self, interval: float = 0.25, slow_callback: float = 0.1, report_threshold: float = 0.5,
+                 report_interval: float = 300.0, history: int = 100, max_names: int = 200):
+        self.interval = interval
+        self.slow_callback = slow_callback
+        self.report_threshold = report_threshold
+        self.report_interval = report_interval
+        self.max_names = max_names
+        self.recent: Deque[Tuple[float, str, float]] = deque(maxlen=history)
+        self.worst: Dict[str, float] = {}
+        self.pending: Dict[str, Tuple[int, float]] = {}
+        self.pending_drift = 0.0
+        self.slow_callbacks = 0
+        self.max_drift = 0.0
+        self.last_report = 0.0
+        self.task: Optional[asyncio.Task] = None
+        self.original_run = None
+
+    def start(self):
+        if self.original_run is None:
+            self.original_run = events.Handle._run
+            original_run = self.original_run
+            threshold = self.slow_callback
+            record = self._record_slow_callback
+
+            def _run(handle):
+                started = time.perf_counter()
+                try:
+                    original_run(handle)
+                finally:
+                    elapsed = time.perf_counter() - started
+                    if elapsed >= threshold:
+                        record(handle, elapsed)
+
+            events.Handle._run = _run
+
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self):
+        if self.original_run is not None:
+            events.Handle._run = self.original_run
+            self.original_run = None
+
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def _record_slow_callback(self, handle: events.Handle, elapsed: float):
+        try:
+            name = plain(describe_callback(handle))
+        except Exception:
+            name = plain(repr(handle))
+
+        self.slow_callbacks += 1
+        SLOW_CALLBACK_SECONDS.observe(elapsed)
+        self.recent.append((time.time(), name, elapsed))
+        if name in self.worst or len(self.worst) < self.max_names:
+            self.worst[name] = max(elapsed, self.worst.get(name, 0.0))
+        if elapsed >= self.report_threshold and (name in self.pending or len(self.pending) < self.max_names):
+            count, longest = self.pending.get(name, (0, 0.0))
+            self.pending[name] = (count + 1, max(longest, elapsed))
+        logger.warning(f"Event loop blocked for {elapsed * 1000:.0f}ms by {name}")
+
+    async def _heartbeat_loop(self):
+        while True:
+            try:
+                expected = time.perf_counter() + self.interval
+                await asyncio.sleep(self.interval)
+                drift = max(0.0, time.perf_counter() - expected)
+                LOOP_DRIFT.observe(drift)
+                self.max_drift = max(self.max_drift, drift)
+                if drift >= self.report_threshold:
+                    self.pending_drift = max(self.pending_drift, drift)
+
+                if self._should_report():
+                    await self._report()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in event loop monitor: {e}")
+
+    def _should_report(self) -> bool:
+        return bool(self.pending_drift or self.pending) and time.monotonic() - self.last_report >= self.report_interval
+
+    async def _report(self):
+        pending, self.pending = self.pending, {}
+        drift, self.pending_drift = self.pending_drift, 0.0
+        self.last_report = time.monotonic()
+
+        text = f"**Event Loop Blocked**\nWorst heartbeat delay: {drift * 1000:.0f}ms"
+        if pending:
+            text += "\n\n**Slow callbacks:**"
+            for name, (count, longest) in sorted(pending.items(), key=lambda x: x[1][1], reverse=True)[:5]:
+                text += f"\n{longest * 1000:.0f}ms (x{count}) {name}"
+            if len(pending) > 5:
+                text += f"\n...and {len(pending) - 5} more"
+
+        await log_to_group(None, text, logging.WARNING)
+
+    def get_stats(self) -> Dict:
+        worst = max(self.worst.items(), key=lambda x: x[1], default=(None, 0.0))
+        return {
+            "slow_callbacks": self.slow_callbacks,
+            "max_drift": self.max_drift,
+            "worst_callback": worst[0],
+            "worst_callback_seconds": worst[1],
+        }
+
+loop_monitor = LoopMonitor(
+    interval=config.LOOP_MONITOR_INTERVAL,
+    slow_callback=config.LOOP_SLOW_CALLBACK,
+    report_threshold=config.LOOP_LAG_REPORT_THRESHOLD,
+    report_interval=config.LOOP_LAG_REPORT_INTERVAL
+)
@@ -0,0 +1,97 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+from config import config
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+JOB_SECONDS = metrics.histogram("bot_media_job_seconds", "Time media jobs take including the worker round trip", ["job"])
+JOB_FAILURES = metrics.counter("bot_media_job_failures_total", "Media jobs lost to a crashed worker", ["job"])
+WORKER_RESTARTS = metrics.counter("bot_media_worker_restarts_total", "Times the media worker pool was rebuilt after a crash")
+
+def _init_worker():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _warm_up():
+    import yt_dlp
+    import youtubesearchpython
+    return True
+
+class MediaWorkerPool:
+    def __init__(self, workers: int = 0):
+        self.workers = max(0, workers)
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.inflight = 0
+        self.restarts = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+        return self.executor
+
+    def _restart(self, executor: ProcessPoolExecutor):
+        if self.executor is not executor:
+            return
+        self.executor = None
+        self.restarts += 1
+        WORKER_RESTARTS.inc()
+        executor.shutdown(wait=False, cancel_futures=True)
+        logger.error(f"A media worker crashed, restarting the pool ({self.restarts} restarts so far)")
+
+    async def start(self):
+        if not self.workers:
+            return
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            await asyncio.gather(*(loop.run_in_executor(executor, _warm_up) for _ in range(self.workers)))
+            logger.info(f"Started {self.workers} media worker processes")
+        except Exception as e:
+            logger.error(f"Failed to warm up media workers: {e}")
+
+    async def stop(self):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def run(self, func: Callable, *args):
+        loop = asyncio.get_running_loop()
+        name = func.__name__
+        started = time.perf_counter()
+        self.inflight += 1
+
+        try:
+            if not self.workers:
+                return await loop.run_in_executor(None, functools.partial(func, *args))
+
+            for attempt in range(2):
+                executor = self._get_executor()
+                try:
+                    return await loop.run_in_executor(executor, func, *args)
+                except BrokenProcessPool:
+                    self._restart(executor)
+                    if attempt:
+                        JOB_FAILURES.labels(name).inc()
+                        raise
+                    logger.warning(f"Retrying media job {name} after a worker crash")
+        finally:
+            self.inflight -= 1
+            JOB_SECONDS.labels(name).observe(time.perf_counter() - started)
+
+media_workers = MediaWorkerPool(workers=config.MEDIA_WORKERS)
+
+metrics.gauge("bot_media_jobs_inflight", "Media jobs submitted and not yet finished").set_function(
+    lambda: media_workers.inflight
+)
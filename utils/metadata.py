@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+from config import config
+from utils.metrics import metrics, timed
+from utils.media_workers import media_workers
+
+logger = logging.getLogger(__name__)
+
+YOUTUBE_ID_PATTERN = re.compile(r'(?:v=|youtu\.be/|shorts/|embed/)([A-Za-z0-9_-]{11})')
+
+METADATA_LOOKUPS = metrics.counter("bot_metadata_lookups_total", "Track metadata lookups", ["result"])
+METADATA_HITS = METADATA_LOOKUPS.labels("hit")
+METADATA_MISSES = METADATA_LOOKUPS.labels("miss")
+
+def format_duration(seconds: Optional[int]) -> str:
+    if seconds is None:
+        return "Unknown"
+    hours, remainder = divmod(int(seconds), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+def audio_url_expiry(audio_url: Optional[str]) -> Optional[float]:
+    if not audio_url:
+        return None
+    expire = parse_qs(urlparse(audio_url).query).get("expire")
+    if expire and expire[0].isdigit():
+        return float(expire[0])
+    return None
+
+def probe_sync(url: str) -> Optional[Dict]:
+    ydl_opts = {
+        'format': 'bestaudio/best',
+        'quiet': True,
+        'no_warnings': True,
+    }
+
+    if config.YOUTUBE_COOKIES_PATH and os.path.exists(config.YOUTUBE_COOKIES_PATH):
+        ydl_opts['cookiefile'] = config.YOUTUBE_COOKIES_PATH
+
+    try:
+        import yt_dlp
+
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.sanitize_info(ydl.extract_info(url, download=False))
+
+        duration = info.get('duration')
+        return {
+            "id": info['id'],
+            "title": info.get('title') or "YouTube Video",
+            "duration": int(duration) if duration else None,
+            "thumbnail": info.get('thumbnail', ''),
+            "audio_url": info.get('url'),
+            "audio_url_expires": audio_url_expiry(info.get('url')),
+            "info": info,
+        }
+
+    except Exception as e:
+        logger.error(f"Error probing {url}: {e}")
+        return None
+
+class MetadataCache:
+    def __init__(self, ttl: float = 21600.0, max_entries: int = 5000, info_ttl: float = 600.0, max_infos: int = 32):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.info_ttl = info_ttl
+        self.max_infos = max_infos
+        self.entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self.infos: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self.locks: Dict[str, asyncio.Lock] = {}
+        self.lock_users: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @timed("probe")
+    async def probe(self, url: str) -> Optional[Dict]:
+        video_id = YOUTUBE_ID_PATTERN.search(url)
+        if not video_id:
+            return None
+        video_id = video_id.group(1)
+
+        metadata = self._cached(video_id)
+        if metadata is not None:
+            self.hits += 1
+            METADATA_HITS.inc()
+            return metadata
+
+        lock = self.locks.setdefault(video_id, asyncio.Lock())
+        self.lock_users[video_id] = self.lock_users.get(video_id, 0) + 1
+        try:
+            async with lock:
+                metadata = self._cached(video_id)
+                if metadata is not None:
+                    self.hits += 1
+                    METADATA_HITS.inc()
+                    return metadata
+
+                self.misses += 1
+                METADATA_MISSES.inc()
+                metadata = await media_workers.run(probe_sync, url)
+                if metadata:
+                    expires = time.time() + self.ttl
+                    if metadata["audio_url_expires"]:
+                        expires = min(expires, metadata["audio_url_expires"])
+                    metadata["expires"] = expires
+                    self.entries[video_id] = metadata
+                    self.entries.move_to_end(video_id)
+                    self.infos[video_id] = (min(expires, time.time() + self.info_ttl), metadata.pop("info"))
+                    self.infos.move_to_end(video_id)
+                    self._evict()
+                return metadata
+        finally:
+            self.lock_users[video_id] -= 1
+            if not self.lock_users[video_id]:
+                del self.lock_users[video_id]
+                del self.locks[video_id]
+
+    def peek(self, url: str) -> Optional[Dict]:
+        video_id = YOUTUBE_ID_PATTERN.search(url)
+        return self._cached(video_id.group(1)) if video_id else None
+
+    def take_info(self, url: str) -> Optional[Dict]:
+        video_id = YOUTUBE_ID_PATTERN.search(url)
+        if not video_id or video_id.group(1) not in self.infos:
+            return None
+
+        expires, info = self.infos.pop(video_id.group(1))
+        return info if time.time() < expires else None
+
+    def _cached(self, video_id: str) -> Optional[Dict]:
+        metadata = self.entries.get(video_id)
+        if not metadata:
+            return None
+
+        if time.time() >= metadata["expires"]:
+            del self.entries[video_id]
+            return None
+
+        self.entries.move_to_end(video_id)
+        return metadata
+
+    def _evict(self):
+        while len(self.infos) > self.max_infos:
+            self.infos.popitem(last=False)
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get_stats(self) -> Dict:
+        return {
+            "entries": len(self.entries),
+            "infos": len(self.infos),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+metadata_cache = MetadataCache(ttl=config.METADATA_CACHE_TTL, max_entries=config.METADATA_CACHE_SIZE)
@@ -0,0 +1,278 @@
+import asyncio
+import functools
+import logging
+import math
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from config import config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+def format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+def format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{str(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children: Dict[Tuple[str, ...], "Metric"] = {}
+
+    def labels(self, *values) -> "Metric":
+        key = tuple(str(value) for value in values)
+        child = self.children.get(key)
+        if child is None:
+            child = self.children[key] = self._new_child()
+        return child
+
+    def _new_child(self) -> "Metric":
+        raise NotImplementedError
+
+    def _samples(self, labelvalues: Tuple[str, ...]) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        if self.labelnames:
+            for labelvalues, child in list(self.children.items()):
+                lines.extend(child._samples(labelvalues))
+        else:
+            lines.extend(self._samples(()))
+        return lines
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.value = 0.0
+
+    def _new_child(self):
+        child = Counter(self.name, self.documentation)
+        child.labelnames = self.labelnames
+        return child
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def _samples(self, labelvalues):
+        return [f"{self.name}{format_labels(self.labelnames, labelvalues)} {format_value(self.value)}"]
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+
+    def _new_child(self):
+        child = Gauge(self.name, self.documentation)
+        child.labelnames = self.labelnames
+        return child
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set_function(self, function: Callable[[], float]) -> "Gauge":
+        self.function = function
+        return self
+
+    def _samples(self, labelvalues):
+        value = self.value
+        if self.function:
+            try:
+                value = float(self.function())
+            except Exception as e:
+                logger.error(f"Error collecting gauge {self.name}: {e}")
+                value = math.nan
+        return [f"{self.name}{format_labels(self.labelnames, labelvalues)} {format_value(value)}"]
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def _new_child(self):
+        child = Histogram(self.name, self.documentation, buckets=self.buckets)
+        child.labelnames = self.labelnames
+        return child
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def time(self) -> "Timer":
+        return Timer(self)
+
+    def _samples(self, labelvalues):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            cumulative += count
+            le = f'le="{format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{format_labels(self.labelnames, labelvalues, le)} {cumulative}")
+        labels = format_labels(self.labelnames, labelvalues)
+        lines.append(f"{self.name}_sum{labels} {format_value(self.sum)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class Timer:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric):
+        existing = self.metrics.get(metric.name)
+        if existing:
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+class MetricsServer:
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 0):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.ready_check: Optional[Callable[[], bool]] = None
+
+    async def start(self):
+        if not self.port or self.server:
+            return
+
+        try:
+            self.server = await asyncio.start_server(self._handle, self.host, self.port)
+            logger.info(f"Metrics endpoint listening on http://{self.host}:{self.port}/metrics")
+        except Exception as e:
+            logger.error(f"Failed to start metrics endpoint: {e}")
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await asyncio.wait_for(reader.readline(), timeout=5)
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass
+
+            parts = request.decode("latin-1").split()
+            path = parts[1].split("?")[0] if len(parts) >= 2 and parts[0] == "GET" else None
+            if path in ("/metrics", "/"):
+                status = "200 OK"
+                body = self.registry.render().encode()
+            elif path == "/ready":
+                ready = self.ready_check() if self.ready_check else True
+                status = "200 OK" if ready else "503 Service Unavailable"
+                body = b"ready\n" if ready else b"not ready\n"
+            else:
+                status = "404 Not Found"
+                body = b"Not Found\n"
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                f"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except Exception as e:
+            logger.debug(f"Metrics request failed: {e}")
+        finally:
+            writer.close()
+
+metrics = MetricsRegistry()
+metrics_server = MetricsServer(metrics, host=config.METRICS_HOST, port=config.METRICS_PORT)
+
+STAGE_SECONDS = metrics.histogram(
+    "bot_stage_duration_seconds",
+    "Time spent in each playback pipeline stage",
+    ["stage"]
+)
+STAGE_FAILURES = metrics.counter(
+    "bot_stage_failures_total",
+    "Failed playback pipeline stage runs",
+    ["stage"]
+)
+
+def timed(stage: str):
+    seconds = STAGE_SECONDS.labels(stage)
+    failures = STAGE_FAILURES.labels(stage)
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except BaseException:
+                failures.inc()
+                raise
+            finally:
+                seconds.observe(time.perf_counter() - started)
+
+            if not result:
+                failures.inc()
+            return result
+        return wrapper
+    return decorator
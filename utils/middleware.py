@@ -0,0 +1,181 @@
+import asyncio
+import functools
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Set
+from pyrogram import Client, StopPropagation, ContinuePropagation
+from pyrogram.enums import ChatMemberStatus
+from pyrogram.errors import ChatAdminRequired
+from pyrogram.types import Message, User
+from database import db
+from utils.admin_cache import admin_cache, ADMIN_STATUSES
+from utils.outbound import outbound
+from config import config
+
+logger = logging.getLogger(__name__)
+
+class CommandContext:
+    def __init__(self, pipeline: "CommandPipeline", client: Client, message: Message, name: str):
+        self.pipeline = pipeline
+        self.client = client
+        self.message = message
+        self.name = name
+        self.chat_id = message.chat.id
+        self.user: Optional[User] = message.from_user
+        self.target: Optional[User] = None
+        self.roster_task: Optional[asyncio.Task] = None
+
+    def prefetch_roster(self):
+        if self.roster_task is None:
+            self.roster_task = asyncio.ensure_future(admin_cache.get_roster(self.client, self.chat_id))
+            self.roster_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    async def get_status(self, user_id: int) -> Optional[ChatMemberStatus]:
+        self.prefetch_roster()
+        try:
+            roster = await asyncio.shield(self.roster_task)
+        except Exception as e:
+            logger.error(f"Error loading admins for chat {self.chat_id}: {e}")
+            return None
+        return roster.get(user_id)
+
+    async def is_admin(self, user_id: int) -> bool:
+        return await self.get_status(user_id) in ADMIN_STATUSES
+
+    async def is_owner(self, user_id: int) -> bool:
+        return await self.get_status(user_id) == ChatMemberStatus.OWNER
+
+    def background(self, coro: Awaitable):
+        return self.pipeline.spawn(coro, self.name)
+
+CommandHandler = Callable[[Client, Message, CommandContext], Awaitable[None]]
+
+class CommandPipeline:
+    def __init__(self, latency_window: int = 500):
+        self.latency_window = latency_window
+        self.latencies: Dict[str, Deque[float]] = {}
+        self.calls: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.background_tasks: Set[asyncio.Task] = set()
+        self.accepting = True
+        self.inflight = 0
+
+    def command(self, name: str, admin: bool = False, owner: bool = False, bot_owner: bool = False,
+                target: Optional[str] = None, protect_admins: Optional[str] = None,
+                admin_required: Optional[str] = None):
+        def decorator(handler: CommandHandler):
+            @functools.wraps(handler)
+            async def wrapper(client: Client, message: Message):
+                if not self.accepting:
+                    await self._reply_error(message, "The bot is restarting, please try again in a minute.")
+                    return
+
+                db.increment_command_usage(name)
+                ctx = CommandContext(self, client, message, name)
+                started = time.perf_counter()
+                failed = False
+                self.inflight += 1
+
+                try:
+                    if await self._check(ctx, admin, owner, bot_owner, target, protect_admins):
+                        await handler(client, message, ctx)
+                except (StopPropagation, ContinuePropagation):
+                    raise
+                except ChatAdminRequired:
+                    failed = True
+                    await self._reply_error(message, admin_required or "I need admin rights to do that!")
+                except Exception as e:
+                    failed = True
+                    logger.error(f"Error in /{name}: {e}")
+                    await self._reply_error(message, f"Error: {str(e)}")
+                finally:
+                    self.inflight -= 1
+                    self._record(name, time.perf_counter() - started, failed)
+
+            return wrapper
+        return decorator
+
+    async def _check(self, ctx: CommandContext, admin: bool, owner: bool, bot_owner: bool,
+                     target: Optional[str], protect_admins: Optional[str]) -> bool:
+        message = ctx.message
+
+        if bot_owner and not (config.OWNER_ID and ctx.user and ctx.user.id == config.OWNER_ID):
+            await outbound.reply(message, "Only the bot owner can use this command!")
+            return False
+
+        if admin or owner or protect_admins:
+            ctx.prefetch_roster()
+
+        if owner:
+            if not await ctx.is_owner(ctx.user.id):
+                await outbound.reply(message, f"Only the group creator can {ctx.name} users!")
+                return False
+        elif admin:
+            if not await ctx.is_admin(ctx.user.id):
+                await outbound.reply(message, "You need to be an admin to use this command!")
+                return False
+
+        if target:
+            ctx.target = message.reply_to_message.from_user if message.reply_to_message else None
+            if not ctx.target:
+                await outbound.reply(message, target)
+                return False
+
+            if protect_admins and await ctx.is_admin(ctx.target.id):
+                await outbound.reply(message, protect_admins)
+                return False
+
+        return True
+
+    async def _reply_error(self, message: Message, text: str):
+        try:
+            await outbound.reply(message, text)
+        except Exception as e:
+            logger.error(f"Failed to report command error: {e}")
+
+    def _record(self, name: str, elapsed: float, failed: bool):
+        latencies = self.latencies.get(name)
+        if latencies is None:
+            latencies = self.latencies[name] = deque(maxlen=self.latency_window)
+        latencies.append(elapsed)
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if failed:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def spawn(self, coro: Awaitable, name: str = "background") -> asyncio.Task:
+        task = asyncio.ensure_future(coro)
+        self.background_tasks.add(task)
+        task.add_done_callback(functools.partial(self._background_done, name))
+        return task
+
+    def _background_done(self, name: str, task: asyncio.Task):
+        self.background_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Background work for /{name} failed: {task.exception()}")
+
+    async def drain(self, timeout: float) -> bool:
+        self.accepting = False
+        deadline = time.monotonic() + timeout
+        while self.inflight or self.background_tasks:
+            if time.monotonic() >= deadline:
+                logger.warning(f"Gave up draining {self.inflight} commands and {len(self.background_tasks)} background tasks")
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    def get_stats(self) -> Dict[str, Dict]:
+        stats = {}
+        for name, latencies in self.latencies.items():
+            ordered = sorted(latencies)
+            stats[name] = {
+                "calls": self.calls.get(name, 0),
+                "errors": self.errors.get(name, 0),
+                "p50": ordered[len(ordered) // 2],
+                "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                "max": ordered[-1],
+            }
+        return stats
+
+pipeline = CommandPipeline()
+command = pipeline.command
@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional, Set, Tuple
+from pyrogram import Client
+from pyrogram.enums import ChatType
+from pyrogram.errors import FloodWait
+from pyrogram.types import Message
+from config import config
+from utils.metrics import metrics, STAGE_SECONDS, STAGE_FAILURES
+
+logger = logging.getLogger(__name__)
+
+SEND_SECONDS = STAGE_SECONDS.labels("telegram_send")
+SEND_FAILURES = STAGE_FAILURES.labels("telegram_send")
+QUEUE_SECONDS = metrics.histogram(
+    "bot_outbound_queue_wait_seconds",
+    "Time outgoing requests wait for rate-limit tokens"
+)
+FLOOD_WAITS = metrics.counter("bot_flood_waits_total", "FloodWait errors returned by Telegram")
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def is_idle(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity and not self.lock.locked()
+
+    def pause(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class PendingEdit:
+    def __init__(self, text: str, kwargs: Dict, future: asyncio.Future):
+        self.text = text
+        self.kwargs = kwargs
+        self.future = future
+
+class OutboundScheduler:
+    def __init__(self, chat_rate: float = 1.0, chat_burst: float = 5,
+                 global_rate: float = 25.0, global_burst: float = 30,
+                 max_flood_retries: int = 3, max_chat_buckets: int = 10000):
+        self.client: Optional[Client] = None
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_flood_retries = max_flood_retries
+        self.max_chat_buckets = max_chat_buckets
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.chat_buckets: "OrderedDict[int, TokenBucket]" = OrderedDict()
+        self.pending_edits: Dict[Tuple[int, int], PendingEdit] = {}
+        self.inflight_edits: Dict[Tuple[int, int], asyncio.Future] = {}
+        self.background_tasks: Set[asyncio.Task] = set()
+        self.queue_latencies: Deque[float] = deque(maxlen=1000)
+        self.queued = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.flood_waits = 0
+        self.failed = 0
+
+    def attach(self, client: Client):
+        self.client = client
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket:
+            self.chat_buckets.move_to_end(chat_id)
+            return bucket
+
+        bucket = TokenBucket(self.chat_rate, self.chat_burst)
+        self.chat_buckets[chat_id] = bucket
+
+        if len(self.chat_buckets) > self.max_chat_buckets:
+            for idle_chat_id in list(self.chat_buckets)[:len(self.chat_buckets) // 10]:
+                if self.chat_buckets[idle_chat_id].is_idle():
+                    del self.chat_buckets[idle_chat_id]
+
+        return bucket
+
+    async def _acquire(self, chat_id: int):
+        queued_at = time.monotonic()
+        self.queued += 1
+        try:
+            await self._chat_bucket(chat_id).acquire()
+            await self.global_bucket.acquire()
+        finally:
+            self.queued -= 1
+        waited = time.monotonic() - queued_at
+        self.queue_latencies.append(waited)
+        QUEUE_SECONDS.observe(waited)
+
+    async def _send(self, chat_id: int, func, *args, **kwargs):
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+                SEND_SECONDS.observe(time.perf_counter() - started)
+                self.sent += 1
+                return result
+            except FloodWait as e:
+                attempt += 1
+                self.flood_waits += 1
+                FLOOD_WAITS.inc()
+                if attempt > self.max_flood_retries:
+                    self.failed += 1
+                    SEND_FAILURES.inc()
+                    raise
+
+                logger.warning(f"FloodWait of {e.value}s sending to chat {chat_id}, retrying")
+                self._chat_bucket(chat_id).pause(e.value)
+                self.global_bucket.pause(e.value)
+                await self._acquire(chat_id)
+            except Exception:
+                self.failed += 1
+                SEND_FAILURES.inc()
+                raise
+
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        await self._acquire(chat_id)
+        return await self._send(chat_id, self.client.send_message, chat_id, text, **kwargs)
+
+    async def reply(self, message: Message, text: str, **kwargs):
+        if message.chat.type != ChatType.PRIVATE:
+            kwargs.setdefault("reply_to_message_id", message.id)
+        return await self.send_message(message.chat.id, text, **kwargs)
+
+    async def send_document(self, chat_id: int, document, **kwargs):
+        await self._acquire(chat_id)
+        return await self._send(chat_id, self.client.send_document, chat_id, document, **kwargs)
+
+    async def edit(self, message: Message, text: str, **kwargs):
+        chat_id = message.chat.id
+        key = (chat_id, message.id)
+
+        pending = self.pending_edits.get(key)
+        if pending:
+            pending.text = text
+            pending.kwargs = kwargs
+            self.coalesced += 1
+            return await asyncio.shield(pending.future)
+
+        pending = PendingEdit(text, kwargs, asyncio.get_running_loop().create_future())
+        self.pending_edits[key] = pending
+
+        try:
+            previous = self.inflight_edits.get(key)
+            if previous:
+                await asyncio.wait([previous])
+            await self._acquire(chat_id)
+        except BaseException:
+            pending.future.cancel()
+            raise
+        finally:
+            self.pending_edits.pop(key, None)
+
+        self.inflight_edits[key] = pending.future
+        try:
+            result = await self._send(
+                chat_id, self.client.edit_message_text, chat_id, message.id, pending.text, **pending.kwargs
+            )
+        except BaseException as e:
+            if isinstance(e, Exception):
+                pending.future.set_exception(e)
+                pending.future.exception()
+            else:
+                pending.future.cancel()
+            raise
+        finally:
+            if self.inflight_edits.get(key) is pending.future:
+                del self.inflight_edits[key]
+
+        pending.future.set_result(result)
+        return result
+
+    def post_edit(self, message: Message, text: str, **kwargs) -> asyncio.Task:
+        task = asyncio.create_task(self.edit(message, text, **kwargs))
+        self.background_tasks.add(task)
+        task.add_done_callback(self._background_done)
+        return task
+
+    def _background_done(self, task: asyncio.Task):
+        self.background_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Background message edit failed: {task.exception()}")
+
+    async def delete(self, message: Message):
+        await self._acquire(message.chat.id)
+        return await self._send(message.chat.id, self.client.delete_messages, message.chat.id, message.id)
+
+    async def drain(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while self.queued or self.pending_edits or self.inflight_edits or self.background_tasks:
+            if time.monotonic() >= deadline:
+                logger.warning(f"Gave up draining {self.queued} queued sends and {len(self.pending_edits)} pending edits")
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    def get_stats(self) -> Dict:
+        latencies = sorted(self.queue_latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+        return {
+            "queued": self.queued,
+            "pending_edits": len(self.pending_edits),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "flood_waits": self.flood_waits,
+            "failed": self.failed,
+            "latency_p50": percentile(0.50),
+            "latency_p95": percentile(0.95),
+            "latency_max": latencies[-1] if latencies else 0.0,
+        }
+
+outbound = OutboundScheduler(
+    chat_rate=config.OUTBOUND_CHAT_RATE,
+    chat_burst=config.OUTBOUND_CHAT_BURST,
+    global_rate=config.OUTBOUND_GLOBAL_RATE,
+    global_burst=config.OUTBOUND_GLOBAL_BURST
+)
+
+metrics.gauge("bot_outbound_queued", "Outgoing requests waiting for rate-limit tokens").set_function(lambda: outbound.queued)
+metrics.gauge("bot_outbound_pending_edits", "Message edits waiting to be sent").set_function(lambda: len(outbound.pending_edits))
@@ -0,0 +1,201 @@
+import asyncio
+import io
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import List, Tuple
+from config import config
+
+logger = logging.getLogger(__name__)
+
+CO_COROUTINE = 0x0080
+CO_ASYNC_GENERATOR = 0x0200
+
+def short_location(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+def await_chain(task: asyncio.Task, depth: int = 4) -> str:
+    names = []
+    coro = task.get_coro()
+    while coro is not None and len(names) < 16:
+        code = getattr(coro, "cr_code", None) or getattr(coro, "ag_code", None) or getattr(coro, "gi_code", None)
+        if code is None:
+            break
+        names.append(code.co_name)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "ag_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return " > ".join(names[-depth:]) or repr(task.get_coro())
+
+def plain(text: str) -> str:
+    return re.sub(r"<([^<>]*)>", r"\1", text).replace("<", "")
+
+class StackSampler(threading.Thread):
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="profiler-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.leaf_time: Counter = Counter()
+        self.coroutine_time: Counter = Counter()
+        self.samples = 0
+
+    def run(self):
+        last = time.perf_counter()
+        while not self.stop_event.wait(self.interval):
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            leaf = f"{short_location(frame.f_code)}:{frame.f_lineno}"
+            coroutines = []
+            while frame is not None:
+                if frame.f_code.co_flags & (CO_COROUTINE | CO_ASYNC_GENERATOR):
+                    coroutines.append(frame.f_code.co_name)
+                frame = frame.f_back
+
+            self.samples += 1
+            self.leaf_time[leaf] += elapsed
+            self.coroutine_time[" > ".join(reversed(coroutines[:4])) or "(event loop)"] += elapsed
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+class Profiler:
+    def __init__(self, sample_interval: float = 0.005, task_interval: float = 0.02, max_seconds: float = 120.0):
+        self.sample_interval = sample_interval
+        self.task_interval = task_interval
+        self.max_seconds = max_seconds
+        self.lock = asyncio.Lock()
+
+    def is_running(self) -> bool:
+        return self.lock.locked()
+
+    async def _sample_tasks(self, awaiting: Counter, stop: asyncio.Event, owner: asyncio.Task):
+        skip = {asyncio.current_task(), owner}
+        last = time.perf_counter()
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.task_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            for task in asyncio.all_tasks():
+                if task in skip:
+                    continue
+                awaiting[await_chain(task)] += elapsed
+
+    async def capture(self, seconds: float) -> Tuple[str, str]:
+        import cProfile
+
+        seconds = max(1.0, min(seconds, self.max_seconds))
+
+        async with self.lock:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start(10)
+            before = tracemalloc.take_snapshot()
+
+            awaiting: Counter = Counter()
+            stop = asyncio.Event()
+            task_sampler = asyncio.create_task(self._sample_tasks(awaiting, stop, asyncio.current_task()))
+            stack_sampler = StackSampler(threading.get_ident(), self.sample_interval)
+
+            profile = cProfile.Profile()
+            started = time.perf_counter()
+            stack_sampler.start()
+            profile.enable()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                profile.disable()
+                stack_sampler.stop()
+                stop.set()
+                await task_sampler
+                elapsed = time.perf_counter() - started
+
+                after = tracemalloc.take_snapshot()
+                if started_tracing:
+                    tracemalloc.stop()
+
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, self._report, profile, stack_sampler, awaiting, before, after, elapsed
+            )
+
+    def _report(self, profile, sampler: StackSampler, awaiting: Counter,
+                before, after, elapsed: float) -> Tuple[str, str]:
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        allocations = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")[:25]
+        busy = sum(sampler.coroutine_time.values())
+
+        stream = io.StringIO()
+        stream.write(f"Profile captured {datetime.now():%Y-%m-%d %H:%M:%S} over {elapsed:.1f}s "
+                     f"({sampler.samples} stack samples)\n\n")
+
+        stream.write("== Event loop thread: wall time by running coroutine ==\n")
+        for chain, spent in sampler.coroutine_time.most_common(20):
+            stream.write(f"{spent:8.3f}s {spent / max(busy, 1e-9) * 100:5.1f}%  {chain}\n")
+
+        stream.write("\n== Event loop thread: wall time by line ==\n")
+        for leaf, spent in sampler.leaf_time.most_common(25):
+            stream.write(f"{spent:8.3f}s  {leaf}\n")
+
+        stream.write("\n== Tasks: wall time spent awaiting ==\n")
+        for chain, spent in awaiting.most_common(20):
+            stream.write(f"{spent:8.3f}s  {chain}\n")
+
+        import pstats
+
+        stream.write("\n== CPU profile: top functions by own time ==\n")
+        stats = pstats.Stats(profile, stream=stream)
+        stats.sort_stats("tottime").print_stats(30)
+        stream.write("\n== CPU profile: top functions by cumulative time ==\n")
+        stats.sort_stats("cumulative").print_stats(30)
+
+        stream.write("\n== Allocation growth (tracemalloc) ==\n")
+        for stat in allocations:
+            stream.write(f"{stat}\n")
+
+        fd, path = tempfile.mkstemp(prefix="profile_", suffix=".txt")
+        with os.fdopen(fd, "w") as f:
+            f.write(stream.getvalue())
+
+        summary = self._summary(profile, sampler, allocations, elapsed)
+        return summary, path
+
+    def _summary(self, profile, sampler: StackSampler, allocations: List, elapsed: float) -> str:
+        lines = [f"**Profile ({elapsed:.1f}s)**", "", "**Busiest coroutines:**"]
+        for chain, spent in sampler.coroutine_time.most_common(4):
+            lines.append(f"{spent:.2f}s {chain}")
+
+        import pstats
+
+        stats = pstats.Stats(profile)
+        top: List[Tuple[float, str]] = sorted(
+            ((entry[2], func[2] if func[0] == "~" else f"{os.path.basename(func[0])}:{func[2]}")
+             for func, entry in stats.stats.items()),
+            reverse=True
+        )[:5]
+        lines += ["", "**Top functions (own time):**"] + [f"{tottime:.3f}s {plain(name)}" for tottime, name in top]
+
+        if allocations:
+            lines += ["", "**Top allocation sites:**"]
+            for stat in allocations[:3]:
+                frame = stat.traceback[0]
+                lines.append(f"{stat.size_diff / 1024:+.1f} KiB {plain(os.path.basename(frame.filename))}:{frame.lineno}")
+
+        return "\n".join(lines)
+
+profiler = Profiler(sample_interval=config.PROFILE_SAMPLE_INTERVAL, max_seconds=config.PROFILE_MAX_SECONDS)
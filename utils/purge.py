@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional
+from pyrogram import Client
+from utils.floodwait import FloodGate
+
+logger = logging.getLogger(__name__)
+
+DELETE_CHUNK_SIZE = 100
+
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+class PurgeEngine:
+    def __init__(self, client: Client, chat_id: int, concurrency: int = 3,
+                 chunk_size: int = DELETE_CHUNK_SIZE):
+        self.client = client
+        self.chat_id = chat_id
+        self.concurrency = max(1, concurrency)
+        self.chunk_size = max(1, min(chunk_size, DELETE_CHUNK_SIZE))
+        self.flood_gate = FloodGate()
+        self.deleted = 0
+        self.scanned = 0
+        self.failed_chunks = 0
+        self.last_error: Optional[Exception] = None
+
+    def _chunks(self, start_id: int, end_id: int) -> Iterator[List[int]]:
+        for chunk_start in range(start_id, end_id + 1, self.chunk_size):
+            yield list(range(chunk_start, min(chunk_start + self.chunk_size, end_id + 1)))
+
+    async def _filter(self, message_ids: List[int], user_id: Optional[int],
+                      since: Optional[datetime]) -> List[int]:
+        messages = await self.flood_gate.call(self.client.get_messages, self.chat_id, message_ids)
+
+        matching = []
+        for msg in messages:
+            if not msg or msg.empty:
+                continue
+            if user_id and not (msg.from_user and msg.from_user.id == user_id):
+                continue
+            if since and msg.date and msg.date < since:
+                continue
+            matching.append(msg.id)
+        return matching
+
+    async def _delete_chunk(self, message_ids: List[int], user_id: Optional[int],
+                            since: Optional[datetime]):
+        if user_id or since:
+            message_ids = await self._filter(message_ids, user_id, since)
+            if not message_ids:
+                return 0
+
+        deleted = await self.flood_gate.call(self.client.delete_messages, self.chat_id, message_ids)
+        return deleted if isinstance(deleted, int) else len(message_ids)
+
+    async def purge(self, start_id: int, end_id: int, user_id: Optional[int] = None,
+                    since: Optional[datetime] = None,
+                    progress: Optional[ProgressCallback] = None) -> Dict:
+        started = time.monotonic()
+        total = max(0, end_id - start_id + 1)
+        chunks = self._chunks(start_id, end_id)
+
+        async def worker():
+            for chunk in chunks:
+                try:
+                    deleted = await self._delete_chunk(chunk, user_id, since)
+                    self.deleted += deleted
+                except Exception as e:
+                    self.failed_chunks += 1
+                    self.last_error = e
+                    logger.error(f"Error purging messages {chunk[0]}-{chunk[-1]} in chat {self.chat_id}: {e}")
+
+                self.scanned += len(chunk)
+                if progress:
+                    try:
+                        await progress(self.scanned, total)
+                    except Exception as e:
+                        logger.error(f"Error reporting purge progress: {e}")
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+        if self.deleted == 0 and self.last_error:
+            raise self.last_error
+
+        elapsed = time.monotonic() - started
+        return {
+            "deleted": self.deleted,
+            "scanned": self.scanned,
+            "failed_chunks": self.failed_chunks,
+            "flood_waits": self.flood_gate.flood_waits,
+            "elapsed": elapsed,
+            "rate": self.deleted / elapsed if elapsed > 0 else float(self.deleted),
+        }
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+from config import config
+from utils.metrics import metrics
+from utils.audio_capture import audio_capture_manager
+
+logger = logging.getLogger(__name__)
+
+current_chat: ContextVar[Optional[int]] = ContextVar("current_chat", default=None)
+
+RESOURCES = ("download_bytes", "transcode_seconds", "asr_seconds", "cache_bytes")
+QUOTA_LABELS = {
+    "download_bytes": "download",
+    "transcode_seconds": "transcoding",
+    "asr_seconds": "voice recognition",
+}
+
+RESOURCE_USAGE = metrics.counter(
+    "bot_resource_usage_total",
+    "Resources consumed on behalf of chats",
+    ["resource"]
+)
+QUOTA_REJECTIONS = metrics.counter(
+    "bot_quota_rejections_total",
+    "Requests refused because a chat used up a quota",
+    ["resource"]
+)
+QUEUED_JOBS = metrics.gauge("bot_resource_queued_jobs", "Heavy jobs waiting for their chat's concurrency slot")
+
+class ChatUsage:
+    __slots__ = ("totals", "window", "active_tasks", "queued_tasks", "semaphore", "last_seen")
+
+    def __init__(self, concurrency: int):
+        self.totals: Dict[str, float] = dict.fromkeys(RESOURCES, 0.0)
+        self.window: Dict[str, float] = dict.fromkeys(RESOURCES, 0.0)
+        self.active_tasks = 0
+        self.queued_tasks = 0
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.last_seen = time.time()
+
+class ResourceAccountant:
+    def __init__(self, window: float = 3600.0, concurrency: int = 2, quotas: Optional[Dict[str, float]] = None,
+                 max_chats: int = 5000):
+        self.window = window
+        self.concurrency = max(1, concurrency)
+        self.quotas = {name: limit for name, limit in (quotas or {}).items() if limit > 0}
+        self.max_chats = max_chats
+        self.chats: Dict[int, ChatUsage] = {}
+        self.window_started = time.time()
+
+    def _get(self, chat_id: int) -> ChatUsage:
+        usage = self.chats.get(chat_id)
+        if usage is None:
+            if len(self.chats) >= self.max_chats:
+                self._evict()
+            usage = self.chats[chat_id] = ChatUsage(self.concurrency)
+        usage.last_seen = time.time()
+        return usage
+
+    def _evict(self):
+        idle = [chat_id for chat_id, usage in self.chats.items() if not usage.active_tasks and not usage.queued_tasks]
+        for chat_id in sorted(idle, key=lambda chat_id: self.chats[chat_id].last_seen)[:max(1, len(idle) // 10)]:
+            del self.chats[chat_id]
+
+    def _roll_window(self):
+        if time.time() - self.window_started < self.window:
+            return
+        self.window_started = time.time()
+        for usage in self.chats.values():
+            usage.window = dict.fromkeys(RESOURCES, 0.0)
+
+    def record(self, name: str, amount: float, chat_id: Optional[int] = None):
+        chat_id = chat_id if chat_id is not None else current_chat.get()
+        if chat_id is None or amount <= 0:
+            return
+
+        self._roll_window()
+        usage = self._get(chat_id)
+        usage.totals[name] += amount
+        usage.window[name] += amount
+        RESOURCE_USAGE.labels(name).inc(amount)
+
+    def over_quota(self, chat_id: int, *names: str) -> Optional[Tuple[str, float]]:
+        self._roll_window()
+        usage = self.chats.get(chat_id)
+        if usage is None:
+            return None
+
+        for name in names or self.quotas:
+            limit = self.quotas.get(name)
+            if limit and usage.window[name] >= limit:
+                QUOTA_REJECTIONS.labels(name).inc()
+                return name, max(0.0, self.window_started + self.window - time.time())
+        return None
+
+    @asynccontextmanager
+    async def job(self, chat_id: int):
+        usage = self._get(chat_id)
+        usage.queued_tasks += 1
+        QUEUED_JOBS.inc()
+        try:
+            await usage.semaphore.acquire()
+        finally:
+            usage.queued_tasks -= 1
+            QUEUED_JOBS.dec()
+
+        usage.active_tasks += 1
+        token = current_chat.set(chat_id)
+        try:
+            yield usage
+        finally:
+            usage.active_tasks -= 1
+            usage.semaphore.release()
+            current_chat.reset(token)
+
+    def snapshot(self, chat_id: int) -> Dict:
+        usage = self.chats.get(chat_id) or ChatUsage(self.concurrency)
+        return {
+            "chat_id": chat_id,
+            **usage.totals,
+            "window": dict(usage.window),
+            "capture_bytes": sum(len(chunk) for chunk in audio_capture_manager.audio_buffers.get(chat_id, ())),
+            "active_tasks": usage.active_tasks,
+            "queued_tasks": usage.queued_tasks,
+        }
+
+    def top(self, name: str, limit: int = 10):
+        if name == "capture_bytes":
+            chat_ids = list(audio_capture_manager.audio_buffers)
+        else:
+            chat_ids = list(self.chats)
+        snapshots = [self.snapshot(chat_id) for chat_id in chat_ids]
+        return sorted(snapshots, key=lambda snapshot: snapshot[name], reverse=True)[:limit]
+
+def quota_message(name: str, retry_after: float) -> str:
+    minutes = max(1, int(retry_after // 60))
+    return f"This chat has used up its {QUOTA_LABELS.get(name, name)} quota for now. Try again in {minutes} min."
+
+def cache_footprint() -> int:
+    total = 0
+    try:
+        with os.scandir(config.MUSIC_CACHE_DIR) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    total += entry.stat().st_size
+    except FileNotFoundError:
+        pass
+    return total
+
+resource_usage = ResourceAccountant(
+    window=config.QUOTA_WINDOW,
+    concurrency=config.QUOTA_CONCURRENT_JOBS,
+    quotas={
+        "download_bytes": config.QUOTA_DOWNLOAD_MB * 1024 * 1024,
+        "transcode_seconds": config.QUOTA_TRANSCODE_SECONDS,
+        "asr_seconds": config.QUOTA_ASR_SECONDS,
+    }
+)
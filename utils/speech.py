@@ -1,17 +1,36 @@
-import speech_recognition as sr
 import os
 import logging
-from pydub import AudioSegment
+from typing import Optional
+from utils.metrics import timed
+from utils.media_workers import media_workers
+from utils.transcoder import transcoder, TranscodePriority, WAV_ARGS
 
 logger = logging.getLogger(__name__)
 
+@timed("asr")
 async def recognize_speech(audio_file_path: str):
     try:
-        audio = AudioSegment.from_file(audio_file_path)
+        return await recognize(audio_file_path)
+    except Exception as e:
+        logger.error(f"Error in speech recognition: {e}")
+        return None
 
-        wav_path = audio_file_path.replace(os.path.splitext(audio_file_path)[1], '.wav')
-        audio.export(wav_path, format='wav')
+async def recognize(audio_file_path: str) -> Optional[str]:
+    wav_path = f"{os.path.splitext(audio_file_path)[0]}.asr.wav"
+    try:
+        await transcoder.transcode(audio_file_path, wav_path, WAV_ARGS, TranscodePriority.ASR)
+        return await media_workers.run(transcribe, wav_path)
+    finally:
+        if os.path.exists(wav_path):
+            try:
+                os.remove(wav_path)
+            except OSError:
+                pass
 
+def transcribe(wav_path: str) -> Optional[str]:
+    import speech_recognition as sr
+
+    try:
         recognizer = sr.Recognizer()
 
         with sr.AudioFile(wav_path) as source:
@@ -20,10 +39,6 @@ async def recognize_speech(audio_file_path: str):
             try:
                 text = recognizer.recognize_google(audio_data)
                 logger.info(f"Recognized speech: {text}")
-
-                if os.path.exists(wav_path):
-                    os.remove(wav_path)
-
                 return text
 
             except sr.UnknownValueError:
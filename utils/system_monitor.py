@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+import psutil
+from config import config
+from database import db
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class SystemSampler:
+    def __init__(self, interval: float = 5.0, history: int = 120, db_refresh_interval: float = 60.0):
+        self.interval = interval
+        self.db_refresh_interval = db_refresh_interval
+        self.samples: Deque[Dict] = deque(maxlen=history)
+        self.process = psutil.Process(os.getpid())
+        self.sample_task: Optional[asyncio.Task] = None
+        self.db_task: Optional[asyncio.Task] = None
+        self.last_loop_lag = 0.0
+        self.db_snapshot: Dict = {
+            "total_plays": 0,
+            "command_stats": {},
+            "active_chats": 0,
+            "refreshed_at": None,
+        }
+
+    def start(self):
+        psutil.cpu_percent(interval=None)
+        self.process.cpu_percent(interval=None)
+
+        if self.sample_task is None or self.sample_task.done():
+            self.sample_task = asyncio.create_task(self._sample_loop())
+        if self.db_task is None or self.db_task.done():
+            self.db_task = asyncio.create_task(self._db_refresh_loop())
+
+    async def stop(self):
+        for task in (self.sample_task, self.db_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self.sample_task = None
+        self.db_task = None
+
+    def latest(self) -> Dict:
+        if not self.samples:
+            self.samples.append(self._take_sample())
+        return self.samples[-1]
+
+    def average(self, key: str, window: int = 12) -> float:
+        recent = list(self.samples)[-window:]
+        if not recent:
+            return 0.0
+        return sum(sample[key] for sample in recent) / len(recent)
+
+    def _take_sample(self) -> Dict:
+        memory = psutil.virtual_memory()
+        with self.process.oneshot():
+            process_memory = self.process.memory_info().rss
+            process_cpu = self.process.cpu_percent(interval=None)
+            threads = self.process.num_threads()
+
+        commands_total = db.command_counter.recorded_total
+        previous = self.samples[-1] if self.samples else None
+        elapsed = time.time() - previous["timestamp"] if previous else 0
+        commands_rate = (
+            (commands_total - previous["commands_total"]) / elapsed
+            if previous and elapsed > 0 else 0.0
+        )
+
+        return {
+            "timestamp": time.time(),
+            "cpu_percent": psutil.cpu_percent(interval=None),
+            "memory_percent": memory.percent,
+            "process_rss": process_memory,
+            "process_cpu_percent": process_cpu,
+            "threads": threads,
+            "tasks": len(asyncio.all_tasks()),
+            "loop_lag": self.last_loop_lag,
+            "commands_total": commands_total,
+            "commands_per_second": commands_rate,
+        }
+
+    async def _sample_loop(self):
+        while True:
+            try:
+                expected = time.monotonic() + self.interval
+                await asyncio.sleep(self.interval)
+                self.last_loop_lag = max(0.0, time.monotonic() - expected)
+                self.samples.append(self._take_sample())
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error sampling system metrics: {e}")
+
+    async def refresh_db_snapshot(self):
+        total_plays, command_stats, active_chats = await asyncio.gather(
+            db.get_total_plays(),
+            db.get_stats(),
+            db.get_active_chat_count()
+        )
+        self.db_snapshot = {
+            "total_plays": total_plays,
+            "command_stats": command_stats,
+            "active_chats": active_chats,
+            "refreshed_at": time.time(),
+        }
+
+    async def _db_refresh_loop(self):
+        while True:
+            try:
+                await self.refresh_db_snapshot()
+                await asyncio.sleep(self.db_refresh_interval)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error refreshing cached stats: {e}")
+                await asyncio.sleep(self.db_refresh_interval)
+
+system_sampler = SystemSampler(
+    interval=config.METRICS_SAMPLE_INTERVAL,
+    db_refresh_interval=config.STATS_CACHE_TTL
+)
+
+metrics.gauge("bot_event_loop_lag_seconds", "Event loop lag at the last system sample").set_function(
+    lambda: system_sampler.latest()['loop_lag']
+)
+metrics.gauge("bot_asyncio_tasks", "Running asyncio tasks at the last system sample").set_function(
+    lambda: system_sampler.latest()['tasks']
+)
+metrics.gauge("bot_play_log_pending", "Play history events waiting to be written").set_function(
+    lambda: len(db.play_writer.queue)
+)
+metrics.gauge("bot_command_counts_pending", "Command usage increments waiting to be flushed").set_function(
+    lambda: sum(db.command_counter.pending.values())
+)
@@ -0,0 +1,184 @@
+import asyncio
+import heapq
+import logging
+import time
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from config import config
+from database import db
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+ActionExecutor = Callable[[Dict], Awaitable[None]]
+
+class TimedActionScheduler:
+    def __init__(self, batch_size: int = 50, concurrency: int = 5, retry_delay: float = 30.0,
+                 max_retry_delay: float = 3600.0):
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.heap: List[Tuple[float, str]] = []
+        self.actions: Dict[str, Dict] = {}
+        self.executor: Optional[ActionExecutor] = None
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.loaded = False
+        self.load_retry_at = 0.0
+        self.applied = 0
+        self.failed = 0
+        self.retried = 0
+
+    @staticmethod
+    def action_id(chat_id: int, user_id: int, action: str) -> str:
+        return f"{action}:{chat_id}:{user_id}"
+
+    def set_executor(self, executor: ActionExecutor):
+        self.executor = executor
+
+    async def start(self):
+        await self._load()
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def _load(self) -> bool:
+        try:
+            records = await db.get_timed_actions()
+        except Exception as e:
+            self.load_retry_at = time.monotonic() + self.retry_delay
+            logger.warning(f"Could not load timed actions, retrying in {self.retry_delay:.0f}s: {e!r}")
+            return False
+
+        for record in records:
+            if record["id"] not in self.actions:
+                self.actions[record["id"]] = record
+                self.heap.append((record["due"], record["id"]))
+        heapq.heapify(self.heap)
+        self.loaded = True
+
+        overdue = sum(1 for record in records if record["due"] <= time.time())
+        logger.info(f"Loaded {len(records)} timed actions ({overdue} overdue)")
+        return True
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def pending(self) -> int:
+        return len(self.actions)
+
+    async def schedule(self, chat_id: int, user_id: int, action: str, duration: timedelta) -> Dict:
+        record = {
+            "id": self.action_id(chat_id, user_id, action),
+            "chat_id": chat_id,
+            "user_id": user_id,
+            "action": action,
+            "due": time.time() + duration.total_seconds(),
+        }
+
+        earliest = self.heap[0][0] if self.heap else None
+        self.actions[record["id"]] = record
+        heapq.heappush(self.heap, (record["due"], record["id"]))
+        if earliest is None or record["due"] < earliest:
+            self.wakeup.set()
+
+        await db.add_timed_action(record)
+        return record
+
+    async def cancel(self, chat_id: int, user_id: int, action: str):
+        action_id = self.action_id(chat_id, user_id, action)
+        if self.actions.pop(action_id, None):
+            await db.remove_timed_actions([action_id])
+
+    def _pop_due(self, now: float) -> List[Dict]:
+        due = []
+        while self.heap and len(due) < self.batch_size and self.heap[0][0] <= now:
+            due_at, action_id = heapq.heappop(self.heap)
+            record = self.actions.get(action_id)
+            if record and record["due"] == due_at:
+                del self.actions[action_id]
+                due.append(record)
+        return due
+
+    def _next_delay(self, now: float) -> Optional[float]:
+        while self.heap:
+            due_at, action_id = self.heap[0]
+            record = self.actions.get(action_id)
+            if record and record["due"] == due_at:
+                return max(0.0, due_at - now)
+            heapq.heappop(self.heap)
+        return None
+
+    def _retry_later(self, record: Dict, error: Exception) -> Dict:
+        attempts = record.get("attempts", 0) + 1
+        delay = min(self.max_retry_delay, self.retry_delay * 2 ** (attempts - 1))
+        delay = max(delay, getattr(error, "value", 0) or 0)
+        retry = {**record, "attempts": attempts, "due": time.time() + delay}
+
+        self.actions[retry["id"]] = retry
+        heapq.heappush(self.heap, (retry["due"], retry["id"]))
+        logger.error(
+            f"Failed to apply timed {record['action']} for user {record['user_id']} "
+            f"in chat {record['chat_id']}, retrying in {delay:.0f}s (attempt {attempts}): {error}"
+        )
+        return retry
+
+    async def _apply(self, records: List[Dict]):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        succeeded = []
+        retries = []
+
+        async def apply(record: Dict):
+            async with semaphore:
+                try:
+                    await self.executor(record)
+                    self.applied += 1
+                    succeeded.append(record["id"])
+                except Exception as e:
+                    self.failed += 1
+                    if record["id"] not in self.actions:
+                        self.retried += 1
+                        retries.append(self._retry_later(record, e))
+
+        await asyncio.gather(*(apply(record) for record in records))
+        await db.remove_timed_actions([
+            action_id for action_id in succeeded if action_id not in self.actions
+        ])
+        for retry in retries:
+            await db.add_timed_action(retry)
+
+    async def _run(self):
+        while True:
+            try:
+                if not self.loaded and time.monotonic() >= self.load_retry_at:
+                    await self._load()
+
+                due = self._pop_due(time.time())
+                if due:
+                    await self._apply(due)
+                    continue
+
+                self.wakeup.clear()
+                delay = self._next_delay(time.time())
+                if not self.loaded:
+                    retry_in = max(0.0, self.load_retry_at - time.monotonic())
+                    delay = retry_in if delay is None else min(delay, retry_in)
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in timed action scheduler: {e}")
+                await asyncio.sleep(5)
+
+timed_actions = TimedActionScheduler(concurrency=config.TIMED_ACTION_CONCURRENCY)
+
+metrics.gauge("bot_timed_actions_pending", "Scheduled unbans and unmutes").set_function(timed_actions.pending)
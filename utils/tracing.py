@@ -0,0 +1,111 @@
+import itertools
+import json
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Deque, Dict, List, Optional
+from config import config
+
+logger = logging.getLogger(__name__)
+
+current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+
+class Span:
+    __slots__ = ("trace", "stage", "started")
+
+    def __init__(self, trace: "Trace", stage: str):
+        self.trace = trace
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.trace.add_span(self.stage, time.perf_counter() - self.started, error=exc_type is not None)
+        return False
+
+class Trace:
+    def __init__(self, tracer: "Tracer", name: str, trace_id: int, **attrs):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.attrs = attrs
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.spans: List[Dict] = []
+        self.status = "running"
+        self.duration = 0.0
+        self.token = None
+
+    def __enter__(self):
+        self.token = current_trace.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        current_trace.reset(self.token)
+        if self.status == "running":
+            self.finish("error" if exc_type else "ok")
+        return False
+
+    def span(self, stage: str) -> Span:
+        return Span(self, stage)
+
+    def add_span(self, stage: str, duration: float, error: bool = False):
+        self.spans.append({"stage": stage, "duration": duration, "error": error})
+
+    def add_earlier_span(self, stage: str, duration: float):
+        self.started -= duration
+        self.spans.insert(0, {"stage": stage, "duration": duration, "error": False})
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def finish(self, status: str = "ok"):
+        if self.status != "running":
+            return
+        self.status = status
+        self.duration = time.perf_counter() - self.started
+        self.tracer.record(self)
+
+    def breakdown(self) -> str:
+        parts = [f"{span['stage']} {span['duration'] * 1000:.0f}ms{' (failed)' if span['error'] else ''}" for span in self.spans]
+        return f"{' | '.join(parts) or 'no stages'} = {self.duration * 1000:.0f}ms"
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace": self.name,
+            "id": self.trace_id,
+            "status": self.status,
+            "total_ms": round(self.duration * 1000, 1),
+            "stages": {span["stage"]: round(span["duration"] * 1000, 1) for span in self.spans},
+            **self.attrs,
+        }
+
+class Tracer:
+    def __init__(self, history: int = 500, slow_threshold: float = 10.0):
+        self.recent: Deque[Trace] = deque(maxlen=history)
+        self.slow_threshold = slow_threshold
+        self.ids = itertools.count(1)
+
+    def start(self, name: str, **attrs) -> Trace:
+        return Trace(self, name, next(self.ids), **attrs)
+
+    def record(self, trace: Trace):
+        self.recent.append(trace)
+        line = json.dumps(trace.to_dict(), default=str, separators=(",", ":"))
+        if trace.duration >= self.slow_threshold:
+            logger.warning(f"slow trace {line}")
+        else:
+            logger.info(f"trace {line}")
+
+    def slowest(self, limit: int = 10) -> List[Trace]:
+        return sorted(self.recent, key=lambda trace: trace.duration, reverse=True)[:limit]
+
+def record_span(stage: str, duration: float, error: bool = False):
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add_span(stage, duration, error)
+
+tracer = Tracer(history=config.TRACE_HISTORY, slow_threshold=config.TRACE_SLOW_THRESHOLD)
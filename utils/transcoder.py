@@ -0,0 +1,210 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import shlex
+import subprocess
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from enum import IntEnum
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from config import config
+from utils.metrics import metrics, STAGE_SECONDS
+from utils.tracing import record_span
+from utils.resource_usage import resource_usage
+
+logger = logging.getLogger(__name__)
+
+class TranscodePriority(IntEnum):
+    INTERACTIVE = 0
+    ASR = 1
+    PREFETCH = 2
+
+MP3_ARGS = ["-vn", "-codec:a", "libmp3lame", "-b:a", "192k", "-f", "mp3"]
+WAV_ARGS = ["-vn", "-ac", "1", "-ar", "16000", "-f", "wav"]
+
+QUEUE_SECONDS = metrics.histogram(
+    "bot_transcode_queue_seconds",
+    "Time transcode jobs wait for an FFmpeg slot",
+    ["priority"]
+)
+ENCODE_SPEED = metrics.histogram(
+    "bot_transcode_speed_ratio",
+    "Seconds of audio encoded per second of wall time",
+    ["priority"],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500)
+)
+TRANSCODE_FAILURES = metrics.counter("bot_transcode_failures_total", "FFmpeg runs that exited with an error", ["priority"])
+TRANSCODE_SECONDS = STAGE_SECONDS.labels("transcode")
+
+def parse_cpus(spec: str) -> Optional[Set[int]]:
+    cpus = set()
+    for part in spec.replace(" ", "").split(","):
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.update(range(int(first), int(last or first) + 1))
+    return cpus or None
+
+def available_cores() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+class TranscodeService:
+    def __init__(self, binary: str = "ffmpeg", concurrency: int = 0, nice: int = 0, cpus: Optional[Set[int]] = None):
+        self.command = shlex.split(binary)
+        self.cpus = cpus
+        cores = len(cpus) if cpus else available_cores()
+        self.concurrency = concurrency if concurrency > 0 else max(1, cores - 1)
+        self.nice = nice
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="ffmpeg")
+        self.active = 0
+        self.waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self.sequence = itertools.count()
+        self.recent: Deque[Dict] = deque(maxlen=200)
+        self.completed = 0
+        self.failed = 0
+
+    def queued(self) -> int:
+        return sum(1 for _, _, future in self.waiters if not future.done())
+
+    async def _acquire(self, priority: TranscodePriority):
+        if self.active < self.concurrency and not self.queued():
+            self.active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (priority, next(self.sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+
+    def _release(self):
+        while self.waiters:
+            _, _, future = heapq.heappop(self.waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def _limit(self, pid: int):
+        try:
+            if self.nice and hasattr(os, "setpriority"):
+                os.setpriority(os.PRIO_PROCESS, pid, min(19, os.getpriority(os.PRIO_PROCESS, 0) + self.nice))
+            if self.cpus and hasattr(os, "sched_setaffinity"):
+                os.sched_setaffinity(pid, self.cpus)
+        except OSError as e:
+            logger.debug(f"Could not lower FFmpeg priority for pid {pid}: {e}")
+
+    async def transcode(self, source: str, destination: str, output_args: List[str],
+                        priority: TranscodePriority = TranscodePriority.INTERACTIVE) -> float:
+        return await self.run(["-i", source, *output_args, destination], priority)
+
+    def _execute(self, args: List[str], job: Dict) -> Tuple[int, bytes, bytes, Optional[float]]:
+        with tempfile.TemporaryFile() as errors:
+            process = subprocess.Popen(
+                [*self.command, "-hide_banner", "-nostdin", "-nostats", "-loglevel", "error", "-y",
+                 "-progress", "pipe:1", "-threads", "1", *args],
+                stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=errors
+            )
+            job["process"] = process
+            self._limit(process.pid)
+            if job.get("cancelled"):
+                process.kill()
+
+            with process.stdout:
+                stdout = process.stdout.read()
+
+            cpu_seconds = None
+            if hasattr(os, "wait4"):
+                _, status, usage = os.wait4(process.pid, 0)
+                process.returncode = os.waitstatus_to_exitcode(status)
+                cpu_seconds = usage.ru_utime + usage.ru_stime
+            else:
+                process.wait()
+
+            errors.seek(0)
+            return process.returncode, stdout, errors.read(), cpu_seconds
+
+    async def run(self, args: List[str], priority: TranscodePriority = TranscodePriority.INTERACTIVE) -> float:
+        label = priority.name.lower()
+        queued_at = time.perf_counter()
+        await self._acquire(priority)
+        waited = time.perf_counter() - queued_at
+        QUEUE_SECONDS.labels(label).observe(waited)
+        record_span("transcode_wait", waited)
+
+        started = time.perf_counter()
+        media_seconds = 0.0
+        cpu_seconds = None
+        failed = True
+        job: Dict = {}
+        try:
+            execution = asyncio.get_running_loop().run_in_executor(self.executor, self._execute, args, job)
+            try:
+                returncode, stdout, stderr, cpu_seconds = await asyncio.shield(execution)
+            except asyncio.CancelledError:
+                job["cancelled"] = True
+                if "process" in job:
+                    job["process"].kill()
+                raise
+
+            if returncode != 0:
+                raise RuntimeError(f"ffmpeg exited with {returncode}: {stderr.decode(errors='replace').strip()[-300:]}")
+
+            for line in stdout.decode(errors="replace").splitlines():
+                if line.startswith("out_time_us=") and line[12:].isdigit():
+                    media_seconds = int(line[12:]) / 1_000_000
+            failed = False
+            return media_seconds
+
+        finally:
+            self._release()
+            elapsed = time.perf_counter() - started
+            if cpu_seconds is None:
+                cpu_seconds = elapsed
+            speed = media_seconds / elapsed if elapsed > 0 else 0.0
+            TRANSCODE_SECONDS.observe(elapsed)
+            record_span("transcode", elapsed, error=failed)
+            resource_usage.record("transcode_seconds", cpu_seconds)
+            if failed:
+                self.failed += 1
+                TRANSCODE_FAILURES.labels(label).inc()
+            else:
+                self.completed += 1
+                ENCODE_SPEED.labels(label).observe(speed)
+            self.recent.append({"priority": label, "wait": waited, "seconds": elapsed, "cpu": cpu_seconds,
+                                "speed": speed, "failed": failed})
+            logger.debug(f"Transcode ({label}) waited {waited:.2f}s, ran {elapsed:.2f}s "
+                         f"using {cpu_seconds:.2f}s CPU at {speed:.1f}x")
+
+    def get_stats(self) -> Dict:
+        finished = [job for job in self.recent if not job["failed"]]
+        speeds = sorted(job["speed"] for job in finished)
+        waits = sorted(job["wait"] for job in self.recent)
+        return {
+            "concurrency": self.concurrency,
+            "active": self.active,
+            "queued": self.queued(),
+            "completed": self.completed,
+            "failed": self.failed,
+            "speed_p50": speeds[len(speeds) // 2] if speeds else 0.0,
+            "wait_p95": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0,
+        }
+
+transcoder = TranscodeService(
+    binary=config.FFMPEG_BINARY,
+    concurrency=config.TRANSCODE_CONCURRENCY,
+    nice=config.TRANSCODE_NICE,
+    cpus=parse_cpus(config.TRANSCODE_CPUS)
+)
+
+metrics.gauge("bot_transcode_active", "FFmpeg processes currently running").set_function(lambda: transcoder.active)
+metrics.gauge("bot_transcode_queued", "Transcode jobs waiting for an FFmpeg slot").set_function(transcoder.queued)
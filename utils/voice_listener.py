@@ -2,11 +2,13 @@ import asyncio
 import logging
 import os
 import tempfile
+import time
 from typing import Optional, Callable, Dict
 from datetime import datetime
-import speech_recognition as sr
-from pydub import AudioSegment
 import re
+from utils.metrics import timed
+from utils.resource_usage import resource_usage
+from utils.speech import recognize
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +17,6 @@ class VoiceChatListener:
         self.active_listeners: Dict[int, bool] = {}
         self.listener_tasks: Dict[int, asyncio.Task] = {}
         self.wake_words = ['assistant', 'hey assistant', 'ok assistant', 'hello assistant']
-        self.recognizer = sr.Recognizer()
 
     def is_listening(self, chat_id: int) -> bool:
         return self.active_listeners.get(chat_id, False)
@@ -62,7 +63,16 @@ class VoiceChatListener:
             if not self.is_listening(chat_id):
                 return
 
-            text = await self._recognize_speech(audio_file_path)
+            blocked = resource_usage.over_quota(chat_id, "asr_seconds")
+            if blocked:
+                logger.info(f"Skipping voice segment in chat {chat_id}: {blocked[0]} quota used up")
+                return
+
+            async with resource_usage.job(chat_id):
+                started = time.perf_counter()
+                text = await self._recognize_speech(audio_file_path)
+                recognized_in = time.perf_counter() - started
+            resource_usage.record("asr_seconds", recognized_in, chat_id)
 
             if text:
                 logger.info(f"Recognized in voice chat {chat_id}: {text}")
@@ -70,42 +80,18 @@ class VoiceChatListener:
                 command = self._extract_command(text)
 
                 if command:
+                    command['recognized_in'] = recognized_in
                     logger.info(f"Extracted command in chat {chat_id}: {command}")
                     await command_handler(chat_id, command)
 
         except Exception as e:
             logger.error(f"Error processing voice segment for chat {chat_id}: {e}")
 
+    @timed("asr")
     async def _recognize_speech(self, audio_file_path: str) -> Optional[str]:
         try:
-            audio = AudioSegment.from_file(audio_file_path)
-
-            wav_path = audio_file_path.replace(os.path.splitext(audio_file_path)[1], '.wav')
-            audio.export(wav_path, format='wav')
-
-            with sr.AudioFile(wav_path) as source:
-                audio_data = self.recognizer.record(source)
-
-                try:
-                    text = self.recognizer.recognize_google(audio_data)
-
-                    if os.path.exists(wav_path):
-                        os.remove(wav_path)
-
-                    return text.lower()
-
-                except sr.UnknownValueError:
-                    return None
-                except sr.RequestError as e:
-                    logger.error(f"Speech recognition error: {e}")
-                    return None
-                finally:
-                    if os.path.exists(wav_path):
-                        try:
-                            os.remove(wav_path)
-                        except:
-                            pass
-
+            text = await recognize(audio_file_path)
+            return text.lower() if text else None
         except Exception as e:
             logger.error(f"Error in speech recognition: {e}")
             return None